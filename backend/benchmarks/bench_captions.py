@@ -0,0 +1,99 @@
+"""
+Micro-benchmark: the old in-memory _parse_vtt vs. the streaming caption parser.
+
+Run from backend/:
+    python benchmarks/bench_captions.py [vtt files...]
+Defaults to the checked-in temp_sub.en.vtt / temp_sub.ja.vtt samples plus a
+synthetic two-line rolling-caption file.
+"""
+import os
+import re
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.captions import parse_caption_file, segments_to_text
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_FILES = [os.path.join(ROOT, "temp_sub.en.vtt"), os.path.join(ROOT, "temp_sub.ja.vtt")]
+
+
+def legacy_parse_vtt(vtt: str) -> str:
+    """YouTubeService._parse_vtt as it was before the streaming parser."""
+    lines = []
+    for line in vtt.split('\n'):
+        line = line.strip()
+        if not line or line == "WEBVTT" or '-->' in line:
+            continue
+        if any(line.startswith(p) for p in ('Kind:', 'Language:', 'NOTE')):
+            continue
+        line = re.sub(r'<[^>]+>', '', line)
+        line = line.replace('&nbsp;', ' ').replace('&#39;', "'").replace('&amp;', '&')
+        if line and (not lines or line != lines[-1]):
+            lines.append(line)
+    return ' '.join(lines)
+
+
+def legacy_from_file(path: str) -> str:
+    with open(path, 'r', encoding='utf-8') as f:
+        return legacy_parse_vtt(f.read())
+
+
+def streaming_from_file(path: str) -> str:
+    return segments_to_text(parse_caption_file(path))
+
+
+def synthetic_rolling_vtt(n_lines: int = 2000) -> str:
+    """
+    Two-line rolling layout where the 10ms transition cue repeats both lines,
+    which the old adjacent-duplicate check lets through.
+    """
+    out = ["WEBVTT", "Kind: captions", "Language: en", ""]
+    t = 0.0
+    def ts(x):
+        return f"00:{int(x // 60):02d}:{x % 60:06.3f}"
+    for i in range(1, n_lines):
+        prev, cur = f"line number {i - 1} of the talk", f"line number {i} of the talk"
+        out += [f"{ts(t)} --> {ts(t + 1.5)}", prev, cur, ""]
+        out += [f"{ts(t + 1.5)} --> {ts(t + 1.51)}", prev, cur, ""]
+        t += 1.51
+    return "\n".join(out) + "\n"
+
+
+def _time(fn, path, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(path)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def _repeated_lines(text: str) -> int:
+    # Sentences that appear more than once: a proxy for rolling-caption leakage
+    sentences = [s.strip() for s in re.split(r'(?<=[.?!。])\s*', text) if s.strip()]
+    return len(sentences) - len(set(sentences))
+
+
+def main():
+    files = sys.argv[1:]
+    if not files:
+        synthetic = os.path.join(tempfile.mkdtemp(), "synthetic_rolling.vtt")
+        with open(synthetic, "w", encoding="utf-8") as f:
+            f.write(synthetic_rolling_vtt())
+        files = DEFAULT_FILES + [synthetic]
+    repeat = 50
+    print(f"{'file':22} {'parser':10} {'best ms':>8} {'chars':>7} {'repeats':>8} {'segments':>9}")
+    for path in files:
+        name = os.path.basename(path)
+        legacy_t, legacy_out = _time(legacy_from_file, path, repeat)
+        stream_t, stream_out = _time(streaming_from_file, path, repeat)
+        n_segments = len(parse_caption_file(path))
+        print(f"{name:22} {'legacy':10} {legacy_t * 1000:>8.2f} {len(legacy_out):>7} {_repeated_lines(legacy_out):>8} {'-':>9}")
+        print(f"{name:22} {'streaming':10} {stream_t * 1000:>8.2f} {len(stream_out):>7} {_repeated_lines(stream_out):>8} {n_segments:>9}")
+
+
+if __name__ == "__main__":
+    main()
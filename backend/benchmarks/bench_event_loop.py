@@ -0,0 +1,101 @@
+"""
+Event-loop responsiveness while 20 analyses run in-process.
+
+Starts N process_analysis coroutines (what BackgroundTasks does under uvicorn) against
+blocking fakes of YouTube / Gemini / Supabase, and meanwhile probes GET /health and
+GET /api/analyze/{id}. With --blocking the old behaviour (blocking calls made directly
+on the event loop) is emulated for comparison.
+
+Run from backend/ (needs fastapi + httpx):
+    python benchmarks/bench_event_loop.py --analyses 20
+    python benchmarks/bench_event_loop.py --analyses 20 --blocking
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["JOB_QUEUE_BACKEND"] = "inline"
+
+import httpx
+from benchmarks.fakes import FakeSupabase, FakeYouTubeService, FakeGeminiService
+
+
+def _install_fakes(registry, gemini_latency: float):
+    registry._project_id, registry._project_id_resolved = "bench", True
+    registry._youtube = FakeYouTubeService()
+    registry._gemini = FakeGeminiService(latency=gemini_latency)
+    registry._supabase, registry._supabase_built = FakeSupabase(), True
+
+
+def _pct(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))] * 1000
+
+
+async def _probe(client, path, samples, stop):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await client.get(path)
+        samples.append(time.perf_counter() - t0)
+        await asyncio.sleep(0.05)
+
+
+async def main(args):
+    from main import app
+    from dependencies import registry
+    from routers import analysis
+
+    _install_fakes(registry, args.gemini_latency)
+    if args.blocking:
+        async def inline_blocking(pool_name, func, *a, **kw):
+            return func(*a, **kw)
+        analysis.run_blocking = inline_blocking
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        row = registry.supabase.table("video_analyses").insert({"status": "pending"}).execute().data[0]
+        get_path = f"/api/analyze/{row['id']}"
+
+        # Idle baseline
+        idle_health, idle_get = [], []
+        for _ in range(20):
+            t0 = time.perf_counter(); await client.get("/health"); idle_health.append(time.perf_counter() - t0)
+            t0 = time.perf_counter(); await client.get(get_path); idle_get.append(time.perf_counter() - t0)
+
+        # Loaded: N analyses in flight
+        stop = asyncio.Event()
+        load_health, load_get = [], []
+        probes = [
+            asyncio.create_task(_probe(client, "/health", load_health, stop)),
+            asyncio.create_task(_probe(client, get_path, load_get, stop)),
+        ]
+        jobs = []
+        for i in range(args.analyses):
+            req = analysis.AnalysisRequest(
+                youtube_url=f"https://www.youtube.com/watch?v=bench{i:06d}", user_id="bench",
+                video_title="", company="", role="", target_person="",
+            )
+            rec = registry.supabase.table("video_analyses").insert({"status": "pending"}).execute().data[0]
+            jobs.append(asyncio.create_task(analysis.process_analysis(req, rec["id"])))
+        t0 = time.perf_counter()
+        await asyncio.gather(*jobs)
+        wall = time.perf_counter() - t0
+        stop.set()
+        await asyncio.gather(*probes)
+
+    mode = "blocking (old)" if args.blocking else "offloaded"
+    print(f"{args.analyses} analyses, mode={mode}, wall={wall:.2f}s")
+    print(f"{'endpoint':24} {'idle p50':>10} {'load p50':>10} {'load p99':>10} {'load max':>10} {'probes':>7}")
+    for name, idle, load in (("GET /health", idle_health, load_health), ("GET /api/analyze/{id}", idle_get, load_get)):
+        print(f"{name:24} {_pct(idle, .5):>8.1f}ms {_pct(load, .5):>8.1f}ms {_pct(load, .99):>8.1f}ms {max(load) * 1000:>8.1f}ms {len(load):>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--analyses", type=int, default=20)
+    parser.add_argument("--gemini-latency", type=float, default=2.0)
+    parser.add_argument("--blocking", action="store_true")
+    asyncio.run(main(parser.parse_args()))
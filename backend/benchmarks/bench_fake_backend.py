@@ -0,0 +1,97 @@
+"""
+The fake model backend behind the real GeminiService: schema check of every analysis method,
+then full-transcript analyses per second at several concurrency levels, through the model gateway.
+No network or credentials needed; the same setup runs the API with MODEL_BACKEND=fake.
+
+Run from backend/:
+    python benchmarks/bench_fake_backend.py --dashboard-latency-ms 2000 --concurrency 1 8 32
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp())
+
+from services.gemini_service import GeminiService
+from services.model_backends import FakeBackend
+
+DASHBOARD_KEYS = ("overall_performance", "high_level_metrics", "emotion_radar", "timeline_analysis", "recommendations", "summary")
+
+
+def check_schemas(gemini: GeminiService, workdir: str) -> list:
+    """Returns a list of problems; empty if every method got the fields its callers read."""
+    image = b"\xff\xd8\xff" + b"\0" * 512
+    frame_path = os.path.join(workdir, "frame.jpg")
+    audio_path = os.path.join(workdir, "audio.mp3")
+    for path, data in ((frame_path, image), (audio_path, b"ID3" + b"\0" * 512)):
+        with open(path, "wb") as f:
+            f.write(data)
+    segments = [{"start": float(t), "end": t + 5.0, "text": f"Sentence at {t}."} for t in range(0, 3600, 5)]
+    transcript = " ".join(segment["text"] for segment in segments)
+    checks = {
+        "full_transcript": (lambda: gemini.analyze_full_transcript("Short talk.", {}), DASHBOARD_KEYS),
+        "chunked_transcript": (lambda: gemini.analyze_full_transcript(transcript, {}, segments), DASHBOARD_KEYS),
+        "audio_multimodal": (lambda: gemini.analyze_audio_multimodal(audio_path, keyframes=[(1.0, frame_path)]), DASHBOARD_KEYS),
+        "frames": (lambda: gemini.analyze_frames([(1.0, frame_path), (9.0, frame_path)]), ("frames", "visual_analysis", "visual_scores")),
+        "snapshot": (lambda: gemini.analyze_snapshot(image), ("score", "feedback", "emotion")),
+        "snapshot_batch": (lambda: gemini.analyze_snapshot_batch([(image, "image/jpeg", t) for t in (1.0, 2.0, 3.0)]), ("score", "feedback", "emotion")),
+        "audio": (lambda: gemini.analyze_audio(b"\0" * 256), ("score", "feedback", "metric")),
+        "transcript": (lambda: gemini.analyze_transcript("We grew revenue by forty percent."), ("score", "metric", "feedback")),
+    }
+    problems = []
+    for name, (run, keys) in checks.items():
+        try:
+            result = run()
+        except Exception as e:
+            problems.append(f"{name}: raised {e}")
+            continue
+        for item in result if isinstance(result, list) else [result]:
+            missing = [key for key in keys if key not in item]
+            if "error" in item or missing:
+                problems.append(f"{name}: error={item.get('error')} missing={missing}")
+                break
+    return problems
+
+
+def throughput(gemini: GeminiService, concurrency: int, analyses: int):
+    def one(i: int) -> float:
+        started = time.perf_counter()
+        gemini.analyze_full_transcript(f"Talk number {i}.", {})
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(pool.map(one, range(analyses)))
+    wall = time.perf_counter() - started
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"concurrency={concurrency:3} analyses={analyses:4} {analyses / wall:7.2f}/s  "
+          f"p50={statistics.median(latencies):5.2f}s p95={p95:5.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--dashboard-latency-ms", type=float, default=1000)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="injected 503 rate, retried by the gateway")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--analyses", type=int, default=64)
+    args = parser.parse_args()
+
+    backend = FakeBackend(latency_ms=args.latency_ms, dashboard_latency_ms=args.dashboard_latency_ms,
+                          rate_5xx=args.error_rate, seed=1)
+    gemini = GeminiService(backend=backend)
+    problems = check_schemas(gemini, tempfile.mkdtemp())
+    print("schema check:", "ok" if not problems else problems)
+    for concurrency in args.concurrency:
+        throughput(gemini, concurrency, args.analyses)
+    print(f"model calls={backend.calls} gateway={gemini.gateway.stats()['lanes']}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compares the old fixed 2s polling loop with the backoff waiter's poll schedule.
+
+Run from backend/:
+    python benchmarks/bench_file_waiter.py [--files 5000] [--initial 0.5 --max 6 --multiplier 1.5]
+Processing times are drawn from long-tailed distributions for short (audio-like) and long
+(video-like) files; the schedules are simulated, so nothing actually sleeps.
+Reports detection delay (time from "ready" to the poll that notices it) and get_file calls per file.
+Feed real numbers from GET /analyze/files/stats back into the distributions to re-tune.
+"""
+import os
+import sys
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.file_waiter import backoff_delays, WAIT_INITIAL_INTERVAL, WAIT_MAX_INTERVAL, WAIT_MULTIPLIER
+
+
+def fixed_interval(interval: float = 2.0):
+    while True:
+        yield interval
+
+
+def simulate(processing_times, delays_factory):
+    detection, polls = [], []
+    for ready in processing_times:
+        delays = delays_factory()
+        now, n = 0.0, 0
+        while now < ready:
+            now += next(delays)
+            n += 1
+        detection.append(now - ready)
+        polls.append(n)
+    detection.sort()
+    return statistics.mean(detection), detection[int(len(detection) * 0.95)], statistics.mean(polls)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--initial", type=float, default=WAIT_INITIAL_INTERVAL)
+    parser.add_argument("--max", type=float, default=WAIT_MAX_INTERVAL)
+    parser.add_argument("--multiplier", type=float, default=WAIT_MULTIPLIER)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    workloads = {
+        "short": [min(rng.lognormvariate(1.0, 0.8), 600) for _ in range(args.files)],
+        "long": [min(rng.lognormvariate(3.4, 0.8), 600) for _ in range(args.files)],
+    }
+    schedules = {
+        "fixed-2s": fixed_interval,
+        "backoff": lambda: backoff_delays(args.initial, args.max, args.multiplier),
+    }
+
+    print(f"backoff: initial={args.initial}s max={args.max}s multiplier={args.multiplier}")
+    print(f"{'workload':9} {'median':>7} {'schedule':9} {'mean delay':>11} {'p95 delay':>10} {'polls/file':>11}")
+    for name, times in workloads.items():
+        median = statistics.median(times)
+        for label, factory in schedules.items():
+            mean, p95, polls = simulate(times, factory)
+            print(f"{name:9} {median:>6.1f}s {label:9} {mean:>10.2f}s {p95:>9.2f}s {polls:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
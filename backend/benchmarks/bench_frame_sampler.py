@@ -0,0 +1,98 @@
+"""
+Tokens per minute of video: full-video upload vs. audio track + de-duplicated frame sample.
+
+Run from backend/:
+    python benchmarks/bench_frame_sampler.py video.mp4 [video2.mp4 ...] [--count-tokens]
+    python benchmarks/bench_frame_sampler.py --synthetic
+Real files need ffmpeg/ffprobe. Token figures use Gemini's published rates (video: 258 tokens per
+frame at 1 fps plus 32 audio tokens per second; each image 258 tokens); --count-tokens asks the
+API instead (needs GEMINI_API_KEY). --synthetic runs only the selection step on generated hashes.
+"""
+import os
+import sys
+import random
+import argparse
+import tempfile
+import shutil
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.frame_sampler import sample_frames, select_frames
+
+VIDEO_FRAME_TOKENS = 258
+AUDIO_TOKENS_PER_SECOND = 32
+IMAGE_TOKENS = 258
+
+
+def estimate(duration: float, kept: int):
+    full = duration * (VIDEO_FRAME_TOKENS + AUDIO_TOKENS_PER_SECOND)
+    sampled = duration * AUDIO_TOKENS_PER_SECOND + kept * IMAGE_TOKENS
+    return full, sampled
+
+
+def report(name: str, duration: float, sampled: int, kept: int, full_tokens: float, sampled_tokens: float):
+    minutes = duration / 60
+    print(f"{name:24} {duration:>7.0f}s {sampled:>8} {kept:>6} {kept / minutes:>9.1f} "
+          f"{full_tokens / minutes:>11.0f} {sampled_tokens / minutes:>11.0f} {1 - sampled_tokens / full_tokens:>8.1%}")
+
+
+def synthetic_hashes(duration: int, mean_shot: float, rng: random.Random):
+    """1 fps hashes for a video of shots: small jitter within a shot, a new random hash per cut."""
+    hashes, t = [], 0
+    while t < duration:
+        base = rng.getrandbits(64)
+        for _ in range(max(1, int(rng.expovariate(1 / mean_shot)))):
+            if t >= duration:
+                break
+            noise = 0
+            for _ in range(rng.randint(0, 4)):
+                noise |= 1 << rng.randrange(64)
+            hashes.append((float(t), base ^ noise))
+            t += 1
+    return hashes
+
+
+def count_tokens(video_path: str, frames):
+    import google.generativeai as genai
+    from services.gemini_service import GeminiService
+    gemini = GeminiService()
+    video = genai.upload_file(path=video_path)
+    from services.file_waiter import wait_for_file
+    video = wait_for_file(video, genai.get_file, kind="bench")
+    full = gemini.backend.model.count_tokens([video]).total_tokens
+    images = gemini.backend.model.count_tokens(gemini._keyframe_parts(frames)).total_tokens
+    genai.delete_file(video.name)
+    return full, images
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("videos", nargs="*")
+    parser.add_argument("--synthetic", action="store_true")
+    parser.add_argument("--count-tokens", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'video':24} {'duration':>8} {'sampled':>8} {'kept':>6} {'kept/min':>9} {'full tok/m':>11} {'ours tok/m':>11} {'saved':>8}")
+    if args.synthetic or not args.videos:
+        rng = random.Random(7)
+        for name, duration, mean_shot in [("talking-head 20min", 1200, 120), ("interview 30min", 1800, 20),
+                                          ("keynote+slides 45min", 2700, 8)]:
+            hashes = synthetic_hashes(duration, mean_shot, rng)
+            kept = len(select_frames(hashes))
+            report(name, duration, len(hashes), kept, *estimate(duration, kept))
+
+    for path in args.videos:
+        out_dir = tempfile.mkdtemp()
+        try:
+            frames, stats = sample_frames(path, out_dir)
+            full, sampled = estimate(stats["duration_seconds"], stats["kept"])
+            if args.count_tokens:
+                full, images = count_tokens(path, frames)
+                sampled = stats["duration_seconds"] * AUDIO_TOKENS_PER_SECOND + images
+            report(os.path.basename(path)[:24], stats["duration_seconds"], stats["sampled"], stats["kept"], full, sampled)
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
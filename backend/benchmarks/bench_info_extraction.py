@@ -0,0 +1,134 @@
+"""
+yt-dlp round-trips per analysis: runs the real YouTubeService (metadata, transcript with the yt-dlp
+caption fallback, and optionally the audio download) against FakeYoutubeDL and counts extractions.
+
+  before: every consumer resolves the video itself (info cache disabled), metadata then transcript
+  after:  one shared extraction per video, metadata and transcript fetched concurrently (process_analysis)
+
+The youtube-transcript-api strategy is made to fail, so the yt-dlp fallback runs on every video: the
+case that used to cost a second extraction. Exits non-zero unless "after" needs one extraction per
+analysis. Run from backend/ (needs yt-dlp installed; nothing goes over the network):
+    python benchmarks/bench_info_extraction.py --videos 8 --extract-latency 0.5 --download
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp())
+os.environ.setdefault("MEDIA_STREAMING", "0")
+
+from benchmarks.fakes import FakeYoutubeDL
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_FIXTURE = os.path.join(os.path.dirname(BACKEND_DIR), "temp_sub.en.vtt")
+
+
+class _CaptionResponse:
+    def __init__(self, text: str):
+        self.text = text
+        self.encoding = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.text.splitlines())
+
+
+class _CaptionSession:
+    """Serves the recorded caption file for every caption track URL."""
+
+    def __init__(self, text: str, latency: float):
+        self.text = text
+        self.latency = latency
+
+    def get(self, url, timeout=None, stream=False):
+        time.sleep(self.latency)
+        return _CaptionResponse(self.text)
+
+
+def _service(shared: bool, captions: str, caption_latency: float):
+    from services import youtube_service
+    from services.video_info_cache import VideoInfoCache
+
+    youtube_service.yt_dlp.YoutubeDL = FakeYoutubeDL
+    service = youtube_service.YouTubeService()
+    if not shared:
+        service.info_cache = VideoInfoCache(ttl_seconds=0)
+
+    def no_api_captions(vid, cookie_path, cancel=None):
+        raise youtube_service.NoCaptionsError("No English or Japanese transcript found for this video.")
+
+    service._fetch_via_transcript_api = no_api_captions
+    session = _CaptionSession(captions, caption_latency)
+    service._get_http_session = lambda cookie_path=None: session
+    return service
+
+
+async def run(mode: str, args, captions: str) -> dict:
+    from services.executor import run_blocking
+    from services.workspace import get_workspace_manager
+
+    shared = mode == "after"
+    service = _service(shared, captions, args.caption_latency)
+    FakeYoutubeDL.reset()
+    per_video = []
+    for i in range(args.videos):
+        url = f"https://www.youtube.com/watch?v={mode[0]}{int(time.time() * 1000) % 10**6:06d}{i:04d}"
+        t0 = time.perf_counter()
+        if shared:
+            metadata, entry = await asyncio.gather(
+                run_blocking("youtube", service.get_metadata, url),
+                run_blocking("youtube", service.get_transcript_entry, url),
+            )
+        else:
+            metadata = await run_blocking("youtube", service.get_metadata, url)
+            entry = await run_blocking("youtube", service.get_transcript_entry, url)
+        if not metadata or not entry["text"]:
+            raise RuntimeError(f"{mode}: empty metadata or transcript for {url}")
+        if args.download:
+            path = await run_blocking("youtube", service.download_audio, url)
+            get_workspace_manager().release_path(path)
+        per_video.append(time.perf_counter() - t0)
+    return {
+        "mode": mode,
+        "extractions_per_analysis": FakeYoutubeDL.extractions / args.videos,
+        "mean_seconds": sum(per_video) / len(per_video),
+        "info_cache": service.info_cache.stats(),
+    }
+
+
+async def main(args) -> int:
+    with open(args.captions, encoding="utf-8") as f:
+        captions = f.read()
+    FakeYoutubeDL.latency = args.extract_latency
+    results = [await run(mode, args, captions) for mode in ("before", "after")]
+    for result in results:
+        print(f"{result['mode']:<6} extractions/analysis={result['extractions_per_analysis']:.2f}  "
+              f"mean={result['mean_seconds']:.2f}s  info_cache={result['info_cache']}")
+    before, after = results
+    saved = before["extractions_per_analysis"] - after["extractions_per_analysis"]
+    print(f"saved {saved:.2f} extractor round-trips and {before['mean_seconds'] - after['mean_seconds']:.2f}s per analysis")
+    ok = after["extractions_per_analysis"] == 1
+    print("PASS" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--videos", type=int, default=8)
+    parser.add_argument("--extract-latency", type=float, default=0.5, help="seconds per yt-dlp extraction")
+    parser.add_argument("--caption-latency", type=float, default=0.1, help="seconds per caption file fetch")
+    parser.add_argument("--captions", default=DEFAULT_FIXTURE, help="recorded caption file served for every track")
+    parser.add_argument("--download", action="store_true", help="also download the audio (audio tier)")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,89 @@
+"""
+Job queue throughput: N concurrent submissions drained by worker pools of different sizes.
+
+Each job is a stand-in for process_analysis that sleeps for --job-ms (blocking I/O),
+so the numbers show queue/claim overhead and how throughput scales with workers.
+
+Run from backend/:
+    python benchmarks/bench_job_queue.py --jobs 200 --job-ms 50 --workers 1 2 4 8
+"""
+import os
+import sys
+import time
+import uuid
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.job_queue import SQLiteJobQueue, QueueFull
+from services.worker_pool import WorkerPool, JOB_HANDLERS
+
+
+def sleep_job(payload: dict, stop=None):
+    time.sleep(payload["job_ms"] / 1000.0)
+
+
+def run(num_jobs: int, job_ms: int, num_workers: int, max_pending: int):
+    db_path = os.path.join(tempfile.mkdtemp(), "jobs.db")
+    os.environ["JOB_QUEUE_BACKEND"] = "sqlite"
+    os.environ["DATA_DIR"] = os.path.dirname(db_path)
+    queue = SQLiteJobQueue(db_path, max_pending=max_pending)
+    JOB_HANDLERS["sleep"] = "benchmarks.bench_job_queue:sleep_job"
+
+    rejected = 0
+    lock = threading.Lock()
+
+    def submit():
+        nonlocal rejected
+        try:
+            queue.enqueue(str(uuid.uuid4()), {"job_ms": job_ms}, kind="sleep")
+        except QueueFull:
+            with lock:
+                rejected += 1
+
+    pool = WorkerPool(num_workers, poll_interval=0.01)
+    pool.start()
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=submit) for _ in range(num_jobs)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    submit_elapsed = time.perf_counter() - t0
+
+    accepted = num_jobs - rejected
+    while queue.stats().get("done", 0) < accepted:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - t0
+    pool.stop()
+
+    return {
+        "workers": num_workers,
+        "accepted": accepted,
+        "rejected": rejected,
+        "submit_ms": submit_elapsed * 1000,
+        "jobs_per_sec": accepted / elapsed,
+        "ideal_jobs_per_sec": num_workers * 1000.0 / job_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--job-ms", type=int, default=50)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--max-pending", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{args.jobs} concurrent submissions, {args.job_ms}ms per job")
+    print(f"{'workers':>8} {'accepted':>9} {'rejected':>9} {'submit ms':>10} {'jobs/s':>8} {'ideal':>8}")
+    for n in args.workers:
+        r = run(args.jobs, args.job_ms, n, args.max_pending)
+        print(f"{r['workers']:>8} {r['accepted']:>9} {r['rejected']:>9} {r['submit_ms']:>10.1f} {r['jobs_per_sec']:>8.1f} {r['ideal_jobs_per_sec']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Supabase status writes per job: direct update().eq() round trips vs. the JobStateWriter.
+
+N concurrent jobs follow the process_analysis path with a transcript miss, i.e.
+downloading -> analyzing -> downloading -> analyzing -> completed, against a fake Supabase
+with --db-latency per statement. Reports UPDATE statements issued and the time each job spent
+blocked on state writes, plus the stage_timings a row ends up with.
+
+Run from backend/ (no external services needed):
+    python benchmarks/bench_job_state.py --jobs 20
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import FakeSupabase
+from services.job_state import JobStateWriter
+
+TRANSITIONS = ["downloading", "analyzing", "downloading", "analyzing"]
+
+
+async def job(analysis_id: str, write, stage, work: float) -> float:
+    blocked = 0.0
+    for status in TRANSITIONS:
+        t0 = time.perf_counter()
+        await write(analysis_id, {"status": status})
+        blocked += time.perf_counter() - t0
+        with stage(analysis_id, "download" if status == "downloading" else "model"):
+            await asyncio.sleep(work)
+    t0 = time.perf_counter()
+    await write(analysis_id, {"status": "completed", "analysis_results": {"overall_performance": {"score": 80}}})
+    return blocked + time.perf_counter() - t0
+
+
+async def run(label: str, jobs: int, db_latency: float, work: float):
+    supabase = FakeSupabase(latency=db_latency)
+    ids = [supabase.table("video_analyses").insert({"status": "pending"}).execute().data[0]["id"] for _ in range(jobs)]
+    supabase.calls = 0
+    writer = None
+
+    if label == "direct":
+        async def write(analysis_id, fields):
+            await asyncio.to_thread(supabase.table("video_analyses").update(fields).eq("id", analysis_id).execute)
+
+        class _NoStage:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+        def stage(analysis_id, name):
+            return _NoStage()
+    else:
+        writer = JobStateWriter(supabase)
+
+        async def write(analysis_id, fields):
+            if set(fields) == {"status"}:
+                writer.set_status(analysis_id, fields["status"])
+            else:
+                await asyncio.to_thread(writer.finish, analysis_id, fields)
+        stage = writer.stage
+
+    blocked = await asyncio.gather(*(job(analysis_id, write, stage, work) for analysis_id in ids))
+    if writer is not None:
+        writer.close()
+
+    print(f"{label:8} jobs={jobs} UPDATE statements={supabase.calls:4} ({supabase.calls / jobs:.2f}/job)  "
+          f"blocked on writes p50={statistics.median(blocked) * 1000:7.1f}ms max={max(blocked) * 1000:7.1f}ms")
+    if writer is not None:
+        print(f"         writer {writer.stats()}")
+        row = supabase.tables["video_analyses"][ids[0]]
+        print(f"         stage_timings {json.dumps(row.get('stage_timings'))}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--db-latency", type=float, default=0.05, help="seconds per Supabase statement")
+    parser.add_argument("--work", type=float, default=0.1, help="seconds of work between transitions")
+    args = parser.parse_args()
+
+    asyncio.run(run("direct", args.jobs, args.db_latency, args.work))
+    asyncio.run(run("writer", args.jobs, args.db_latency, args.work))
+
+
+if __name__ == "__main__":
+    main()
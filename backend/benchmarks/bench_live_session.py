@@ -0,0 +1,77 @@
+"""
+End-to-end latency of the live-coaching channel against a local fake model.
+
+A simulated HUD sends JPEG-sized frames at --fps and an audio chunk every --audio-every seconds
+into a LiveSession whose fake model takes --latency seconds per call (slower than the frame
+interval, so it falls behind). Latency is measured client-side, from send to result received.
+Compares latest-wins coalescing with queueing every input (what sequential polling degrades to).
+
+Run from backend/ (no external services needed):
+    python benchmarks/bench_live_session.py --fps 4 --latency 0.6 --duration 20
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.live_session import LiveSession, _percentile
+
+
+async def run(coalesce: bool, fps: float, audio_every: float, latency: float, duration: float):
+    sent_at = {}
+    latencies = {"frame": [], "audio": []}
+
+    async def fake_model(payload, timestamp):
+        await asyncio.sleep(latency)
+        return {"score": 80}
+
+    async def send(message):
+        key = (message["type"], message["timestamp"])
+        latencies[message["type"]].append(time.perf_counter() - sent_at[key])
+
+    session = LiveSession({"frame": fake_model, "audio": fake_model}, send, coalesce=coalesce)
+    frame = os.urandom(30_000)
+    audio = os.urandom(16_000)
+    start = time.perf_counter()
+    tick = 1.0 / fps
+    next_audio = audio_every
+    media_time = 0.0
+    while media_time < duration:
+        sent_at[("frame", media_time)] = time.perf_counter()
+        session.submit("frame", frame, media_time)
+        if media_time >= next_audio:
+            sent_at[("audio", media_time)] = time.perf_counter()
+            session.submit("audio", audio, media_time)
+            next_audio += audio_every
+        media_time += tick
+        await asyncio.sleep(max(start + media_time - time.perf_counter(), 0))
+
+    # Let in-flight and queued calls finish (bounded, so the queued mode can't run forever)
+    deadline = time.perf_counter() + duration
+    while any(not t.done() for t in session._tasks.values()) and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+    session.close()
+
+    label = "latest-wins" if coalesce else "queue-all"
+    for kind, values in latencies.items():
+        print(f"{label:12} {kind:6} sent={sum(1 for k, _ in sent_at if k == kind):4} scored={len(values):4} "
+              f"p50={_percentile(values, 0.50) * 1000:8.1f}ms p99={_percentile(values, 0.99) * 1000:8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fps", type=float, default=4.0)
+    parser.add_argument("--audio-every", type=float, default=2.0)
+    parser.add_argument("--latency", type=float, default=0.6, help="fake model seconds per call")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of simulated session")
+    args = parser.parse_args()
+
+    asyncio.run(run(False, args.fps, args.audio_every, args.latency, args.duration))
+    asyncio.run(run(True, args.fps, args.audio_every, args.latency, args.duration))
+
+
+if __name__ == "__main__":
+    main()
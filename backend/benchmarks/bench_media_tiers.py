@@ -0,0 +1,85 @@
+"""
+Wall-clock and bytes comparison of the media fallback tiers on real videos:
+full 720p video download vs. audio-only download vs. audio + keyframes.
+
+Needs network access, yt-dlp and ffmpeg. Run from backend/:
+    python benchmarks/bench_media_tiers.py URL [URL ...] [--analyze]
+"bytes" is what lands on disk and is later uploaded to Gemini. The keyframe tier fetches only the
+ranges around each seek point, so its network transfer is close to the size of the stills it produces.
+--analyze also times the Gemini call for each tier (needs GEMINI_API_KEY or GCP_PROJECT_ID).
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.youtube_service import YouTubeService
+
+
+def _size(paths) -> int:
+    return sum(os.path.getsize(p) for p in paths if os.path.exists(p))
+
+
+def _timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, time.perf_counter() - t0
+
+
+def run(url: str, youtube: YouTubeService, gemini=None):
+    rows = []
+
+    video_path, seconds = _timed(youtube.download_video, url)
+    rows.append(("video-720p", seconds, _size([video_path]), video_path, None))
+
+    audio_path, seconds = _timed(youtube.download_audio, url)
+    rows.append(("audio", seconds, _size([audio_path]), audio_path, None))
+
+    (frames, frame_workspace), frame_seconds = _timed(youtube.extract_keyframes, url)
+    # Audio and keyframes download concurrently in process_analysis, so the tier costs the slower of the two
+    rows.append(("audio+keyframes", max(seconds, frame_seconds), _size([audio_path]) + _size([p for _, p in frames]),
+                 audio_path, frames))
+
+    for tier, seconds, size, path, keyframes in rows:
+        analyze = ""
+        if gemini is not None:
+            if tier.startswith("video"):
+                _, gemini_seconds = _timed(gemini.analyze_video, path, {})
+            else:
+                _, gemini_seconds = _timed(gemini.analyze_audio_multimodal, path, keyframes=keyframes)
+            analyze = f" {gemini_seconds:>9.1f}s"
+        print(f"{url[-11:]:12} {tier:16} {seconds:>9.1f}s {size / 1e6:>9.1f}MB{analyze}")
+
+    for path in {os.path.dirname(video_path), os.path.dirname(audio_path)}:
+        shutil.rmtree(path, ignore_errors=True)
+    if frame_workspace is not None:
+        frame_workspace.release()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("urls", nargs="+", help="sample videos, ideally a mix of short interviews and long keynotes")
+    parser.add_argument("--analyze", action="store_true")
+    args = parser.parse_args()
+
+    gemini = None
+    if args.analyze:
+        from services.gemini_service import GeminiService
+        gemini = GeminiService(project_id=os.getenv("GCP_PROJECT_ID"))
+
+    youtube = YouTubeService()
+    header = f"{'video':12} {'tier':16} {'download':>10} {'bytes':>11}"
+    print(header + (f" {'gemini':>10}" if gemini else ""))
+    for url in args.urls:
+        try:
+            run(url, youtube, gemini)
+        except Exception as e:
+            print(f"{url}: failed ({e})")
+    youtube.close()
+
+
+if __name__ == "__main__":
+    main()
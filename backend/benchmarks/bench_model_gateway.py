@@ -0,0 +1,117 @@
+"""
+Full analyses vs. a burst of live-HUD snapshot calls against a quota-limited, error-injecting model server.
+
+A local FakeModelServer enforces --quota-rpm (429 beyond it), fails --error-rate of calls with 503 and
+is down (503) for an outage window. Live clients score snapshots every --live-interval seconds while
+full jobs, each a few sequential model calls, start every --job-interval seconds:
+  direct:   every call goes straight to the model, as before
+  gateway:  calls go through ModelGateway lanes ("full" / "snapshot"), rate limited, retried and breaker-guarded
+Reports full jobs completed, snapshot calls answered / rejected early, and what the server saw.
+Exits non-zero unless every full job completes through the gateway.
+
+Run from backend/ (no external services needed):
+    python benchmarks/bench_model_gateway.py
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import FakeModelServer, FakeModelClient
+from services.model_gateway import ModelGateway, ModelRateLimits, CircuitBreaker, ModelCallRejected, LANES
+
+
+def run(label: str, args) -> dict:
+    server = FakeModelServer(rpm=args.quota_rpm, burst=4, error_rate=args.error_rate,
+                             outage=(args.outage_start, args.outage_start + args.outage_seconds))
+    model = FakeModelClient(server.start())
+    gateway = None
+    if label == "gateway":
+        lanes = {name: dict(spec) for name, spec in LANES.items()}
+        lanes["full"]["max_wait"] = 60
+        gateway = ModelGateway(
+            rpm=args.quota_rpm * 0.9, burst=4, concurrency=8, lanes=lanes,
+            limits=ModelRateLimits(os.path.join(tempfile.mkdtemp(), "model_limits.db")),
+            breaker=CircuitBreaker(failures=3, cooldown=1.5), retry_initial=0.3, retry_max=3,
+        )
+
+    def generate(lane: str):
+        if gateway is None:
+            return model.generate_content("prompt")
+        return gateway.call(lane, model.generate_content, "prompt")
+
+    snapshot = {"ok": 0, "failed": 0, "rejected": 0}
+    snapshot_lock = threading.Lock()
+    stop = threading.Event()
+
+    def live_client():
+        while not stop.is_set():
+            try:
+                generate("snapshot")
+                outcome = "ok"
+            except ModelCallRejected:
+                outcome = "rejected"
+            except Exception:
+                outcome = "failed"
+            with snapshot_lock:
+                snapshot[outcome] += 1
+            stop.wait(args.live_interval)
+
+    def full_job(index: int):
+        time.sleep(index * args.job_interval)
+        started = time.monotonic()
+        try:
+            for _ in range(args.calls_per_job):
+                generate("full")
+        except Exception:
+            return None
+        return time.monotonic() - started
+
+    with ThreadPoolExecutor(max_workers=args.live_clients + args.jobs) as pool:
+        live = [pool.submit(live_client) for _ in range(args.live_clients)]
+        jobs = [pool.submit(full_job, i) for i in range(args.jobs)]
+        durations = [job.result() for job in jobs]
+        stop.set()
+        for client in live:
+            client.result()
+    server.stop()
+
+    done = [d for d in durations if d is not None]
+    print(f"{label:8} full jobs completed={len(done)}/{args.jobs} "
+          f"p50={statistics.median(done) if done else 0:5.2f}s max={max(done) if done else 0:5.2f}s  "
+          f"snapshot ok={snapshot['ok']} failed={snapshot['failed']} rejected_early={snapshot['rejected']}  "
+          f"server {server.counts}")
+    if gateway is not None:
+        stats = gateway.stats()
+        print(f"         gateway lanes {stats['lanes']}")
+    return {"completed": len(done)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--quota-rpm", type=float, default=120)
+    parser.add_argument("--error-rate", type=float, default=0.03)
+    parser.add_argument("--outage-start", type=float, default=6.0)
+    parser.add_argument("--outage-seconds", type=float, default=2.5)
+    parser.add_argument("--live-clients", type=int, default=6)
+    parser.add_argument("--live-interval", type=float, default=0.3)
+    parser.add_argument("--jobs", type=int, default=8)
+    parser.add_argument("--job-interval", type=float, default=2.0)
+    parser.add_argument("--calls-per-job", type=int, default=3)
+    args = parser.parse_args()
+
+    run("direct", args)
+    result = run("gateway", args)
+    ok = result["completed"] == args.jobs
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+End-to-end benchmark of the analysis pipeline: POST /analyze (start_analysis) -> process_analysis ->
+GET /analyze/{id} polling, in-process with JOB_QUEUE_BACKEND=inline and local stand-ins for every
+external service:
+  YouTube:  FakeYouTubeService serving the recorded caption fixtures (temp_sub.en.vtt, temp_sub.ja.vtt)
+  Gemini:   the real GeminiService and model gateway on the fake model backend
+  Supabase: FakeSupabase
+For each concurrency level it runs --analyses analyses of distinct videos with at most that many in flight,
+and reports per-stage latency (p50 / p95), analyses per second, peak memory and the pipeline spans
+(services/tracing.py) recorded during the level. Results are saved as JSON
+(with the git commit) so runs on different commits can be compared with --compare.
+
+Run from backend/ (needs fastapi; no network or credentials):
+    python benchmarks/bench_pipeline.py --concurrency 1 4 16 --analyses 32
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/pipeline-<commit>-<time>.json
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import tempfile
+import threading
+import statistics
+import subprocess
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["JOB_QUEUE_BACKEND"] = "inline"
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp())
+
+from benchmarks.fakes import FakeSupabase, FakeYouTubeService
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT = os.path.dirname(BACKEND_DIR)
+DEFAULT_FIXTURES = [os.path.join(ROOT, "temp_sub.en.vtt"), os.path.join(ROOT, "temp_sub.ja.vtt")]
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+STAGES = ("submit", "queue_wait", "metadata", "transcript", "model", "save", "job", "poll", "end_to_end")
+
+
+class _BackgroundTasks:
+    """Starts what start_analysis schedules as soon as it returns, like FastAPI does after the response."""
+
+    def __init__(self, started: dict):
+        self.started = started
+        self.tasks = []
+
+    def add_task(self, func, request, analysis_id):
+        async def run():
+            self.started[analysis_id] = time.time()
+            await func(request, analysis_id)
+        self.tasks.append(asyncio.ensure_future(run()))
+
+
+class _RSSSampler:
+    """Peak resident set size while running, sampled from /proc (falls back to ru_maxrss elsewhere)."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def current() -> int:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, AttributeError):
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.current())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current())
+
+
+def _summary(values: list) -> dict:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "mean": round(statistics.fmean(ordered), 4),
+        "p50": round(statistics.median(ordered), 4),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+        "max": round(ordered[-1], 4),
+    }
+
+
+async def run_level(analysis, supabase, gemini, concurrency: int, analyses: int, level: int, poll_interval: float) -> dict:
+    samples = {stage: [] for stage in STAGES}
+    started = {}
+    background = _BackgroundTasks(started)
+    outcomes = {"completed": 0, "failed": 0}
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with slots:
+            # 11-character ids, distinct per level, so neither the result cache nor single-flight short-circuits
+            video_id = f"L{level:02d}x{i:07d}"
+            request = analysis.AnalysisRequest(
+                youtube_url=f"https://www.youtube.com/watch?v={video_id}", user_id=f"bench-{i}",
+                video_title="", company="", role="", target_person="",
+            )
+            t0 = time.time()
+            response = await analysis.start_analysis(request, background, gemini, supabase)
+            submitted = time.time()
+            samples["submit"].append(submitted - t0)
+            analysis_id, etag = response["analysis_id"], None
+            while True:
+                await asyncio.sleep(poll_interval)
+                p0 = time.perf_counter()
+                reply = await analysis.get_analysis(analysis_id, "status", etag, supabase)
+                samples["poll"].append(time.perf_counter() - p0)
+                if reply.status_code == 304:
+                    continue
+                etag = reply.headers.get("etag")
+                status = json.loads(reply.body)["status"]
+                if status in ("completed", "failed"):
+                    break
+            samples["end_to_end"].append(time.time() - t0)
+            outcomes[status] += 1
+            if analysis_id in started:
+                samples["queue_wait"].append(started[analysis_id] - submitted)
+
+    tracemalloc_peak = None
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    calls_before, statements_before = gemini.backend.calls, supabase.calls
+    spans_before = _span_totals()
+    t0 = time.perf_counter()
+    with _RSSSampler() as rss:
+        await asyncio.gather(*(one(i) for i in range(analyses)))
+        await asyncio.gather(*background.tasks)
+        # Deferred state writes (e.g. the follow-up stage_timings write) land before rows are read back
+        analysis._job_state(supabase).flush()
+    wall = time.perf_counter() - t0
+    if tracemalloc.is_tracing():
+        tracemalloc_peak = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+
+    for analysis_id, begun in started.items():
+        row = supabase.tables["video_analyses"].get(analysis_id) or {}
+        timings = row.get("stage_timings") or {}
+        for stage in ("metadata", "transcript", "model", "save"):
+            if stage in timings:
+                samples[stage].append(timings[stage]["seconds"])
+        if "save" in timings:
+            samples["job"].append(timings["save"]["started_at"] + timings["save"]["seconds"] - begun)
+
+    return {
+        "concurrency": concurrency,
+        "analyses": analyses,
+        **outcomes,
+        "wall_seconds": round(wall, 3),
+        "analyses_per_second": round(outcomes["completed"] / wall, 3),
+        "stages": {stage: _summary(values) for stage, values in samples.items()},
+        "peak_rss_mb": round(rss.peak / 2**20, 1),
+        "tracemalloc_peak_mb": tracemalloc_peak,
+        "model_calls": gemini.backend.calls - calls_before,
+        "db_statements": supabase.calls - statements_before,
+        "spans": _span_delta(spans_before, _span_totals()),
+    }
+
+
+def _span_totals() -> dict:
+    from services.tracing import get_span_recorder
+    return {
+        (entry["span"], json.dumps(entry["labels"], sort_keys=True), entry["outcome"]): entry
+        for entry in get_span_recorder().stats()
+    }
+
+
+def _span_delta(before: dict, after: dict) -> list:
+    """Per span / labels / outcome: count, mean milliseconds, bytes and tokens added between two _span_totals()."""
+    out = []
+    for key, entry in sorted(after.items()):
+        old = before.get(key, {})
+        count = entry["count"] - old.get("count", 0)
+        if not count:
+            continue
+        out.append({
+            "span": entry["span"], "labels": entry["labels"], "outcome": entry["outcome"], "count": count,
+            "mean_ms": round((entry["seconds"] - old.get("seconds", 0.0)) / count * 1000, 2),
+            **{counter: entry[counter] - old.get(counter, 0) for counter in ("bytes", "prompt_tokens", "output_tokens")},
+        })
+    return out
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _print_level(result: dict):
+    stages = "  ".join(
+        f"{stage}={result['stages'][stage]['p50'] * 1000:.0f}/{result['stages'][stage]['p95'] * 1000:.0f}ms"
+        for stage in STAGES if result["stages"][stage].get("count")
+    )
+    print(f"concurrency={result['concurrency']:3} completed={result['completed']}/{result['analyses']} "
+          f"{result['analyses_per_second']:6.2f}/s  peak_rss={result['peak_rss_mb']}MB  (p50/p95) {stages}")
+    for entry in result["spans"]:
+        labels = ",".join(f"{k}={v}" for k, v in entry["labels"].items())
+        print(f"    {entry['span']:<22} {labels:<22} {entry['outcome']:<9} n={entry['count']:<5} "
+              f"mean={entry['mean_ms']:9.1f}ms  bytes={entry['bytes']:<9} tokens={entry['prompt_tokens']}/{entry['output_tokens']}")
+
+
+def _compare(baseline_path: str, results: dict):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    before = {level["concurrency"]: level for level in baseline["levels"]}
+    print(f"vs {baseline.get('commit')} ({os.path.basename(baseline_path)}):")
+    for level in results["levels"]:
+        old = before.get(level["concurrency"])
+        if old is None:
+            continue
+        e2e_old, e2e_new = old["stages"]["end_to_end"].get("p95"), level["stages"]["end_to_end"].get("p95")
+        rps_change = (level["analyses_per_second"] / old["analyses_per_second"] - 1) * 100 if old["analyses_per_second"] else 0.0
+        e2e_change = (e2e_new / e2e_old - 1) * 100 if e2e_old and e2e_new else 0.0
+        rss_change = level["peak_rss_mb"] - old["peak_rss_mb"]
+        print(f"  concurrency={level['concurrency']:3} throughput {rps_change:+6.1f}%  "
+              f"end_to_end p95 {e2e_change:+6.1f}%  peak_rss {rss_change:+.1f}MB")
+
+
+async def main(args) -> dict:
+    from dependencies import registry
+    from routers import analysis
+    from services.gemini_service import GeminiService
+    from services.model_backends import FakeBackend
+
+    supabase = FakeSupabase(latency=args.db_latency)
+    youtube = FakeYouTubeService(latency=args.youtube_latency, fixtures=args.fixtures)
+    backend = FakeBackend(latency_ms=args.model_latency_ms, dashboard_latency_ms=args.dashboard_latency_ms,
+                          rate_5xx=args.model_error_rate, seed=1)
+    gemini = GeminiService(backend=backend)
+    registry._project_id, registry._project_id_resolved = "bench", True
+    registry._youtube, registry._gemini = youtube, gemini
+    registry._supabase, registry._supabase_built = supabase, True
+
+    results = {
+        "benchmark": "pipeline",
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            **{k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+            "gateway": {"rpm": gemini.gateway.rate * 60, "burst": gemini.gateway.burst, "concurrency": gemini.gateway.concurrency},
+        },
+        "levels": [],
+    }
+    for level, concurrency in enumerate(args.concurrency):
+        result = await run_level(analysis, supabase, gemini, concurrency, args.analyses, level, args.poll_interval)
+        _print_level(result)
+        results["levels"].append(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--analyses", type=int, default=32, help="analyses per concurrency level")
+    parser.add_argument("--fixtures", nargs="+", default=DEFAULT_FIXTURES, help="recorded caption files served as transcripts")
+    parser.add_argument("--youtube-latency", type=float, default=0.3, help="seconds per metadata / transcript fetch")
+    parser.add_argument("--db-latency", type=float, default=0.02, help="seconds per Supabase statement")
+    parser.add_argument("--model-latency-ms", type=float, default=300)
+    parser.add_argument("--dashboard-latency-ms", type=float, default=2000)
+    parser.add_argument("--model-error-rate", type=float, default=0.0, help="injected 503 rate")
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--tracemalloc", action="store_true", help="also report peak Python allocations (slows the run)")
+    parser.add_argument("--output", help="results JSON (default benchmarks/results/pipeline-<commit>-<time>.json)")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    results = asyncio.run(main(args))
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"pipeline-{results['commit'] or 'unknown'}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"saved {output}")
+    if args.compare:
+        _compare(args.compare, results)
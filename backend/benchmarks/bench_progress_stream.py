@@ -0,0 +1,85 @@
+"""
+Time-to-first-insight for streamed analyses.
+
+A fake model streams a dashboard-shaped JSON response over --model-seconds (in ~40 character
+chunks, like streamed tokens). Sections are parsed out incrementally and published to a
+ProgressStore, while a subscriber polls it the way GET /analyze/{id}/events does. Prints when each
+section reached the subscriber vs. when the full response (what clients waited for before) was done.
+
+Run from backend/ (no external services needed):
+    python benchmarks/bench_progress_stream.py --model-seconds 25
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.json_stream import ObjectMemberStream
+from services.progress import ProgressStore
+
+
+def fake_dashboard() -> dict:
+    return {
+        "analysis_reliability": {"score": 85, "notice": "Transcript only."},
+        "video_metadata": {"duration": "Unknown", "published_date": "Unknown", "extracted_interviewee_name": "Speaker"},
+        "overall_performance": {"score": 82, "level": "Excellent", "summary": "Clear and structured.", "badge": "Top Performer"},
+        "high_level_metrics": {k: {"score": 80, "label": k.title()} for k in ("confidence", "trustworthiness", "engagement", "clarity")},
+        "emotion_radar": {k: 70 for k in ("confidence", "warmth", "passion", "calmness", "authority", "openness")},
+        "timeline_analysis": [
+            {"timestamp": f"{m:02d}:00", "event": "Key point", "insight": "Strong framing of the argument " * 3, "score": 80}
+            for m in range(30)
+        ],
+        "detailed_analysis": {"strengths": ["Structure"] * 5, "improvements": ["Pacing"] * 5, "summary": "Long-form feedback. " * 40},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-seconds", type=float, default=25.0, help="time for the fake model to stream the whole response")
+    parser.add_argument("--poll", type=float, default=0.5, help="subscriber poll interval (PROGRESS_POLL_SECONDS)")
+    args = parser.parse_args()
+
+    text = json.dumps(fake_dashboard(), indent=2)
+    chunks = [text[i:i + 40] for i in range(0, len(text), 40)]
+    store = ProgressStore(os.path.join(tempfile.mkdtemp(), "progress.db"))
+    analysis_id = "bench"
+    start = time.perf_counter()
+    finished = {}
+
+    def model():
+        members = ObjectMemberStream()
+        for chunk in chunks:
+            time.sleep(args.model_seconds / len(chunks))
+            for key, value in members.feed(chunk):
+                store.publish(analysis_id, "section", key, value)
+        finished["model"] = time.perf_counter() - start
+        store.publish(analysis_id, "status", "completed")
+
+    threading.Thread(target=model, daemon=True).start()
+    store.publish(analysis_id, "status", "analyzing")
+
+    after = 0
+    seen = []
+    while True:
+        events = store.events_after(analysis_id, after)
+        for event in events:
+            after = event["id"]
+            seen.append((time.perf_counter() - start, event["kind"], event["name"]))
+        if seen and seen[-1][2] == "completed":
+            break
+        time.sleep(args.poll)
+
+    for elapsed, kind, name in seen:
+        print(f"{elapsed:7.2f}s  {kind:8} {name}")
+    first_section = next(elapsed for elapsed, kind, _ in seen if kind == "section")
+    print(f"\nfirst section after {first_section:.2f}s, full response after {finished['model']:.2f}s "
+          f"({len(text) / 1000:.1f}KB in {len(chunks)} chunks)")
+
+
+if __name__ == "__main__":
+    main()
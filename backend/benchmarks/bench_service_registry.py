@@ -0,0 +1,75 @@
+"""
+Per-endpoint service setup cost: per-request construction vs. the shared registry.
+
+Old behaviour: every request built a fresh ServiceRegistry-equivalent
+(service_account.json read, YouTubeService, GeminiService/genai.configure, Supabase client).
+New behaviour: the request resolves its dependencies from the process-wide registry.
+
+Run from backend/:
+    python benchmarks/bench_service_registry.py [iterations]
+
+Dummy credentials are used when none are set, so no network calls are made.
+"""
+import os
+import sys
+import time
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("GEMINI_API_KEY", "dummy-key")
+os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.e30.ZRrHA1JJJW8opsbCGfG_HACGpVUMN_a9IV7pAx_Zmeo")
+
+from dependencies import ServiceRegistry
+
+# Which services each endpoint resolves per request
+ENDPOINTS = {
+    "POST /api/analyze": ("youtube", "gemini", "supabase"),
+    "GET /api/analyze/{id}": ("supabase",),
+    "POST /api/analyze/snapshot": ("gemini",),
+    "POST /api/analyze/audio_chunk": ("gemini",),
+    "POST /api/analyze/transcript": ("gemini",),
+    "POST /api/stripe/webhook": ("supabase",),
+}
+
+
+def _resolve(registry, names):
+    for name in names:
+        getattr(registry, name)
+
+
+def _summarize(samples):
+    samples = sorted(samples)
+    return {
+        "mean_us": statistics.mean(samples) * 1e6,
+        "p50_us": samples[len(samples) // 2] * 1e6,
+        "p99_us": samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6,
+    }
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    shared = ServiceRegistry()
+    shared.startup()
+
+    print(f"{'endpoint':32} {'per-request p50':>16} {'registry p50':>14} {'saved/req':>12}")
+    for endpoint, names in ENDPOINTS.items():
+        cold, warm = [], []
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            _resolve(ServiceRegistry(), names)
+            cold.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            _resolve(shared, names)
+            warm.append(time.perf_counter() - t0)
+
+        c, w = _summarize(cold), _summarize(warm)
+        print(f"{endpoint:32} {c['p50_us']:>14.1f}us {w['p50_us']:>12.1f}us {c['mean_us'] - w['mean_us']:>10.1f}us")
+
+    shared.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Single-flight check: N simultaneous POST /analyze submissions of the same video must cost exactly
+one model call, and every submitted row must end up completed with the same dashboard.
+
+Runs start_analysis in-process (JOB_QUEUE_BACKEND=inline) against the Supabase / YouTube / Gemini
+fakes and exits non-zero if the check fails. Run from backend/ (needs fastapi):
+    python benchmarks/bench_single_flight.py --submissions 50
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["JOB_QUEUE_BACKEND"] = "inline"
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp())
+
+from benchmarks.fakes import FakeSupabase, FakeYouTubeService, FakeGeminiService
+
+
+class _BackgroundTasks:
+    """Collects what start_analysis schedules, so the submissions all land before any job runs."""
+
+    def __init__(self):
+        self.tasks = []
+
+    def add_task(self, func, *args, **kwargs):
+        self.tasks.append((func, args, kwargs))
+
+
+async def main(args) -> int:
+    from dependencies import registry
+    from routers import analysis
+    from services.single_flight import get_single_flight
+
+    supabase, gemini = FakeSupabase(), FakeGeminiService(latency=args.gemini_latency)
+    registry._project_id, registry._project_id_resolved = "bench", True
+    registry._youtube, registry._gemini = FakeYouTubeService(), gemini
+    registry._supabase, registry._supabase_built = supabase, True
+
+    background = _BackgroundTasks()
+    video_id = f"sf{int(time.time()) % 10**9:09d}"
+
+    def submission(i: int):
+        request = analysis.AnalysisRequest(
+            youtube_url=f"https://www.youtube.com/watch?v={video_id}", user_id=f"user-{i}",
+            video_title="", company="", role="", target_person="",
+        )
+        return analysis.start_analysis(request, background, gemini, supabase)
+
+    t0 = time.perf_counter()
+    responses = await asyncio.gather(*(submission(i) for i in range(args.submissions)))
+    await asyncio.gather(*(func(*a, **kw) for func, a, kw in background.tasks))
+    # Let the state writer flush its deferred writes
+    analysis._job_state(supabase).flush()
+    wall = time.perf_counter() - t0
+
+    ids = [response["analysis_id"] for response in responses]
+    rows = [supabase.tables["video_analyses"][analysis_id] for analysis_id in ids]
+    completed = sum(1 for row in rows if row.get("status") == "completed")
+    identical = len({repr(row.get("analysis_results")) for row in rows}) == 1
+    deduplicated = sum(1 for response in responses if response.get("deduplicated"))
+
+    print(f"submissions={len(ids)} jobs_started={len(background.tasks)} deduplicated={deduplicated} "
+          f"model_calls={gemini.calls} completed={completed} identical_results={identical} wall={wall:.2f}s")
+    print(f"flights {get_single_flight().stats()}")
+    ok = gemini.calls == 1 and completed == len(ids) and identical
+    print("PASS" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--submissions", type=int, default=50)
+    parser.add_argument("--gemini-latency", type=float, default=0.5)
+    sys.exit(asyncio.run(main(parser.parse_args())))
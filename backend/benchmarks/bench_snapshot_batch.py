@@ -0,0 +1,74 @@
+"""
+Live-coaching snapshot load: C clients each send one frame per tick to /analyze/snapshot.
+Compares one model call per frame (--wait-ms 0) with server-side micro-batching, against a
+fake Gemini whose call costs `latency` plus 5% of it per image. Also reports the request body
+size of base64 JSON vs. multipart for a batch of frames.
+
+Run from backend/ (needs fastapi):
+    python benchmarks/bench_snapshot_batch.py --clients 16 --ticks 5
+"""
+import os
+import sys
+import time
+import json
+import base64
+import asyncio
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from routers import snapshot
+from benchmarks.fakes import FakeGeminiService
+
+
+async def run(clients: int, ticks: int, wait_ms: float, latency: float):
+    snapshot.SNAPSHOT_MICROBATCH_WAIT_MS = wait_ms
+    snapshot._batchers.clear()
+    gemini = FakeGeminiService(latency=latency)
+    image = os.urandom(30_000)
+    request = snapshot.SnapshotRequest(image_data=base64.b64encode(image).decode(), video_url="bench", timestamp=0.0)
+    latencies = []
+
+    async def client():
+        for _ in range(ticks):
+            t0 = time.perf_counter()
+            await snapshot.analyze_snapshot(request, gemini)
+            latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    wall = time.perf_counter() - t0
+    latencies.sort()
+    label = "per-frame" if wait_ms <= 0 else f"micro-batch {wait_ms:g}ms"
+    print(f"{label:20} frames={len(latencies):4} model_calls={gemini.calls:4} wall={wall:6.2f}s "
+          f"p50={statistics.median(latencies) * 1000:7.1f}ms p95={latencies[int(len(latencies) * 0.95) - 1] * 1000:7.1f}ms")
+
+
+def payload_sizes(frames: int, frame_bytes: int = 30_000):
+    image = os.urandom(frame_bytes)
+    body = json.dumps({
+        "video_url": "bench",
+        "frames": [{"image_data": "data:image/jpeg;base64," + base64.b64encode(image).decode(), "timestamp": i}
+                   for i in range(frames)],
+    })
+    # Multipart: raw bytes plus roughly 150 bytes of part headers per frame and per timestamp field
+    multipart = frames * (frame_bytes + 300)
+    print(f"{frames} frames of {frame_bytes // 1000}KB: base64 JSON {len(body) / 1e3:.0f}KB, multipart ~{multipart / 1e3:.0f}KB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--ticks", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.8, help="fake model round trip in seconds")
+    parser.add_argument("--wait-ms", type=float, default=snapshot.SNAPSHOT_MICROBATCH_WAIT_MS)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.clients, args.ticks, 0, args.latency))
+    asyncio.run(run(args.clients, args.ticks, args.wait_ms, args.latency))
+    payload_sizes(snapshot.SNAPSHOT_BATCH_SIZE)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+DB reads and bytes per poll of GET /analyze/{id} over one analysis lifecycle.
+
+A fake Supabase row goes pending -> downloading -> analyzing -> completed (with a dashboard-sized
+analysis_results), written the way a worker process does, while a client polls every tick:
+  before:  what the endpoint used to cost, select("*") and the full body on every poll
+  cached:  full projection with If-None-Match
+  status:  projection=status with If-None-Match (status fields only until completed)
+
+Run from backend/ (needs fastapi):
+    python benchmarks/bench_status_polling.py
+"""
+import os
+import sys
+import json
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp())
+
+from benchmarks.fakes import FakeSupabase
+from routers import analysis
+from services.progress import get_progress_store
+from services.status_cache import get_status_cache
+
+# Polls spent in each status, e.g. a client polling every 2s through a ~90s analysis
+LIFECYCLE = [("pending", 3), ("downloading", 10), ("analyzing", 30), ("completed", 5)]
+
+
+def _dashboard() -> dict:
+    return {
+        "overall_performance": {"score": 82, "summary": "Clear and structured. " * 10},
+        "timeline_analysis": [{"timestamp": f"{m:02d}:00", "insight": "Strong framing " * 12} for m in range(40)],
+        "detailed_analysis": {"summary": "Long-form feedback. " * 200},
+    }
+
+
+async def run(label: str, projection: str, conditional: bool):
+    supabase = FakeSupabase(latency=0)
+    analysis_id = f"bench-{label}"
+    supabase.tables["video_analyses"] = {analysis_id: {"id": analysis_id, "status": "pending", "youtube_url": "bench"}}
+    get_status_cache().counters.update(polls=0, hits=0, db_reads=0, not_modified=0, bytes_sent=0)
+
+    polls, sent, etag = 0, 0, None
+    for status, count in LIFECYCLE:
+        if status != "pending":
+            fields = {"status": status}
+            if status == "completed":
+                fields["analysis_results"] = _dashboard()
+            # As a worker process would: the row and the progress log change, this process' cache doesn't
+            supabase.table("video_analyses").update(fields).eq("id", analysis_id).execute()
+            get_progress_store().publish(analysis_id, "status", status)
+        for _ in range(count):
+            if label == "before":
+                response = supabase.table("video_analyses").select("*").eq("id", analysis_id).execute()
+                sent += len(json.dumps(response.data[0]))
+            else:
+                response = await analysis.get_analysis(analysis_id, projection, etag if conditional else None, supabase)
+                etag = response.headers.get("etag")
+                sent += len(response.body or b"")
+            polls += 1
+
+    stats = get_status_cache().stats()
+    db_reads = polls if label == "before" else stats["db_reads"]
+    print(f"{label:8} polls={polls:3} db_reads={db_reads:3} ({db_reads / polls:.2f}/poll) "
+          f"supabase_bytes={supabase.bytes_read / polls:8.0f}/poll  response_bytes={sent / polls:8.0f}/poll")
+
+
+def main():
+    asyncio.run(run("before", "full", False))
+    asyncio.run(run("cached", "full", True))
+    asyncio.run(run("status", "status", True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Tracing check: the cost of a span on the hot path, and that spans recorded by several processes
+(like the WorkerPool's) all show up, consistently, in one /metrics exposition.
+
+Each of --processes spawned processes records --spans spans into a shared metrics store in a temporary
+DATA_DIR; the parent then renders the Prometheus text and checks every histogram is cumulative and that
+the counts add up. Exits non-zero if the check fails. Run from backend/ (no extra dependencies):
+    python benchmarks/bench_tracing.py --processes 4 --spans 20000
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp())
+
+SAMPLE = re.compile(r'^([a-z_]+)\{([^}]*)\} (\S+)$')
+
+
+def _record(worker: int, spans: int):
+    from services.tracing import span, get_span_recorder
+
+    for i in range(spans):
+        with span("bench.work", lane=("full", "live")[i % 2]) as s:
+            s.add(bytes=100, prompt_tokens=10, output_tokens=2)
+    # Spawned processes skip atexit hooks
+    get_span_recorder().flush()
+
+
+def overhead(iterations: int) -> dict:
+    from services.tracing import span
+
+    def bare():
+        return None
+
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        bare()
+    baseline = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        with span("bench.overhead", lane="full") as s:
+            s.add(bytes=1)
+    traced = time.perf_counter() - t0
+    return {"ns_per_span": round((traced - baseline) / iterations * 1e9)}
+
+
+def check_exposition(text: str, expected: dict) -> list:
+    """Problems found in the exposition; `expected` is {lane: span count}."""
+    problems = []
+    buckets, counts, totals = {}, {}, {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        match = SAMPLE.match(line)
+        if not match:
+            problems.append(f"unparseable line: {line}")
+            continue
+        metric, labels, value = match.groups()
+        if 'span="bench.work"' not in labels:
+            continue
+        lane = re.search(r'lane="([^"]+)"', labels).group(1)
+        if metric == "pipeline_span_duration_seconds_bucket":
+            buckets.setdefault(lane, []).append(int(value))
+        elif metric == "pipeline_span_duration_seconds_count":
+            counts[lane] = int(value)
+        elif metric.endswith("_total"):
+            totals[(metric, lane)] = int(value)
+    for lane, count in expected.items():
+        series = buckets.get(lane, [])
+        if series != sorted(series):
+            problems.append(f"{lane}: buckets not cumulative {series}")
+        if not series or series[-1] != count or counts.get(lane) != count:
+            problems.append(f"{lane}: expected {count} spans, got +Inf={series[-1:]} count={counts.get(lane)}")
+        for metric, per_span in (("pipeline_span_bytes_total", 100), ("pipeline_span_prompt_tokens_total", 10),
+                                 ("pipeline_span_output_tokens_total", 2)):
+            if totals.get((metric, lane)) != count * per_span:
+                problems.append(f"{lane}: {metric} = {totals.get((metric, lane))}, expected {count * per_span}")
+    return problems
+
+
+def main(args) -> int:
+    from services.tracing import get_span_recorder
+
+    cost = overhead(args.iterations)
+    print(f"span overhead: {cost['ns_per_span']}ns per span ({args.iterations} spans)")
+
+    ctx = multiprocessing.get_context("spawn")
+    t0 = time.perf_counter()
+    procs = [ctx.Process(target=_record, args=(i, args.spans)) for i in range(args.processes)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+    wall = time.perf_counter() - t0
+
+    text = get_span_recorder().prometheus()
+    total = args.processes * args.spans
+    expected = {"full": args.processes * ((args.spans + 1) // 2), "live": args.processes * (args.spans // 2)}
+    problems = check_exposition(text, expected)
+    print(f"processes={args.processes} spans={total} in {wall:.2f}s, /metrics {len(text)} bytes, "
+          f"{sum(1 for line in text.splitlines() if line and not line.startswith('#'))} samples")
+    for problem in problems:
+        print(f"  {problem}")
+    print("PASS" if not problems else "FAIL")
+    return 0 if not problems else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--spans", type=int, default=20000, help="spans recorded per process")
+    parser.add_argument("--iterations", type=int, default=200000, help="spans timed for the overhead figure")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,337 @@
+"""
+Local stand-ins for Supabase, YouTube and Gemini used by the benchmarks.
+They block (time.sleep) like the real SDKs do, so event-loop stalls show up in the numbers.
+"""
+import os
+import copy
+import json
+import time
+import uuid
+import zlib
+import random
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Query:
+    def __init__(self, db, table):
+        self._db = db
+        self._table = table
+        self._op = "select"
+        self._columns = "*"
+        self._fields = None
+        self._filters = []
+        self._limit = None
+
+    def select(self, columns="*"):
+        self._op = "select"
+        self._columns = columns
+        return self
+
+    def insert(self, row):
+        self._op = "insert"
+        self._fields = row
+        return self
+
+    def update(self, fields):
+        self._op = "update"
+        self._fields = fields
+        return self
+
+    def eq(self, column, value):
+        self._filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self._filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, column, desc=False):
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def execute(self):
+        return self._db._execute(self)
+
+
+class FakeSupabase:
+    """Thread-safe in-memory table store mimicking the supabase-py query builder."""
+
+    def __init__(self, latency: float = 0.02):
+        self.latency = latency
+        self.tables = {}
+        self.calls = 0
+        self.bytes_read = 0
+        self._lock = threading.Lock()
+
+    def table(self, name):
+        return _Query(self, name)
+
+    def _execute(self, q: _Query):
+        time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+            rows = self.tables.setdefault(q._table, {})
+            if q._op == "insert":
+                row = dict(q._fields)
+                row.setdefault("id", str(uuid.uuid4()))
+                rows[row["id"]] = row
+                return _Response([copy.deepcopy(row)])
+            matched = [r for r in rows.values() if all(f(r) for f in q._filters)]
+            if q._op == "update":
+                for r in matched:
+                    r.update(q._fields)
+            if q._limit is not None:
+                matched = matched[:q._limit]
+            if q._op == "select" and q._columns != "*":
+                columns = [c.strip() for c in q._columns.split(",")]
+                matched = [{c: r.get(c) for c in columns} for r in matched]
+            data = [copy.deepcopy(r) for r in matched]
+            if q._op == "select":
+                self.bytes_read += len(json.dumps(data, default=str))
+            return _Response(data)
+
+
+class FakeYouTubeService:
+    """
+    Metadata and transcripts without YouTube. With `fixtures` (recorded .vtt / .srt caption files,
+    e.g. temp_sub.en.vtt) each video id is served one of them, parsed like real captions.
+    """
+
+    media_store = None
+
+    def __init__(self, transcript: str = "Let's start off with those comments.", latency: float = 0.2, fixtures: list = None):
+        from services.captions import parse_caption_file
+        self.transcript = transcript
+        self.latency = latency
+        # (lang, segments) per fixture; "temp_sub.en.vtt" -> "en"
+        self.fixtures = [(os.path.basename(path).split(".")[-2], parse_caption_file(path)) for path in fixtures or []]
+
+    def _extract_video_id(self, url: str) -> str:
+        return url.rsplit("=", 1)[-1][:11]
+
+    def get_metadata(self, youtube_url: str) -> dict:
+        time.sleep(self.latency)
+        return {"title": "Fake", "author": "Fake Channel", "publish_date": "20240101", "length": 60, "description": ""}
+
+    def get_transcript(self, youtube_url: str) -> str:
+        time.sleep(self.latency)
+        return self.transcript
+
+    def get_transcript_entry(self, youtube_url: str) -> dict:
+        if not self.fixtures:
+            return {"lang": "en", "text": self.get_transcript(youtube_url), "segments": [], "source": "fake"}
+        from services.captions import segments_to_text
+        time.sleep(self.latency)
+        lang, segments = self.fixtures[zlib.crc32(self._extract_video_id(youtube_url).encode()) % len(self.fixtures)]
+        return {"lang": lang, "text": segments_to_text(segments), "segments": segments, "source": "fixture"}
+
+    def close(self):
+        pass
+
+
+class FakeGeminiService:
+    """Blocking fake of the GeminiService surface used by the routers."""
+
+    model_name = "fake-model"
+
+    def __init__(self, latency: float = 2.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _call(self, result):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        return result
+
+    def analyze_full_transcript(self, transcript_text: str, metadata: dict, *args, **kwargs) -> dict:
+        return self._call({"overall_performance": {"score": 80}, "timeline_analysis": [], "video_metadata": {}})
+
+    def analyze_snapshot(self, image_data: bytes, mime_type: str = "image/jpeg") -> dict:
+        return self._call({"score": 80, "feedback": "fake", "emotion": "Confident"})
+
+    async def analyze_snapshot_async(self, image_data: bytes, mime_type: str = "image/jpeg") -> dict:
+        import asyncio
+        with self._lock:
+            self.calls += 1
+        await asyncio.sleep(self.latency)
+        return {"score": 80, "feedback": "fake", "emotion": "Confident"}
+
+    async def analyze_snapshot_batch_async(self, frames) -> list:
+        import asyncio
+        with self._lock:
+            self.calls += 1
+        # One request round trip plus a small per-image cost
+        await asyncio.sleep(self.latency + 0.05 * self.latency * len(frames))
+        return [{"timestamp": ts, "score": 80, "feedback": "fake", "emotion": "Confident"} for _, _, ts in frames]
+
+
+class FakeModelServer:
+    """
+    Local HTTP model endpoint that injects errors: requests over its quota (a token bucket) get 429,
+    error_rate of the rest get 503, and everything gets 503 during the outage window (seconds after start()).
+    """
+
+    def __init__(self, rpm: float = 120, burst: float = 4, error_rate: float = 0.0, outage: tuple = None,
+                 latency: float = 0.15, seed: int = 0):
+        self.rate = rpm / 60
+        self.burst = burst
+        self.error_rate = error_rate
+        self.outage = outage
+        self.latency = latency
+        self.counts = {"requests": 0, "ok": 0, "429": 0, "503": 0}
+        self._random = random.Random(seed)
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._started = None
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _status(self) -> int:
+        with self._lock:
+            now = time.monotonic()
+            self.counts["requests"] += 1
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            elapsed = now - self._started
+            if self.outage and self.outage[0] <= elapsed < self.outage[1]:
+                status = 503
+            elif self._tokens < 1:
+                status = 429
+            else:
+                self._tokens -= 1
+                status = 503 if self._random.random() < self.error_rate else 200
+            self.counts["ok" if status == 200 else str(status)] += 1
+            return status
+
+    def start(self) -> str:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                status = server._status()
+                if status == 200:
+                    time.sleep(server.latency)
+                body = json.dumps({"text": json.dumps({"score": 80, "feedback": "fake"})} if status == 200 else {"error": status}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._started = time.monotonic()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}/generate"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+class FakeModelError(Exception):
+    """Carries the HTTP status in .code, like the google.api_core exceptions the real SDKs raise."""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class FakeModelClient:
+    """generate_content() against a FakeModelServer, shaped like the genai / Vertex model objects."""
+
+    class _Response:
+        def __init__(self, text):
+            self.text = text
+
+    def __init__(self, url: str, timeout: float = 10):
+        self.url = url
+        self.timeout = timeout
+
+    def generate_content(self, contents, generation_config=None, stream=False):
+        request = urllib.request.Request(
+            self.url, data=json.dumps({"contents": str(contents)[:200]}).encode(),
+            headers={"Content-Type": "application/json"}, method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return self._Response(json.loads(response.read())["text"])
+        except urllib.error.HTTPError as e:
+            raise FakeModelError(e.code, e.reason) from None
+
+
+class FakeYoutubeDL:
+    """
+    Stand-in for yt_dlp.YoutubeDL (patch it over youtube_service.yt_dlp.YoutubeDL): extract_info() takes
+    `latency` seconds like an extractor round-trip and returns a raw extraction with two formats and caption
+    tracks; process_ie_result() picks the first format and, when downloading, writes a small file to outtmpl.
+    Counters are class-level because the service builds a new YoutubeDL for each call.
+    """
+
+    latency = 0.5
+    extractions = 0
+    processed = 0
+    _lock = threading.Lock()
+
+    def __init__(self, params=None):
+        self.params = params or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls.extractions = cls.processed = 0
+
+    def extract_info(self, url, download=True, process=True):
+        with self._lock:
+            FakeYoutubeDL.extractions += 1
+        time.sleep(self.latency)
+        vid = url.rsplit("=", 1)[-1][:11]
+        info = {
+            "id": vid, "title": f"Fake {vid}", "uploader": "Fake Channel", "upload_date": "20240101", "duration": 60,
+            "channel_url": "", "description": "",
+            "formats": [
+                {"format_id": "140", "ext": "m4a", "vcodec": "none", "url": f"https://media.invalid/{vid}/140"},
+                {"format_id": "22", "ext": "mp4", "vcodec": "avc1", "url": f"https://media.invalid/{vid}/22"},
+            ],
+            "subtitles": {},
+            "automatic_captions": {
+                "en": [{"ext": "json3", "url": f"https://captions.invalid/{vid}.en.json3"},
+                       {"ext": "vtt", "url": f"https://captions.invalid/{vid}.en.vtt"}],
+            },
+        }
+        return self.process_ie_result(info, download) if process else info
+
+    def process_ie_result(self, info, download=True):
+        with self._lock:
+            FakeYoutubeDL.processed += 1
+        result = {**info, **info["formats"][0]}
+        if download:
+            path = self.params["outtmpl"] % {"ext": "mp3" if self.params.get("postprocessors") else result["ext"]}
+            with open(path, "wb") as f:
+                f.write(b"\0" * 4096)
+        return result
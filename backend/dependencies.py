@@ -1,48 +1,139 @@
-
 import os
+import json
+import threading
 from fastapi import HTTPException
 from services.youtube_service import YouTubeService
 from services.gemini_service import GeminiService
+from services.model_backends import MODEL_BACKEND
 from supabase import create_client, Client
 
-def get_services():
-    bucket_name = os.getenv("GCP_BUCKET_NAME")
-    project_id = os.getenv("GCP_PROJECT_ID") 
-    
-    # Fallback/Debug logic (simplified from analysis.py)
+
+def _resolve_project_id():
+    project_id = os.getenv("GCP_PROJECT_ID")
+
+    # Fallback to extracting project_id from service account if not in env
     if not project_id:
         try:
             sa_path = "service_account.json"
             if os.path.exists(sa_path):
-                import json
                 with open(sa_path, "r") as f:
                     sa = json.load(f)
                     project_id = sa.get("project_id")
         except Exception as e:
             print(f"Could not load project_id from service_account.json: {e}")
 
-    if not project_id and not os.getenv("GEMINI_API_KEY") and not os.getenv("gemini_api_key"):
-        # If we are strictly in cloud run without env vars, this might be an issue. 
-        # But let's assume if API KEY is present, we don't strictly need project_id for Gemini (though we might for other things)
-        pass
+    return project_id
+
+
+class ServiceRegistry:
+    """
+    Process-wide holder for the long-lived service clients.
+    Everything is built once (at startup via the app lifespan, or lazily on first use)
+    and then shared by every request, so HTTP connection pools are reused too.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._project_id = None
+        self._project_id_resolved = False
+        self._youtube = None
+        self._gemini = None
+        self._supabase = None
+        self._supabase_built = False
+
+    @property
+    def project_id(self):
+        if not self._project_id_resolved:
+            with self._lock:
+                if not self._project_id_resolved:
+                    self._project_id = _resolve_project_id()
+                    self._project_id_resolved = True
+        return self._project_id
+
+    @property
+    def gemini_configured(self) -> bool:
+        if MODEL_BACKEND == "fake":
+            return True
+        return bool(self.project_id or os.getenv("GEMINI_API_KEY") or os.getenv("gemini_api_key"))
+
+    @property
+    def youtube(self) -> YouTubeService:
+        if self._youtube is None:
+            with self._lock:
+                if self._youtube is None:
+                    self._youtube = YouTubeService(os.getenv("GCP_BUCKET_NAME"))
+        return self._youtube
+
+    @property
+    def gemini(self) -> GeminiService:
+        if self._gemini is None:
+            with self._lock:
+                if self._gemini is None:
+                    self._gemini = GeminiService(self.project_id)
+        return self._gemini
+
+    @property
+    def supabase(self):
+        if not self._supabase_built:
+            with self._lock:
+                if not self._supabase_built:
+                    supabase_url = os.getenv("SUPABASE_URL")
+                    supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+                    if not supabase_url or not supabase_key:
+                        # Just a warning for now, specialized endpoints might not need supabase
+                        print("Warning: Supabase credentials missing.")
+                        self._supabase = None
+                    else:
+                        self._supabase = create_client(supabase_url, supabase_key)
+                    self._supabase_built = True
+        return self._supabase
+
+    def startup(self):
+        """Eagerly build every service so the first request doesn't pay for it."""
+        for name in ("youtube", "gemini", "supabase"):
+            try:
+                getattr(self, name)
+            except Exception as e:
+                import traceback
+                traceback.print_exc()
+                print(f"Error initializing {name} service: {e}")
 
+    def shutdown(self):
+        with self._lock:
+            if self._youtube is not None:
+                self._youtube.close()
+            self._youtube = None
+            self._gemini = None
+            self._supabase = None
+            self._supabase_built = False
+
+
+registry = ServiceRegistry()
+
+
+# --- FastAPI dependencies ---
+
+def get_gemini_service() -> GeminiService:
     try:
-        # YouTubeService might need bucket_name for GCS, but if local mode, it might not use it immediately.
-        youtube_service = YouTubeService(bucket_name)
-        gemini_service = GeminiService(project_id)
-        
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-        
-        if not supabase_url or not supabase_key:
-             # Just a warning for now, specialized endpoints might not need supabase
-             print("Warning: Supabase credentials missing.")
-             supabase = None
-        else:
-             supabase = create_client(supabase_url, supabase_key)
-        
-        return youtube_service, gemini_service, supabase
+        return registry.gemini
     except Exception as e:
-        import traceback
-        traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Service Initialization Error: {e}")
+
+def require_gemini_service() -> GeminiService:
+    if not registry.gemini_configured:
+        print("ERROR: Project ID or API Key is missing.")
+        raise HTTPException(status_code=500, detail="Configuration Error: Project ID or API Key missing")
+    return get_gemini_service()
+
+def get_supabase():
+    try:
+        return registry.supabase
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Service Initialization Error: {e}")
+
+def require_supabase() -> Client:
+    supabase = get_supabase()
+    if supabase is None:
+        print("ERROR: Supabase credentials missing from environment.")
+        raise HTTPException(status_code=500, detail="Service Initialization Error: Supabase credentials missing")
+    return supabase
@@ -1,11 +1,47 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
+from contextlib import asynccontextmanager
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = FastAPI(title="Executive Comms Ninja API")
+from dependencies import registry
+from services.job_queue import get_job_queue
+from services.worker_pool import WorkerPool, NUM_WORKERS
+from services.storage import data_path
+from services.executor import shutdown_pools
+from services.workspace import get_workspace_manager
+from services.tracing import get_span_recorder, PROMETHEUS_CONTENT_TYPE
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the shared service clients once per process instead of per request
+    registry.startup()
+
+    # Remove download dirs left behind by crashed jobs or earlier versions
+    try:
+        get_workspace_manager().sweep()
+    except Exception as e:
+        print(f"Workspace sweep failed: {e}")
+
+    # Analysis workers run in separate processes; set JOB_WORKERS=0 to run them via worker.py instead.
+    # Every API process starts a pool, but only the one holding the lock runs workers and re-queues rows.
+    pool = None
+    if get_job_queue() is not None and NUM_WORKERS > 0:
+        from routers.analysis import requeue_pending_analyses
+        pool = WorkerPool(NUM_WORKERS, lock_path=data_path("worker_pool.lock"), on_elected=requeue_pending_analyses)
+        pool.start()
+
+    yield
+
+    if pool is not None:
+        pool.stop()
+    shutdown_pools()
+    registry.shutdown()
+
+app = FastAPI(title="Executive Comms Ninja API", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -16,10 +52,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-from routers import analysis, snapshot, stripe_router
+from routers import analysis, snapshot, live, stripe_router
 
 app.include_router(analysis.router, prefix="/api", tags=["analysis"])
 app.include_router(snapshot.router, prefix="/api", tags=["snapshot"])
+app.include_router(live.router, prefix="/api", tags=["live"])
 app.include_router(stripe_router.router, prefix="/api/stripe", tags=["stripe"])
 
 @app.get("/")
@@ -30,6 +67,11 @@ def read_root():
 def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+def metrics():
+    # Prometheus scrape target: pipeline spans from this process and every worker process on the host
+    return Response(get_span_recorder().prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
@@ -1,62 +1,38 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Header, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from services.youtube_service import YouTubeService
-from services.gemini_service import GeminiService
-from supabase import create_client, Client
+from typing import Literal, Optional
+from services.gemini_service import GeminiService, PROMPT_VERSION
+from supabase import Client
+from dependencies import registry, require_gemini_service, require_supabase
+from services.job_queue import get_job_queue, QueueFull
+from services.executor import run_blocking
+from services.result_cache import get_result_cache, MODES
+from services.file_waiter import get_file_wait_stats
+from services.gemini_uploads import get_gemini_uploads
+from services.media_store import LocalMediaStore, MEDIA_STORE_BACKEND
+from services.workspace import get_workspace_manager
+from services.frame_sampler import sample_frames, extract_audio_track, VIDEO_ANALYSIS_STRATEGY
+from services.progress import get_progress_store, TERMINAL_STATUSES
+from services.status_cache import get_status_cache, project, STATUS_FIELDS
+from services.job_state import get_job_state_writer
+from services.single_flight import get_single_flight
+from services.model_gateway import get_model_gateway
+from services.tracing import span
+from services.youtube_service import transcript_strategy_stats
+import asyncio
+import json
 import os
+import time
 import uuid
+import threading
 
 router = APIRouter()
 
-# Initialize services
-# Note: In production, use dependency injection
-def get_services():
-    bucket_name = os.getenv("GCP_BUCKET_NAME")
-    project_id = os.getenv("GCP_PROJECT_ID") # We need to add this to .env
-    
-    # Debugging: Print CWD and env vars
-    print(f"Current Working Directory: {os.getcwd()}")
-    
-    # Fallback to extracting project_id from service account if not in env
-    if not project_id:
-        try:
-            # Try absolute path first if relative fails, or check common locations
-            sa_path = "service_account.json"
-            if not os.path.exists(sa_path):
-                 print(f"File not found: {sa_path}")
-            
-            with open(sa_path, "r") as f:
-                import json
-                sa = json.load(f)
-                project_id = sa.get("project_id")
-        except Exception as e:
-            import traceback
-            traceback.print_exc()
-            print(f"Could not load project_id from service_account.json: {e}")
-
-    if not project_id and not os.getenv("GEMINI_API_KEY") and not os.getenv("gemini_api_key"):
-        print("ERROR: Project ID or API Key is missing.")
-        raise HTTPException(status_code=500, detail="Configuration Error: Project ID or API Key missing")
-
-    try:
-        youtube_service = YouTubeService(bucket_name)
-        gemini_service = GeminiService(project_id)
-        
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-        
-        if not supabase_url or not supabase_key:
-             print("ERROR: Supabase credentials missing from environment.")
-             raise ValueError("Supabase credentials missing")
-
-        supabase: Client = create_client(supabase_url, supabase_key)
-        
-        return youtube_service, gemini_service, supabase
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        print(f"Error initializing services: {e}")
-        raise HTTPException(status_code=500, detail=f"Service Initialization Error: {e}")
+# How often an event stream checks the progress log, and how long it stays open at most
+PROGRESS_POLL_SECONDS = float(os.getenv("PROGRESS_POLL_SECONDS", "0.5"))
+PROGRESS_STREAM_TIMEOUT_SECONDS = float(os.getenv("PROGRESS_STREAM_TIMEOUT_SECONDS", "1800"))
+PROGRESS_HEARTBEAT_SECONDS = 15.0
 
 class AnalysisRequest(BaseModel):
     youtube_url: str
@@ -66,65 +42,340 @@ class AnalysisRequest(BaseModel):
     role: str
     target_person: str
     transcript_text: str = ""
+    reuse_cached: bool = True
+    # auto: transcript, then audio if captions are unavailable; audio/video: skip straight to that tier
+    analysis_mode: Literal["auto", "audio", "video"] = "auto"
+    # Adds low-rate stills to the audio tier for visual cues (no full video download)
+    include_keyframes: bool = False
+
+def _cache_identity(youtube_url: str):
+    """(video_id, prompt_version, model_name) for result cache lookups, or None if the URL isn't cacheable."""
+    try:
+        video_id = registry.youtube._extract_video_id(youtube_url)
+    except ValueError:
+        return None
+    return video_id, PROMPT_VERSION, registry.gemini.model_name
+
+def _flight_key(request: AnalysisRequest):
+    """Single-flight key: submissions with the same key produce the same dashboard, so they share one run."""
+    if request.transcript_text or not request.reuse_cached:
+        return None
+    identity = _cache_identity(request.youtube_url)
+    if identity is None:
+        return None
+    video_id, prompt_version, model_name = identity
+    return get_single_flight().make_key(video_id, request.analysis_mode, request.include_keyframes, prompt_version, model_name)
+
+def _cache_modes(request: AnalysisRequest):
+    """Cached result modes that satisfy the request (never a cheaper tier than the one asked for)."""
+    if request.analysis_mode == "video":
+        return ("video",)
+    # Asking for keyframes rules out audio results analysed without them
+    skip = ("audio",) if request.include_keyframes else ()
+    if request.analysis_mode == "audio":
+        return tuple(mode for mode in ("video", "audio_keyframes", "audio") if mode not in skip)
+    return tuple(mode for mode in MODES if mode not in skip)
+
+def _result_mode(request: AnalysisRequest, tier: str) -> str:
+    """Result cache mode for a result produced by `tier`."""
+    return "audio_keyframes" if tier == "audio" and request.include_keyframes else tier
+
+def _job_state(supabase):
+    return get_job_state_writer(supabase, on_written=_on_state_written)
+
+async def _update_analysis(supabase, analysis_id: str, fields: dict):
+    """
+    Intermediate status transitions go to the job state writer (coalesced, batched across jobs, written
+    off the critical path); terminal updates, results and errors are written before this returns.
+    """
+    writer = _job_state(supabase)
+    if set(fields) == {"status"} and fields["status"] not in TERMINAL_STATUSES:
+        # Followers of this analysis' flight see the same progress
+        followers = await run_blocking("cache", get_single_flight().followers, analysis_id)
+        for row_id in [analysis_id, *followers]:
+            writer.set_status(row_id, fields["status"])
+    else:
+        await run_blocking("supabase", writer.finish, analysis_id, fields)
+        if fields.get("status") in TERMINAL_STATUSES:
+            await _settle_flight(supabase, analysis_id, fields)
+
+async def _settle_flight(supabase, analysis_id: str, fields: dict):
+    """
+    Fans a finished leader's result out to the rows that joined its flight. A failed leader hands
+    the flight to its oldest follower instead, until the flight runs out of attempts.
+    """
+    flights = get_single_flight()
+    try:
+        if fields["status"] == "completed":
+            followers = await run_blocking("cache", flights.land, analysis_id)
+            if followers:
+                print(f"Fanning analysis {analysis_id} out to {len(followers)} de-duplicated requests")
+                await run_blocking("supabase", _job_state(supabase).fan_out, followers, fields)
+            return
+        outcome, target, payload = await run_blocking("cache", flights.abort, analysis_id)
+        if outcome == "fail":
+            await run_blocking("supabase", _job_state(supabase).fan_out, target, fields)
+        elif outcome == "retry":
+            print(f"Analysis {analysis_id} failed; retrying its flight as {target}")
+            queue = get_job_queue()
+            if queue is not None:
+                await run_blocking("queue", queue.enqueue, target, payload)
+            else:
+                asyncio.get_running_loop().create_task(process_analysis(AnalysisRequest(**payload["request"]), target))
+    except Exception as e:
+        print(f"Settling the flight of {analysis_id} failed: {e}")
+
+def _on_state_written(analysis_id: str, fields: dict):
+    """Runs once a row update is stored, so progress subscribers and the status cache never run ahead of the DB."""
+    if "status" in fields:
+        data = {"error_message": fields["error_message"]} if fields.get("error_message") else None
+        version = _publish_progress(analysis_id, "status", fields["status"], data)
+        if version:
+            get_status_cache().update(analysis_id, fields, version)
+
+def _publish_progress(analysis_id: str, kind: str, name: str, data=None):
+    """Progress events are best effort: a failed write never fails the analysis. Returns the event id or None."""
+    try:
+        return get_progress_store().publish(analysis_id, kind, name, data)
+    except Exception as e:
+        print(f"Progress event {kind}/{name} for {analysis_id} not recorded: {e}")
+        return None
 
-async def process_analysis(request: AnalysisRequest, analysis_id: str):
-    youtube_service, gemini_service, supabase = get_services()
+def _section_publisher(analysis_id: str):
+    """on_section callback for GeminiService: publishes each dashboard section as the model streams it."""
+    return lambda key, value: _publish_progress(analysis_id, "section", key, value)
+
+def _streaming_store(youtube_service, gemini_service):
+    """
+    MediaStore to stream downloads into, or None to stage them under temp/.
+    Vertex reads gs:// URIs; the Gemini API (API-key mode) can only upload local files.
+    """
+    backend = gemini_service.backend
+    if backend is None or (backend.local_files_only and MEDIA_STORE_BACKEND != "local"):
+        return None
+    try:
+        store = youtube_service.media_store
+    except Exception as e:
+        print(f"Media store unavailable, staging downloads under temp/: {e}")
+        return None
+    if store is None or (backend.local_files_only and not isinstance(store, LocalMediaStore)):
+        return None
+    return store
+
+async def _analyze_sampled_video(video_path: str, gemini_service, on_section=None, cancel=None) -> dict:
+    """
+    Video tier without uploading the video: the audio track drives the dashboard and a de-duplicated
+    frame sample, analysed in one batched request, is mapped onto its timeline.
+    """
+    workspace = get_workspace_manager().open("frames")
+    try:
+        audio_path = workspace.file("audio.mp3")
+        _, (frames, sampling) = await asyncio.gather(
+            run_blocking("youtube", extract_audio_track, video_path, audio_path),
+            run_blocking("youtube", sample_frames, video_path, workspace.path),
+        )
+
+        print(f"Starting Gemini AUDIO + {len(frames)} FRAMES analysis")
+        if frames:
+            dashboard, visual = await asyncio.gather(
+                run_blocking("gemini", gemini_service.analyze_audio_multimodal, audio_path, cancel=cancel, on_section=on_section),
+                run_blocking("gemini", gemini_service.analyze_frames, frames),
+                return_exceptions=True,
+            )
+            for outcome in (dashboard, visual):
+                if isinstance(outcome, BaseException) and not (outcome is visual and isinstance(outcome, Exception)):
+                    raise outcome
+            if isinstance(visual, Exception):
+                # The visual pass is optional; keep the audio-only dashboard
+                print(f"Frame analysis failed, continuing audio-only: {visual}")
+            elif "error" not in visual:
+                dashboard = gemini_service.merge_visual_analysis(dashboard, visual)
+        else:
+            dashboard = await run_blocking("gemini", gemini_service.analyze_audio_multimodal, audio_path, cancel=cancel,
+                                       on_section=on_section)
+        dashboard["visual_sampling"] = sampling
+        return dashboard
+    finally:
+        await run_blocking("youtube", workspace.release)
+
+async def _analyze_media(request: AnalysisRequest, analysis_id: str, mode: str, metadata: dict,
+                         youtube_service, gemini_service, supabase, cancel=None) -> dict:
+    """
+    Media tiers for when there is no transcript: audio-only download (plus optional keyframes) by default,
+    the full 720p video only when explicitly requested.
+    """
+    await _update_analysis(supabase, analysis_id, {"status": "downloading"})
+    store = _streaming_store(youtube_service, gemini_service)
+    stage = _job_state(supabase).stage
+    local_paths, stored_uris, workspaces = [], [], []
+    try:
+        if mode == "video":
+            with stage(analysis_id, "download"):
+                if store is not None:
+                    video_path = await run_blocking("youtube", youtube_service.stream_video, request.youtube_url, store)
+                    stored_uris.append(video_path)
+                else:
+                    video_path = await run_blocking("youtube", youtube_service.download_video, request.youtube_url)
+                    local_paths.append(video_path)
+            await _update_analysis(supabase, analysis_id, {"status": "analyzing"})
+
+            if store is None and VIDEO_ANALYSIS_STRATEGY == "frames":
+                # Frame sampling plus the model calls
+                with stage(analysis_id, "model"):
+                    return await _analyze_sampled_video(video_path, gemini_service, _section_publisher(analysis_id), cancel)
+
+            # Run Multimodal Analysis (Includes facial expressions, eye contact)
+            print(f"Starting Gemini VIDEO analysis")
+            with stage(analysis_id, "model"):
+                return await run_blocking("gemini", gemini_service.analyze_video, video_path, metadata, cancel=cancel)
+
+        if store is not None:
+            audio_download = run_blocking("youtube", youtube_service.stream_audio, request.youtube_url, store)
+        else:
+            audio_download = run_blocking("youtube", youtube_service.download_audio, request.youtube_url)
+        keyframes = []
+        with stage(analysis_id, "download"):
+            if request.include_keyframes:
+                audio_path, extracted = await asyncio.gather(
+                    audio_download,
+                    run_blocking("youtube", youtube_service.extract_keyframes, request.youtube_url,
+                                 duration=(metadata or {}).get("length") or None),
+                    return_exceptions=True,
+                )
+                if isinstance(extracted, Exception):
+                    print(f"Keyframe extraction failed, continuing audio-only: {extracted}")
+                else:
+                    keyframes, keyframe_workspace = extracted
+                    if keyframe_workspace is not None:
+                        workspaces.append(keyframe_workspace)
+                if isinstance(audio_path, Exception):
+                    raise audio_path
+            else:
+                audio_path = await audio_download
+        if store is not None:
+            stored_uris.append(audio_path)
+        else:
+            local_paths.append(audio_path)
+        await _update_analysis(supabase, analysis_id, {"status": "analyzing"})
+
+        print(f"Starting Gemini AUDIO analysis ({len(keyframes)} keyframes)")
+        with stage(analysis_id, "model"):
+            return await run_blocking("gemini", gemini_service.analyze_audio_multimodal, audio_path, cancel=cancel,
+                                      keyframes=keyframes, on_section=_section_publisher(analysis_id))
+    finally:
+        # Keyed downloads stay on disk as reusable artefacts until the workspace quota evicts them
+        for path in local_paths:
+            await run_blocking("youtube", get_workspace_manager().release_path, path)
+        for workspace in workspaces:
+            await run_blocking("youtube", workspace.release)
+        for uri in stored_uris:
+            try:
+                await run_blocking("youtube", store.delete, uri)
+            except Exception as e:
+                print(f"Media cleanup failed for {uri}: {e}")
+
+async def _fetch_metadata(youtube_service, youtube_url: str, stage, analysis_id: str) -> dict:
+    """Video metadata, or {} if it can't be fetched (the analysis goes ahead without it)."""
+    try:
+        with stage(analysis_id, "metadata"):
+            return await run_blocking("youtube", youtube_service.get_metadata, youtube_url)
+    except Exception as e:
+        print(f"Metadata extraction warning: {e}")
+        return {}
+
+async def _fetch_transcript(youtube_service, youtube_url: str, stage, analysis_id: str) -> dict:
+    with stage(analysis_id, "transcript"):
+        return await run_blocking("youtube", youtube_service.get_transcript_entry, youtube_url)
+
+async def process_analysis(request: AnalysisRequest, analysis_id: str, cancel: threading.Event = None):
+    """
+    Runs one analysis. `cancel` is set to stop the job's Gemini file waits early (the worker is shutting down);
+    it is also set once this returns or its task is cancelled, so no wait outlives the job on a pool thread.
+    """
+    cancel = cancel or threading.Event()
+    try:
+        # Root span of the job's trace; the stage and service spans nest under it
+        with span("analysis.job", mode=request.analysis_mode) as s:
+            s.set(analysis_id=analysis_id, youtube_url=request.youtube_url)
+            await _run_analysis(request, analysis_id, cancel)
+    finally:
+        cancel.set()
+
+async def _run_analysis(request: AnalysisRequest, analysis_id: str, cancel: threading.Event):
+    youtube_service, gemini_service, supabase = registry.youtube, registry.gemini, registry.supabase
+    cache = get_result_cache()
+    # Manually supplied transcripts are user content, so they are never cached
+    cache_identity = _cache_identity(request.youtube_url) if cache and not request.transcript_text else None
+    stage = _job_state(supabase).stage
     
     try:
+        # 0. Another job may have finished the same video since this one was queued
+        if cache_identity and request.reuse_cached:
+            hit = await run_blocking("cache", cache.get_any, *cache_identity, modes=_cache_modes(request), count_miss=False)
+            if hit:
+                print(f"Result cache hit ({hit[0]}) for {request.youtube_url}")
+                await _update_analysis(supabase, analysis_id, {"status": "completed", "analysis_results": hit[1]})
+                return
+
         # 1. Update status to 'processing_download'
-        supabase.table("video_analyses").update({"status": "downloading"}).eq("id", analysis_id).execute()
+        await _update_analysis(supabase, analysis_id, {"status": "downloading"})
         
         # 2. Extract Transcript and Metadata
         print(f"Extracting transcript & metadata for {request.youtube_url}")
         
-        try:
-            metadata = youtube_service.get_metadata(request.youtube_url)
-        except Exception as e:
-            print(f"Metadata extraction warning: {e}")
-            metadata = {}
-            
         transcript_text = request.transcript_text
         analysis_result = None
+        result_mode = "transcript"
+        started_at = time.time()
         
-        if not transcript_text:
-            # Fallback to backend extraction if not provided by frontend
+        fetch_transcript = not transcript_text and request.analysis_mode == "auto"
+        if fetch_transcript:
+            # Fallback to backend extraction if not provided by frontend.
+            # Fetched alongside the metadata; both read the same cached yt-dlp extraction.
+            print(f"Attempting transcript extraction for {request.youtube_url}")
+            metadata, transcript_entry = await asyncio.gather(
+                _fetch_metadata(youtube_service, request.youtube_url, stage, analysis_id),
+                _fetch_transcript(youtube_service, request.youtube_url, stage, analysis_id),
+                return_exceptions=True,
+            )
+        else:
+            metadata = await _fetch_metadata(youtube_service, request.youtube_url, stage, analysis_id)
+        
+        if fetch_transcript:
             try:
-                print(f"Attempting transcript extraction for {request.youtube_url}")
-                transcript_text = youtube_service.get_transcript(request.youtube_url)
+                if isinstance(transcript_entry, Exception):
+                    raise transcript_entry
+                transcript_text = transcript_entry["text"]
                 
                 # 3. Update status to 'analyzing'
-                supabase.table("video_analyses").update({"status": "analyzing"}).eq("id", analysis_id).execute()
+                await _update_analysis(supabase, analysis_id, {"status": "analyzing"})
                 
                 # 4. Analyze with Gemini (Transcript mode)
                 print(f"Starting Gemini transcript analysis")
-                analysis_result = gemini_service.analyze_full_transcript(transcript_text, metadata)
+                with stage(analysis_id, "model"):
+                    analysis_result = await run_blocking(
+                        "gemini", gemini_service.analyze_full_transcript, transcript_text, metadata, transcript_entry.get("segments"),
+                        on_section=_section_publisher(analysis_id),
+                    )
                 
             except Exception as e:
-                print(f"Transcript extraction failed, falling back to VIDEO analysis: {e}")
-                
-                # Update status to 'downloading'
-                supabase.table("video_analyses").update({"status": "downloading"}).eq("id", analysis_id).execute()
-                
-                # 1. Download Video (Audio + Vision)
-                video_path = youtube_service.download_video(request.youtube_url)
-                
-                # 2. Update status to 'analyzing'
-                supabase.table("video_analyses").update({"status": "analyzing"}).eq("id", analysis_id).execute()
-                
-                # 3. Run Multimodal Analysis (Includes facial expressions, eye contact)
-                print(f"Starting Gemini VIDEO analysis")
-                analysis_result = gemini_service.analyze_video(video_path, metadata)
-                
-                # 4. Cleanup temp file
-                try:
-                    import shutil
-                    shutil.rmtree(os.path.dirname(video_path))
-                except:
-                    pass
+                print(f"Transcript extraction failed, falling back to AUDIO analysis: {e}")
+                result_mode = _result_mode(request, "audio")
+                analysis_result = await _analyze_media(
+                    request, analysis_id, "audio", metadata, youtube_service, gemini_service, supabase, cancel
+                )
+        elif not transcript_text:
+            # Media tier requested explicitly
+            result_mode = _result_mode(request, request.analysis_mode)
+            analysis_result = await _analyze_media(
+                request, analysis_id, request.analysis_mode, metadata, youtube_service, gemini_service, supabase, cancel
+            )
         else:
              # Manual transcript provided
-             supabase.table("video_analyses").update({"status": "analyzing"}).eq("id", analysis_id).execute()
-             analysis_result = gemini_service.analyze_full_transcript(transcript_text, metadata)
+             await _update_analysis(supabase, analysis_id, {"status": "analyzing"})
+             with stage(analysis_id, "model"):
+                 analysis_result = await run_blocking("gemini", gemini_service.analyze_full_transcript, transcript_text, metadata,
+                                                      on_section=_section_publisher(analysis_id))
 
         # 5. Inject real metadata into results for frontend display
         if metadata and analysis_result:
@@ -140,24 +391,114 @@ async def process_analysis(request: AnalysisRequest, analysis_id: str):
                 analysis_result["video_metadata"]["extracted_interviewee_name"] = metadata.get("author")
 
         # 6. Save results
-        supabase.table("video_analyses").update({
+        await _update_analysis(supabase, analysis_id, {
             "status": "completed",
             "analysis_results": analysis_result,
-        }).eq("id", analysis_id).execute()
+        })
+
+        if cache_identity and analysis_result and "error" not in analysis_result:
+            try:
+                video_id, prompt_version, model_name = cache_identity
+                await run_blocking("cache", cache.put, video_id, result_mode, prompt_version, model_name,
+                                   analysis_result, compute_seconds=time.time() - started_at)
+            except Exception as e:
+                print(f"Result cache write failed: {e}")
         
         print(f"Analysis {analysis_id} completed successfully.")
         
     except Exception as e:
+        if cancel.is_set():
+            # Interrupted rather than failed: the row stays in progress and the queue re-runs the job
+            print(f"Analysis {analysis_id} interrupted: {e}")
+            raise
         print(f"Analysis {analysis_id} failed: {e}")
-        supabase.table("video_analyses").update({
+        await _update_analysis(supabase, analysis_id, {
             "status": "failed",
             "error_message": str(e)
-        }).eq("id", analysis_id).execute()
+        })
+
+def _propagate_stop(stop, cancel: threading.Event):
+    while not cancel.is_set():
+        if stop.wait(1.0):
+            cancel.set()
+
+def run_analysis_job(payload: dict, stop=None):
+    """Job queue entry point: runs one queued analysis inside a worker process, cancelled when `stop` is set."""
+    request = AnalysisRequest(**payload["request"])
+    cancel = threading.Event()
+    if stop is not None:
+        threading.Thread(target=_propagate_stop, args=(stop, cancel), daemon=True).start()
+    asyncio.run(process_analysis(request, payload["analysis_id"], cancel))
+
+def fail_analysis_job(payload: dict, error: str):
+    """Job queue entry point for a job given up on: fails its row and settles its flight like any failed run."""
+    asyncio.run(_update_analysis(registry.supabase, payload["analysis_id"], {"status": "failed", "error_message": error}))
+
+def _insert_pending_row(supabase, data: dict):
+    """Creates the video_analyses row for a new submission; returns its id."""
+    try:
+        response = supabase.table("video_analyses").insert(data).execute()
+    except Exception as e:
+        if "analysis_request" not in str(e):
+            raise
+        # Column not migrated yet (see schema_analysis_request.sql): requeues fall back to the row's own fields
+        print(f"analysis_request column unavailable, storing the row without it: {e}")
+        response = supabase.table("video_analyses").insert({k: v for k, v in data.items() if k != "analysis_request"}).execute()
+    return response.data[0]['id']
+
+def _stored_request(row: dict) -> AnalysisRequest:
+    """The request a pending row was submitted with, rebuilt from its columns for rows that predate analysis_request."""
+    if row.get("analysis_request"):
+        return AnalysisRequest(**row["analysis_request"])
+    return AnalysisRequest(
+        youtube_url=row["youtube_url"],
+        user_id=row["user_id"],
+        video_title=row.get("video_title") or "",
+        company=row.get("company") or "",
+        role=row.get("role") or "",
+        target_person=row.get("target_person") or "",
+    )
+
+def requeue_pending_analyses():
+    """
+    Puts 'pending' video_analyses rows that have no queue entry back on the queue,
+    e.g. rows created before a restart while the queue lived somewhere else.
+    """
+    queue = get_job_queue()
+    supabase = registry.supabase
+    if queue is None or supabase is None:
+        return 0
+
+    # "*" rather than a column list, so this works whether or not analysis_request is migrated yet
+    response = supabase.table("video_analyses") \
+        .select("*") \
+        .eq("status", "pending") \
+        .execute()
+
+    requeued = 0
+    flights = get_single_flight()
+    for row in response.data or []:
+        # Followers of an in-flight analysis get its result; they have no job of their own
+        if flights.is_follower(row["id"]):
+            continue
+        request = _stored_request(row)
+        try:
+            if queue.enqueue(row["id"], {"analysis_id": row["id"], "request": request.model_dump()}):
+                requeued += 1
+        except QueueFull:
+            break
+    if requeued:
+        print(f"Re-queued {requeued} pending analyses")
+    return requeued
 
 @router.post("/analyze")
-async def start_analysis(request: AnalysisRequest, background_tasks: BackgroundTasks):
+async def start_analysis(
+    request: AnalysisRequest,
+    background_tasks: BackgroundTasks,
+    gemini_service: GeminiService = Depends(require_gemini_service),
+    supabase: Client = Depends(require_supabase),
+):
     print(f"DEBUG: Processing analysis request for URL: {request.youtube_url} | User: {request.user_id}")
-    youtube_service, gemini_service, supabase = get_services()
     
     # --- DEMO MODE ---
     if request.youtube_url == "DEMO_MODE":
@@ -272,7 +613,7 @@ async def start_analysis(request: AnalysisRequest, background_tasks: BackgroundT
         }
         
         try:
-            supabase.table("video_analyses").insert({
+            await run_blocking("supabase", supabase.table("video_analyses").insert({
                 "id": mock_analysis_id,
                 "user_id": request.user_id,
                 "youtube_url": "https://www.youtube.com/watch?v=VM0AU-vPNeQ", # Real video for demo player seeking
@@ -282,7 +623,7 @@ async def start_analysis(request: AnalysisRequest, background_tasks: BackgroundT
                 "role": request.role,
                 "company": request.company,
                 "analysis_results": mock_results
-            }).execute()
+            }).execute)
             
             return {"status": "completed", "analysis_id": mock_analysis_id}
             
@@ -293,6 +634,30 @@ async def start_analysis(request: AnalysisRequest, background_tasks: BackgroundT
              raise HTTPException(status_code=500, detail=f"Demo mode failed: {str(e)}")
     # --- END DEMO MODE ---
 
+    # --- RESULT CACHE: clone a finished analysis of the same video into this user's row ---
+    cache = get_result_cache()
+    if cache and request.reuse_cached and not request.transcript_text:
+        cache_identity = _cache_identity(request.youtube_url)
+        hit = await run_blocking("cache", cache.get_any, *cache_identity, modes=_cache_modes(request)) if cache_identity else None
+        if hit:
+            mode, cached_result = hit
+            print(f"Result cache hit ({mode}) for {request.youtube_url}")
+            response = await run_blocking("supabase", supabase.table("video_analyses").insert({
+                "user_id": request.user_id,
+                "youtube_url": request.youtube_url,
+                "video_title": request.video_title,
+                "company": request.company,
+                "role": request.role,
+                "target_person": request.target_person,
+                "status": "completed",
+                "analysis_results": cached_result,
+            }).execute)
+            return {"status": "completed", "analysis_id": response.data[0]['id'], "cached": True}
+
+    queue = get_job_queue()
+    if queue is not None and not await run_blocking("queue", queue.has_capacity):
+        raise HTTPException(status_code=503, detail="Analysis queue is full. Please retry shortly.", headers={"Retry-After": "30"})
+
     try:
         # 1. Create a record in Supabase immediately
         data = {
@@ -302,37 +667,199 @@ async def start_analysis(request: AnalysisRequest, background_tasks: BackgroundT
             "company": request.company,
             "role": request.role,
             "target_person": request.target_person,
-            "status": "pending"
+            "status": "pending",
+            "analysis_request": request.model_dump(),
         }
         
-        response = supabase.table("video_analyses").insert(data).execute()
-        analysis_id = response.data[0]['id']
+        analysis_id = await run_blocking("supabase", _insert_pending_row, supabase, data)
+        payload = {"analysis_id": analysis_id, "request": request.model_dump()}
+
+        # 2. Attach to an identical analysis that is already running instead of starting another one
+        flight_key = _flight_key(request)
+        if flight_key and not await run_blocking("cache", get_single_flight().join, flight_key, analysis_id, payload):
+            print(f"Analysis {analysis_id} joined the in-flight analysis of {request.youtube_url}")
+            return {"status": "queued", "analysis_id": analysis_id, "deduplicated": True}
         
-        # 2. Start background task
-        background_tasks.add_task(process_analysis, request, analysis_id)
+        # 3. Hand off to the worker pool (or run in-process when JOB_QUEUE_BACKEND=inline)
+        if queue is not None:
+            await run_blocking("queue", queue.enqueue, analysis_id, payload)
+        else:
+            background_tasks.add_task(process_analysis, request, analysis_id)
         
         return {"status": "queued", "analysis_id": analysis_id}
         
+    except QueueFull as e:
+        # Lost the race for the last queue slot after the row was created
+        await _update_analysis(supabase, analysis_id, {"status": "failed", "error_message": str(e)})
+        raise HTTPException(status_code=503, detail="Analysis queue is full. Please retry shortly.", headers={"Retry-After": "30"})
     except Exception as e:
         import traceback
         traceback.print_exc()
-        # If analysis_id was created but task failed to schedule (unlikely), we still return success-ish
-        # But if creation failed, we raise 500
+        # The row was created but nothing will run it: fail it, which also hands its flight (if it leads one) on
         if 'analysis_id' in locals():
-             return {"status": "queued", "analysis_id": analysis_id}
+            try:
+                await _update_analysis(supabase, analysis_id, {"status": "failed", "error_message": f"Failed to start analysis: {e}"})
+            except Exception as update_error:
+                print(f"Could not mark analysis {analysis_id} failed: {update_error}")
         raise HTTPException(status_code=500, detail=f"Failed to start analysis: {str(e)}")
 
+@router.get("/analyze/cache/stats")
+async def get_cache_stats():
+    cache = get_result_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **await run_blocking("cache", cache.stats)}
+
+@router.get("/analyze/files/stats")
+async def get_file_wait_stats_route():
+    """Gemini file processing-time histograms, per file kind and outcome."""
+    return await run_blocking("cache", get_file_wait_stats().stats)
+
+@router.get("/analyze/uploads/stats")
+async def get_upload_stats():
+    """Live Gemini uploads plus bytes uploaded vs. bytes saved by reusing them."""
+    return await run_blocking("cache", get_gemini_uploads().stats)
+
+@router.get("/analyze/polls/stats")
+async def get_poll_stats():
+    """Status cache effect on GET /analyze/{id} polling in this process: DB reads and bytes per poll."""
+    return get_status_cache().stats()
+
+@router.get("/analyze/flights/stats")
+async def get_flight_stats():
+    """Single-flight de-duplication: analyses in flight, requests attached to them and results fanned out."""
+    return await run_blocking("cache", get_single_flight().stats)
+
+@router.get("/analyze/model/stats")
+async def get_model_stats():
+    """Model gateway: calls, retries, 429s / 5xx and rejections per lane, bucket levels and this process' breaker."""
+    return await run_blocking("cache", get_model_gateway().stats)
+
+@router.get("/analyze/youtube/stats")
+async def get_youtube_stats():
+    """yt-dlp extractions vs. reuses of a cached one in this process, and transcript strategy outcomes."""
+    return {"info": registry.youtube.info_cache.stats(), "transcript_strategies": transcript_strategy_stats()}
+
+@router.get("/analyze/workspaces/stats")
+async def get_workspace_stats():
+    """Download workspace disk usage (active jobs vs. finished artefacts) against the quota."""
+    return await run_blocking("cache", get_workspace_manager().stats)
+
+def _sse(event_id, event: str, data) -> str:
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def _initial_status(analysis_id: str):
+    """
+    Current status from Supabase, for analyses with no progress events yet (finished earlier, or still pending).
+    Returns None if the analysis doesn't exist, {} if its status can't be read.
+    """
+    supabase = registry.supabase
+    if supabase is None:
+        return {}
+    try:
+        response = await run_blocking(
+            "supabase", supabase.table("video_analyses").select("status, error_message").eq("id", analysis_id).execute
+        )
+    except Exception as e:
+        print(f"Initial status lookup for {analysis_id} failed: {e}")
+        return {}
+    return response.data[0] if response.data else None
+
+@router.get("/analyze/{analysis_id}/events")
+async def stream_analysis_events(analysis_id: str, request: Request, last_event_id: Optional[str] = Header(None)):
+    """
+    Server-sent events for one analysis: `status` events (downloading, analyzing, completed, failed) and
+    `section` events with dashboard sections ({"key", "value"}) as soon as the model has produced them.
+    Reconnects resume after Last-Event-ID. The stream ends on completed/failed; the saved dashboard
+    is then available from GET /analyze/{analysis_id}.
+    """
+    store = get_progress_store()
+    after = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+
+    async def events():
+        nonlocal after
+        started = last_sent = time.monotonic()
+        checked_initial = after > 0
+        while time.monotonic() - started < PROGRESS_STREAM_TIMEOUT_SECONDS:
+            batch = await run_blocking("cache", store.events_after, analysis_id, after)
+            if not batch and not checked_initial:
+                checked_initial = True
+                row = await _initial_status(analysis_id)
+                if row is None:
+                    yield _sse(0, "error", {"detail": "Analysis not found"})
+                    return
+                if row:
+                    yield _sse(0, "status", {"status": row["status"], "error_message": row.get("error_message")})
+                    if row["status"] in TERMINAL_STATUSES:
+                        return
+            checked_initial = True
+            for event in batch:
+                after = event["id"]
+                if event["kind"] == "status":
+                    yield _sse(event["id"], "status", {"status": event["name"], **(event["data"] or {})})
+                    if event["name"] in TERMINAL_STATUSES:
+                        return
+                else:
+                    yield _sse(event["id"], event["kind"], {"key": event["name"], "value": event["data"]})
+                last_sent = time.monotonic()
+            if batch:
+                continue
+            if await request.is_disconnected():
+                return
+            if time.monotonic() - last_sent >= PROGRESS_HEARTBEAT_SECONDS:
+                yield ": keep-alive\n\n"
+                last_sent = time.monotonic()
+            await asyncio.sleep(PROGRESS_POLL_SECONDS)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @router.get("/analyze/{analysis_id}")
-async def get_analysis(analysis_id: str):
-    youtube_service, gemini_service, supabase = get_services()
-    
+async def get_analysis(
+    analysis_id: str,
+    projection: Literal["full", "status"] = "full",
+    if_none_match: Optional[str] = Header(None),
+    supabase: Client = Depends(require_supabase),
+):
+    """
+    Analysis row, served from the in-process status cache while its progress version is unchanged.
+    projection=status returns only the status fields until the analysis has completed.
+    Sends an ETag; a poll with a matching If-None-Match gets 304 Not Modified.
+    """
+    cache = get_status_cache()
     try:
-        response = supabase.table("video_analyses").select("*").eq("id", analysis_id).execute()
-        
-        if not response.data:
-            raise HTTPException(status_code=404, detail="Analysis not found")
-            
-        return response.data[0]
-        
+        try:
+            version = await run_blocking("cache", get_progress_store().status_version, analysis_id)
+        except Exception as e:
+            print(f"Progress version lookup failed, bypassing status cache: {e}")
+            version = None
+        entry = cache.get(analysis_id, version, projection) if version is not None else None
+        if entry is None:
+            columns = "*" if projection == "full" else ", ".join(STATUS_FIELDS)
+            response = await run_blocking("supabase", supabase.table("video_analyses").select(columns).eq("id", analysis_id).execute)
+            reads = 1
+            if not response.data:
+                raise HTTPException(status_code=404, detail="Analysis not found")
+            row = response.data[0]
+            if columns != "*" and row.get("status") == "completed":
+                response = await run_blocking("supabase", supabase.table("video_analyses").select("*").eq("id", analysis_id).execute)
+                reads += 1
+                row = response.data[0] if response.data else row
+            row = project(row, projection)
+            entry = cache.put(analysis_id, version or 0, row, projection)
+            cache.count(db_reads=reads)
+        else:
+            cache.count(hits=1)
+        cache.count(polls=1)
+
+        headers = {"ETag": entry["etag"], "Cache-Control": "no-cache"}
+        if if_none_match and (if_none_match.strip() == "*" or entry["etag"] in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]):
+            cache.count(not_modified=1)
+            return Response(status_code=304, headers=headers)
+        cache.count(bytes_sent=len(entry["body"]))
+        return Response(content=entry["body"], media_type="application/json", headers=headers)
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,69 @@
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from dependencies import get_gemini_service
+from routers.snapshot import score_snapshot
+from services.live_session import LiveSession, parse_binary
+import asyncio
+import json
+
+router = APIRouter()
+
+@router.websocket("/ws/live")
+async def live_socket(websocket: WebSocket, audio_mime: str = "audio/webm"):
+    """
+    One long-lived connection for the live HUD, replacing the three polling endpoints.
+    Client -> server:
+      - binary: 1-byte kind (1 = JPEG frame, 2 = audio chunk), float64 big-endian timestamp, raw bytes
+      - text: {"type": "transcript", "text": "...", "timestamp": 12.5}, {"type": "stats"}, or a bare transcript line
+    Server -> client: {"type": kind, "timestamp", "merged", "latency_ms", "result"} per finished call.
+    When the model falls behind only the latest frame / audio chunk is scored; transcript lines are joined.
+    """
+    await websocket.accept()
+    try:
+        gemini_service = get_gemini_service()
+    except HTTPException as e:
+        await websocket.send_json({"type": "error", "detail": e.detail})
+        await websocket.close(code=1011)
+        return
+
+    send_lock = asyncio.Lock()
+
+    async def send(message: dict):
+        async with send_lock:
+            await websocket.send_json(message)
+
+    session = LiveSession({
+        "frame": lambda payload, timestamp: score_snapshot(gemini_service, payload, timestamp),
+        "audio": lambda payload, timestamp: gemini_service.analyze_audio_async(payload, audio_mime),
+        "transcript": lambda payload, timestamp: gemini_service.analyze_transcript_async(payload),
+    }, send)
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                try:
+                    kind, timestamp, payload = parse_binary(message["bytes"])
+                except ValueError as e:
+                    await send({"type": "error", "detail": str(e)})
+                    continue
+                session.submit(kind, payload, timestamp)
+            elif message.get("text") is not None:
+                text = message["text"]
+                try:
+                    data = json.loads(text)
+                except ValueError:
+                    data = None
+                if not isinstance(data, dict):
+                    session.submit("transcript", text)
+                elif data.get("type") == "stats":
+                    await send({"type": "stats", **session.stats()})
+                elif data.get("type") == "transcript" and data.get("text"):
+                    session.submit("transcript", data["text"], data.get("timestamp"))
+                else:
+                    await send({"type": "error", "detail": "Unsupported message"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        session.close()
@@ -1,34 +1,94 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends, File, Form, UploadFile
 from pydantic import BaseModel
-from dependencies import get_services
+from typing import List
+from dependencies import get_gemini_service
+from services.gemini_service import GeminiService
+from services.micro_batcher import MicroBatcher
+import asyncio
 import base64
+import os
 
 router = APIRouter()
 
+# Frames scored per model call; larger batch requests are split into calls of this size and run concurrently
+SNAPSHOT_BATCH_SIZE = int(os.getenv("SNAPSHOT_BATCH_SIZE", "8"))
+SNAPSHOT_BATCH_MAX_FRAMES = int(os.getenv("SNAPSHOT_BATCH_MAX_FRAMES", "64"))
+# How long a single-frame request waits for concurrent ones to share its model call (0 disables micro-batching)
+SNAPSHOT_MICROBATCH_WAIT_MS = float(os.getenv("SNAPSHOT_MICROBATCH_WAIT_MS", "40"))
+
 class SnapshotRequest(BaseModel):
     image_data: str
     video_url: str
     timestamp: float
     title: str = ""
 
+class BatchFrame(BaseModel):
+    image_data: str
+    timestamp: float
+    mime_type: str = "image/jpeg"
+
+class SnapshotBatchRequest(BaseModel):
+    frames: List[BatchFrame]
+    video_url: str
+    title: str = ""
+
+def _decode_image(image_data: str) -> bytes:
+    if "," in image_data:
+        header, encoded = image_data.split(",", 1)
+    else:
+        encoded = image_data
+    return base64.b64decode(encoded)
+
+async def _score_frames(gemini_service: GeminiService, frames) -> list:
+    """
+    frames: [(image_bytes, mime_type, timestamp)]. One frame keeps the single-snapshot prompt;
+    more are scored SNAPSHOT_BATCH_SIZE per model call.
+    """
+    if len(frames) == 1:
+        image_bytes, mime_type, timestamp = frames[0]
+        result = await gemini_service.analyze_snapshot_async(image_bytes, mime_type)
+        return [{"timestamp": timestamp, **result}]
+    chunks = [frames[i:i + SNAPSHOT_BATCH_SIZE] for i in range(0, len(frames), SNAPSHOT_BATCH_SIZE)]
+    results = await asyncio.gather(*(gemini_service.analyze_snapshot_batch_async(chunk) for chunk in chunks))
+    return [result for chunk_results in results for result in chunk_results]
+
+_batchers = {}
+
+def _snapshot_batcher(gemini_service: GeminiService) -> MicroBatcher:
+    """Per-service batcher; the event loop is single-threaded, so no lock is needed."""
+    key = id(gemini_service)
+    if key not in _batchers:
+        _batchers[key] = MicroBatcher(
+            lambda frames: _score_frames(gemini_service, frames),
+            max_batch=SNAPSHOT_BATCH_SIZE,
+            max_wait=SNAPSHOT_MICROBATCH_WAIT_MS / 1000,
+        )
+    return _batchers[key]
+
+async def score_snapshot(gemini_service: GeminiService, image_bytes: bytes, timestamp: float, mime_type: str = "image/jpeg") -> dict:
+    """Scores one frame; concurrent callers (HTTP or live socket) share model calls through the micro-batcher."""
+    frame = (image_bytes, mime_type, timestamp)
+    if SNAPSHOT_MICROBATCH_WAIT_MS > 0:
+        return await _snapshot_batcher(gemini_service).submit(frame)
+    return (await _score_frames(gemini_service, [frame]))[0]
+
+async def _score_batch_request(frames, video_url: str, gemini_service: GeminiService) -> dict:
+    if not frames:
+        raise HTTPException(status_code=400, detail="No frames provided")
+    if len(frames) > SNAPSHOT_BATCH_MAX_FRAMES:
+        raise HTTPException(status_code=400, detail=f"At most {SNAPSHOT_BATCH_MAX_FRAMES} frames per request")
+    print(f"Analyzing {len(frames)} snapshots for {video_url}")
+    return {"results": await _score_frames(gemini_service, frames)}
+
 @router.post("/analyze/snapshot")
-async def analyze_snapshot(request: SnapshotRequest):
-    # Only need gemini service here, really.
-    youtube_service, gemini_service, supabase = get_services()
-    
+async def analyze_snapshot(request: SnapshotRequest, gemini_service: GeminiService = Depends(get_gemini_service)):
     try:
         # Decode base64 image
-        if "," in request.image_data:
-            header, encoded = request.image_data.split(",", 1)
-        else:
-            encoded = request.image_data
-            
-        # Ensure correct padding if needed (though browser usually sends correct b64)
-        image_bytes = base64.b64decode(encoded)
+        image_bytes = _decode_image(request.image_data)
         
-        # Analyze with Gemini
+        # Analyze with Gemini; concurrent single-frame requests share one model call
         print(f"Analyzing snapshot for {request.video_url} at {request.timestamp}")
-        result = gemini_service.analyze_snapshot(image_bytes)
+        result = await score_snapshot(gemini_service, image_bytes, request.timestamp)
         
         # Optionally, save this snapshot result to Supabase if we want a history
         # (For now, let's keep it ephemeral for speed)
@@ -41,13 +101,50 @@ async def analyze_snapshot(request: SnapshotRequest):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/analyze/snapshot/batch")
+async def analyze_snapshot_batch(request: SnapshotBatchRequest, gemini_service: GeminiService = Depends(get_gemini_service)):
+    """Scores N base64 frames; returns {"results": [...]} with one entry per frame, in request order."""
+    try:
+        frames = [(_decode_image(f.image_data), f.mime_type, f.timestamp) for f in request.frames]
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid image data: {e}")
+    return await _score_batch_request(frames, request.video_url, gemini_service)
+
+@router.post("/analyze/snapshot/batch/upload")
+async def analyze_snapshot_batch_upload(
+    frames: List[UploadFile] = File(...),
+    timestamps: List[float] = Form(...),
+    video_url: str = Form(...),
+    gemini_service: GeminiService = Depends(get_gemini_service),
+):
+    """Multipart variant of /analyze/snapshot/batch: raw JPEG parts plus one `timestamps` field per part, no base64."""
+    if len(timestamps) != len(frames):
+        raise HTTPException(status_code=400, detail=f"Got {len(frames)} frames but {len(timestamps)} timestamps")
+    decoded = []
+    for upload, timestamp in zip(frames, timestamps):
+        decoded.append((await upload.read(), upload.content_type or "image/jpeg", timestamp))
+    return await _score_batch_request(decoded, video_url, gemini_service)
+
+@router.get("/analyze/snapshot/stats")
+async def snapshot_batch_stats():
+    """Micro-batching counters for this process: model calls made for single-frame requests and mean frames per call."""
+    stats = [batcher.stats() for batcher in _batchers.values()]
+    batches = sum(s["batches"] for s in stats)
+    items = sum(s["items"] for s in stats)
+    return {
+        "microbatch_wait_ms": SNAPSHOT_MICROBATCH_WAIT_MS,
+        "batch_size": SNAPSHOT_BATCH_SIZE,
+        "batches": batches,
+        "items": items,
+        "mean_batch_size": round(items / batches, 2) if batches else 0.0,
+    }
+
 class AudioRequest(BaseModel):
     audio_data: str
     timestamp: float
 
 @router.post("/analyze/audio_chunk")
-async def analyze_audio_chunk(request: AudioRequest):
-    youtube_service, gemini_service, supabase = get_services()
+async def analyze_audio_chunk(request: AudioRequest, gemini_service: GeminiService = Depends(get_gemini_service)):
     try:
         if "," in request.audio_data:
             header, encoded = request.audio_data.split(",", 1)
@@ -57,31 +154,23 @@ async def analyze_audio_chunk(request: AudioRequest):
         audio_bytes = base64.b64decode(encoded)
         
         # Analyze with Gemini (Voice)
-        # We need to implement analyze_audio in GeminiService
-        result = gemini_service.analyze_audio(audio_bytes)
+        result = await gemini_service.analyze_audio_async(audio_bytes)
         
         return result
     except Exception as e:
         import traceback
         traceback.print_exc()
         # Return harmless error to not break frontend loop
-
-        return result
-        
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+        return {"error": str(e), "score": 0, "feedback": "Audio analysis error"}
 
 class TranscriptRequest(BaseModel):
     text: str
 
 @router.post("/analyze/transcript")
-async def analyze_transcript(request: TranscriptRequest):
-    youtube_service, gemini_service, supabase = get_services()
+async def analyze_transcript(request: TranscriptRequest, gemini_service: GeminiService = Depends(get_gemini_service)):
     try:
         # Analyze with Gemini (Text)
-        result = gemini_service.analyze_transcript(request.text)
+        result = await gemini_service.analyze_transcript_async(request.text)
         return result
     except Exception as e:
         import traceback
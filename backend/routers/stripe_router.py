@@ -2,7 +2,8 @@ import os
 import stripe
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
-from dependencies import get_services
+from dependencies import get_supabase
+from services.executor import run_blocking
 import logging
 
 logger = logging.getLogger(__name__)
@@ -45,7 +46,7 @@ async def create_checkout_session(req: CheckoutSessionRequest):
             mode = 'payment'
 
         sep = "&" if "?" in req.success_url else "?"
-        session = stripe.checkout.Session.create(
+        session = await run_blocking("stripe", stripe.checkout.Session.create,
             payment_method_types=['card'],
             line_items=line_items,
             mode=mode,
@@ -93,11 +94,11 @@ async def stripe_webhook(request: Request):
         
         try:
             # Update user tier in Supabase
-            _, _, supabase = get_services()
+            supabase = get_supabase()
             
             # Assuming you have a 'users' or 'profiles' table with a 'tier' column.
             # Example Update (You can adjust table name/schema as needed):
-            response = supabase.table("users").update({"tier": "pro"}).eq("id", user_id).execute()
+            response = await run_blocking("supabase", supabase.table("users").update({"tier": "pro"}).eq("id", user_id).execute)
             
             print(f"DEBUG: Supabase Update Response: {response}")
             
@@ -0,0 +1,4 @@
+-- The AnalysisRequest each row was submitted with (routers/analysis.py), so requeue_pending_analyses can
+-- re-run a pending row as it was asked for: analysis_mode, include_keyframes and transcript_text included.
+ALTER TABLE public.video_analyses
+ADD COLUMN IF NOT EXISTS analysis_request JSONB;
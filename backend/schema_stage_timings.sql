@@ -0,0 +1,5 @@
+-- Per-stage timings of each analysis, written by the job state writer (services/job_state.py).
+-- Shape: {"metadata": {"started_at": 1718000000.123, "seconds": 0.8}, "transcript": {...}, "download": {...}, "model": {...}, "save": {...}}
+-- started_at is a Unix timestamp, seconds the wall time spent in the stage (summed if a stage ran more than once).
+ALTER TABLE public.video_analyses
+ADD COLUMN IF NOT EXISTS stage_timings JSONB;
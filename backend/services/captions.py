@@ -0,0 +1,116 @@
+import re
+import html
+from collections import deque
+
+# 00:00:01.120 (VTT) / 00:00:01,120 (SRT); the hours field is optional in VTT
+_TS = r'(?:\d+:)?\d{1,2}:\d{2}[.,]\d{3}'
+_TIMING_RE = re.compile(r'^\s*(' + _TS + r')\s*-->\s*(' + _TS + r')')
+# Inline word timings used by YouTube auto-captions: Let's<00:00:00.240><c> start</c>
+_INLINE_TS_RE = re.compile(r'<(' + _TS + r')>')
+_TAG_RE = re.compile(r'<[^>]*>')
+
+# Rolling captions repeat the previous line(s) at the top of each cue
+ROLLING_WINDOW = 2
+
+
+def parse_timestamp(ts: str) -> float:
+    parts = ts.replace(',', '.').split(':')
+    seconds = float(parts[-1])
+    if len(parts) > 1:
+        seconds += int(parts[-2]) * 60
+    if len(parts) > 2:
+        seconds += int(parts[-3]) * 3600
+    return seconds
+
+
+def _clean(text: str) -> str:
+    if '<' in text:
+        text = _TAG_RE.sub('', text)
+    if '&' in text:
+        text = html.unescape(text)
+    # str.split() also splits on the \xa0 that &nbsp; unescapes to
+    return ' '.join(text.split())
+
+
+def _words(raw_line: str, cue_start: float) -> list:
+    """Splits a line with inline <timestamp> markers into [{start, text}] words."""
+    words = []
+    parts = _INLINE_TS_RE.split(raw_line)
+    # parts alternates text, timestamp, text, timestamp, ...
+    start = cue_start
+    for i, part in enumerate(parts):
+        if i % 2 == 1:
+            start = parse_timestamp(part)
+            continue
+        for word in _clean(part).split(' '):
+            if word:
+                words.append({"start": start, "text": word})
+    return words
+
+
+def iter_cues(lines):
+    """
+    Yields (start, end, raw_text_lines) for every cue in a VTT or SRT stream.
+    Header, NOTE/STYLE blocks and SRT counters are skipped because they are not inside a cue.
+    """
+    start = end = None
+    text_lines = []
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if start is None:
+            m = _TIMING_RE.match(line) if '-->' in line else None
+            if m:
+                start, end = parse_timestamp(m.group(1)), parse_timestamp(m.group(2))
+                text_lines = []
+            continue
+        if line == '':
+            yield start, end, text_lines
+            start = None
+            continue
+        text_lines.append(line)
+    if start is not None:
+        yield start, end, text_lines
+
+
+def iter_segments(lines, word_timestamps: bool = False):
+    """
+    Yields {start, end, text} segments (plus "words" when word_timestamps=True),
+    with rolling-caption repeats removed in a single pass.
+    A line is dropped if it matches one of the last ROLLING_WINDOW emitted lines, and a
+    line that extends the previous one ("Hello" -> "Hello world") only contributes its new tail.
+    """
+    recent = deque(maxlen=ROLLING_WINDOW)
+    for start, end, raw_lines in iter_cues(lines):
+        new_lines = []
+        words = []
+        for raw in raw_lines:
+            text = _clean(raw)
+            if not text or text in recent:
+                continue
+            prev = recent[-1] if recent else None
+            recent.append(text)
+            extends_prev = prev is not None and text.startswith(prev + ' ')
+            if extends_prev:
+                text = text[len(prev) + 1:]
+            new_lines.append(text)
+            if word_timestamps:
+                line_words = _words(raw, start)
+                if extends_prev:
+                    line_words = line_words[len(prev.split(' ')):]
+                words.extend(line_words)
+        if not new_lines:
+            continue
+        segment = {"start": start, "end": end, "text": ' '.join(new_lines)}
+        if word_timestamps:
+            segment["words"] = words
+        yield segment
+
+
+def parse_caption_file(path: str, word_timestamps: bool = False) -> list:
+    """Streams a .vtt/.srt file from disk into segments without loading it whole."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return list(iter_segments(f, word_timestamps))
+
+
+def segments_to_text(segments) -> str:
+    return ' '.join(seg["text"] for seg in segments)
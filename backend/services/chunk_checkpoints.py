@@ -0,0 +1,63 @@
+import os
+import json
+import time
+import threading
+from services.storage import SQLiteStore, data_path
+
+CHECKPOINT_TTL_SECONDS = float(os.getenv("CHUNK_CHECKPOINT_TTL_SECONDS", str(7 * 86400)))
+
+
+class ChunkCheckpointStore(SQLiteStore):
+    """
+    Per-chunk results of a chunked (map-reduce) transcript analysis, keyed by run.
+    A retried run loads the chunks that already succeeded and only re-runs the rest.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS chunk_checkpoints (
+        run_key TEXT NOT NULL,
+        chunk_index INTEGER NOT NULL,
+        result TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        PRIMARY KEY (run_key, chunk_index)
+    );
+    """
+
+    def __init__(self, path: str = None, ttl_seconds: float = CHECKPOINT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        super().__init__(path or data_path("chunk_checkpoints.db"))
+
+    def load(self, run_key: str) -> dict:
+        """Returns {chunk_index: result} for the run's saved chunks."""
+        rows = self._conn().execute(
+            "SELECT chunk_index, result FROM chunk_checkpoints WHERE run_key = ? AND created_at >= ?",
+            (run_key, time.time() - self.ttl_seconds),
+        ).fetchall()
+        return {row["chunk_index"]: json.loads(row["result"]) for row in rows}
+
+    def save(self, run_key: str, chunk_index: int, result: dict):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO chunk_checkpoints (run_key, chunk_index, result, created_at) VALUES (?, ?, ?, ?)",
+            (run_key, chunk_index, json.dumps(result), time.time()),
+        )
+
+    def clear(self, run_key: str):
+        self._conn().execute("DELETE FROM chunk_checkpoints WHERE run_key = ?", (run_key,))
+
+    def purge_expired(self) -> int:
+        return self._conn().execute(
+            "DELETE FROM chunk_checkpoints WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+        ).rowcount
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> ChunkCheckpointStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ChunkCheckpointStore()
+    return _store
@@ -0,0 +1,52 @@
+import os
+import asyncio
+import functools
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# One bounded thread pool per blocking dependency, so a slow Gemini call
+# can't use up the threads that Supabase reads need (and vice versa).
+POOL_SIZES = {
+    "supabase": int(os.getenv("SUPABASE_POOL_SIZE", "8")),
+    "gemini": int(os.getenv("GEMINI_POOL_SIZE", "8")),
+    "youtube": int(os.getenv("YOUTUBE_POOL_SIZE", "4")),
+    "stripe": int(os.getenv("STRIPE_POOL_SIZE", "4")),
+    "queue": int(os.getenv("QUEUE_POOL_SIZE", "2")),
+    "cache": int(os.getenv("CACHE_POOL_SIZE", "2")),
+    # Model gateway bookkeeping (shared rate-limit buckets in SQLite) for async model calls
+    "gateway": int(os.getenv("GATEWAY_POOL_SIZE", "2")),
+    # Strategy threads spawned from inside youtube-pool calls; kept separate so they can't deadlock it
+    "transcript": int(os.getenv("TRANSCRIPT_POOL_SIZE", "8")),
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name: str) -> ThreadPoolExecutor:
+    pool = _pools.get(name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(name)
+            if pool is None:
+                pool = ThreadPoolExecutor(max_workers=POOL_SIZES.get(name, 4), thread_name_prefix=f"{name}-io")
+                _pools[name] = pool
+    return pool
+
+
+async def run_blocking(pool_name: str, func, *args, **kwargs):
+    """
+    Runs a blocking call on the named pool without stalling the event loop.
+    The call sees the caller's context variables (like asyncio.to_thread), so its spans nest under the caller's.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(get_pool(pool_name), functools.partial(ctx.run, func, *args, **kwargs))
+
+
+def shutdown_pools(wait: bool = False):
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=wait, cancel_futures=True)
+        _pools.clear()
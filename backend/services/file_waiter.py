@@ -0,0 +1,170 @@
+import os
+import time
+import random
+import threading
+from services.storage import SQLiteStore, data_path
+from services.tracing import record_span
+
+# Poll schedule for Gemini file processing: starts fast, backs off exponentially with jitter
+WAIT_INITIAL_INTERVAL = float(os.getenv("FILE_WAIT_INITIAL_INTERVAL", "0.5"))
+WAIT_MAX_INTERVAL = float(os.getenv("FILE_WAIT_MAX_INTERVAL", "6.0"))
+WAIT_MULTIPLIER = float(os.getenv("FILE_WAIT_MULTIPLIER", "1.5"))
+WAIT_DEADLINE_SECONDS = float(os.getenv("FILE_WAIT_DEADLINE_SECONDS", "600"))
+# Audio is small and usually ready within seconds
+AUDIO_WAIT_DEADLINE_SECONDS = float(os.getenv("FILE_WAIT_AUDIO_DEADLINE_SECONDS", "120"))
+
+# Upper bounds (seconds) of the processing-time histogram buckets; the last bucket is +inf
+HISTOGRAM_BUCKETS = (1, 2, 5, 10, 20, 30, 60, 120, 300, 600)
+
+
+class FileProcessingTimeout(TimeoutError):
+    pass
+
+
+class FileProcessingFailed(ValueError):
+    pass
+
+
+class FileWaitCancelled(Exception):
+    pass
+
+
+def backoff_delays(initial: float = WAIT_INITIAL_INTERVAL, maximum: float = WAIT_MAX_INTERVAL,
+                   multiplier: float = WAIT_MULTIPLIER):
+    """
+    Endless generator of poll delays: exponential growth capped at `maximum`,
+    with "equal jitter" (half fixed, half random) so concurrent waiters don't poll in lockstep.
+    """
+    base = initial
+    while True:
+        yield base / 2 + random.uniform(0, base / 2)
+        base = min(base * multiplier, maximum)
+
+
+class FileWaitStats(SQLiteStore):
+    """
+    Processing-time histograms per file kind ("video", "audio", ...), shared by every process
+    on the host so the poll schedule can be tuned from real data.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS file_wait_histogram (
+        kind TEXT NOT NULL,
+        outcome TEXT NOT NULL,
+        bucket TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (kind, outcome, bucket)
+    );
+    CREATE TABLE IF NOT EXISTS file_wait_totals (
+        kind TEXT NOT NULL,
+        outcome TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        seconds REAL NOT NULL DEFAULT 0,
+        polls INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (kind, outcome)
+    );
+    """
+
+    def __init__(self, path: str = None):
+        super().__init__(path or data_path("file_wait_stats.db"))
+
+    @staticmethod
+    def bucket_for(seconds: float) -> str:
+        for bound in HISTOGRAM_BUCKETS:
+            if seconds <= bound:
+                return str(bound)
+        return "+Inf"
+
+    def record(self, kind: str, outcome: str, seconds: float, polls: int):
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO file_wait_histogram (kind, outcome, bucket, count) VALUES (?, ?, ?, 1) "
+            "ON CONFLICT(kind, outcome, bucket) DO UPDATE SET count = count + 1",
+            (kind, outcome, self.bucket_for(seconds)),
+        )
+        conn.execute(
+            "INSERT INTO file_wait_totals (kind, outcome, count, seconds, polls) VALUES (?, ?, 1, ?, ?) "
+            "ON CONFLICT(kind, outcome) DO UPDATE SET count = count + 1, "
+            "seconds = seconds + excluded.seconds, polls = polls + excluded.polls",
+            (kind, outcome, seconds, polls),
+        )
+
+    def stats(self) -> dict:
+        """{kind: {outcome: {count, mean_seconds, mean_polls, buckets: {le: count}}}}"""
+        conn = self._conn()
+        out = {}
+        for row in conn.execute("SELECT * FROM file_wait_totals"):
+            out.setdefault(row["kind"], {})[row["outcome"]] = {
+                "count": row["count"],
+                "mean_seconds": round(row["seconds"] / row["count"], 2) if row["count"] else 0.0,
+                "mean_polls": round(row["polls"] / row["count"], 2) if row["count"] else 0.0,
+                "buckets": {},
+            }
+        for row in conn.execute("SELECT * FROM file_wait_histogram"):
+            entry = out.get(row["kind"], {}).get(row["outcome"])
+            if entry is not None:
+                entry["buckets"][row["bucket"]] = row["count"]
+        order = [str(b) for b in HISTOGRAM_BUCKETS] + ["+Inf"]
+        for outcomes in out.values():
+            for entry in outcomes.values():
+                entry["buckets"] = {b: entry["buckets"][b] for b in order if b in entry["buckets"]}
+        return out
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def get_file_wait_stats() -> FileWaitStats:
+    global _stats
+    if _stats is None:
+        with _stats_lock:
+            if _stats is None:
+                _stats = FileWaitStats()
+    return _stats
+
+
+def _record(kind: str, outcome: str, started: float, polls: int):
+    seconds = time.monotonic() - started
+    record_span("gemini.file_wait", seconds, "ok" if outcome == "active" else outcome, {"polls": polls}, kind=kind)
+    try:
+        get_file_wait_stats().record(kind, outcome, seconds, polls)
+    except Exception as e:
+        print(f"File wait stats warning: {e}")
+
+
+def _state(file) -> str:
+    return file.state.name
+
+
+def wait_for_file(file, get_file, kind: str = "file", deadline: float = WAIT_DEADLINE_SECONDS,
+                  cancel: threading.Event = None, delays=None):
+    """
+    Blocks until an uploaded Gemini file leaves the PROCESSING state and returns the refreshed handle.
+    Raises FileProcessingFailed, FileProcessingTimeout after `deadline` seconds,
+    or FileWaitCancelled as soon as `cancel` is set.
+    """
+    started = time.monotonic()
+    delays = delays or backoff_delays()
+    polls = 0
+    while _state(file) == "PROCESSING":
+        remaining = deadline - (time.monotonic() - started)
+        if remaining <= 0:
+            _record(kind, "timeout", started, polls)
+            raise FileProcessingTimeout(f"Gemini {kind} processing timed out after {deadline:g}s ({file.name})")
+        delay = min(next(delays), remaining)
+        if cancel is not None:
+            if cancel.wait(delay):
+                _record(kind, "cancelled", started, polls)
+                raise FileWaitCancelled(f"Stopped waiting for {file.name}")
+        else:
+            time.sleep(delay)
+        file = get_file(file.name)
+        polls += 1
+
+    if _state(file) == "FAILED":
+        _record(kind, "failed", started, polls)
+        raise FileProcessingFailed(f"Gemini {kind} processing failed ({file.name})")
+    _record(kind, "active", started, polls)
+    return file
+
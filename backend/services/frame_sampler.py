@@ -0,0 +1,129 @@
+import os
+import json
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+# Video tier: "frames" sends the audio track plus a de-duplicated frame sample; "upload" sends the whole video file
+VIDEO_ANALYSIS_STRATEGY = os.getenv("VIDEO_ANALYSIS_STRATEGY", "frames")
+
+# The hash pass decodes the video once at HASH_FPS (capped at MAX_HASH_FRAMES samples) into 9x8 grayscale thumbnails
+HASH_FPS = float(os.getenv("FRAME_HASH_FPS", "1.0"))
+MAX_HASH_FRAMES = int(os.getenv("FRAME_MAX_HASH_FRAMES", "3600"))
+# A sample is kept when it differs from the last kept frame by at least this many of the 64 dHash bits...
+DEDUP_DISTANCE = int(os.getenv("FRAME_DEDUP_DISTANCE", "10"))
+# ...or when this much time has passed without a kept frame, so static shots still get timeline coverage
+MAX_FRAME_GAP_SECONDS = float(os.getenv("FRAME_MAX_GAP_SECONDS", "45"))
+MAX_FRAMES = int(os.getenv("FRAME_MAX_FRAMES", "40"))
+FRAME_HEIGHT = int(os.getenv("FRAME_HEIGHT", "360"))
+FRAME_CONCURRENCY = int(os.getenv("FRAME_CONCURRENCY", "4"))
+
+_HASH_W, _HASH_H = 9, 8
+
+
+def probe_duration(video_path: str) -> float:
+    out = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "json", video_path],
+        check=True, capture_output=True, timeout=60,
+    ).stdout
+    return float(json.loads(out)["format"]["duration"])
+
+
+def dhash(pixels: bytes) -> int:
+    """64-bit difference hash of a 9x8 grayscale thumbnail: one bit per horizontally adjacent pixel pair."""
+    value = 0
+    for row in range(_HASH_H):
+        offset = row * _HASH_W
+        for col in range(_HASH_W - 1):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def hash_frames(video_path: str, fps: float):
+    """[(seconds, dhash)] for frames sampled at `fps`, from a single ffmpeg decode into raw 9x8 gray thumbnails."""
+    proc = subprocess.Popen(
+        ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", video_path,
+         "-vf", f"fps={fps},scale={_HASH_W}:{_HASH_H},format=gray", "-f", "rawvideo", "pipe:1"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    frame_size = _HASH_W * _HASH_H
+    hashes = []
+    while True:
+        pixels = proc.stdout.read(frame_size)
+        if len(pixels) < frame_size:
+            break
+        # The fps filter emits frame n at n/fps seconds
+        hashes.append((len(hashes) / fps, dhash(pixels)))
+    stderr = proc.stderr.read().decode("utf-8", "replace")
+    if proc.wait() != 0 and not hashes:
+        raise ValueError(f"Frame hashing failed: {stderr.strip()[-500:]}")
+    return hashes
+
+
+def select_frames(hashes, distance: int = DEDUP_DISTANCE, max_gap: float = MAX_FRAME_GAP_SECONDS,
+                  max_frames: int = MAX_FRAMES):
+    """
+    Keeps a sample when it is perceptually new (>= distance bits from the last kept one) or when
+    max_gap seconds passed without one. If that is still more than max_frames, the threshold is
+    raised until it fits, so busy videos thin out their least distinct frames first.
+    """
+    while True:
+        kept = []
+        for seconds, value in hashes:
+            if not kept or hamming(value, kept[-1][1]) >= distance or seconds - kept[-1][0] >= max_gap:
+                kept.append((seconds, value))
+        if len(kept) <= max_frames or distance >= 64:
+            break
+        distance += 2
+        max_gap *= 1.25
+    if len(kept) > max_frames:
+        step = len(kept) / max_frames
+        kept = [kept[int(i * step)] for i in range(max_frames)]
+    return [seconds for seconds, _ in kept]
+
+
+def extract_frames(video_path: str, timestamps, out_dir: str):
+    """Writes one JPEG per timestamp (fast input seeking) and returns [(seconds, path)]."""
+    def grab(item):
+        i, seconds = item
+        path = os.path.join(out_dir, f"frame_{i:04d}.jpg")
+        try:
+            subprocess.run(
+                ["ffmpeg", "-nostdin", "-loglevel", "error", "-y", "-ss", f"{seconds:.2f}", "-i", video_path,
+                 "-frames:v", "1", "-vf", f"scale=-2:{FRAME_HEIGHT}", "-q:v", "4", path],
+                check=True, capture_output=True, timeout=60,
+            )
+        except Exception as e:
+            print(f"Frame at {seconds:.1f}s failed: {e}")
+            return None
+        return (seconds, path) if os.path.exists(path) else None
+
+    with ThreadPoolExecutor(max_workers=FRAME_CONCURRENCY, thread_name_prefix="frames") as pool:
+        return [frame for frame in pool.map(grab, enumerate(timestamps)) if frame]
+
+
+def sample_frames(video_path: str, out_dir: str):
+    """
+    Adaptive, de-duplicated frame sample of a local video.
+    Returns ([(seconds, jpeg_path)], stats) where stats counts sampled vs. kept frames.
+    """
+    duration = probe_duration(video_path)
+    fps = min(HASH_FPS, MAX_HASH_FRAMES / max(duration, 1.0))
+    hashes = hash_frames(video_path, fps)
+    timestamps = select_frames(hashes)
+    frames = extract_frames(video_path, timestamps, out_dir)
+    stats = {"duration_seconds": round(duration, 1), "hash_fps": round(fps, 3), "sampled": len(hashes), "kept": len(frames)}
+    print(f"Frame sampler: kept {len(frames)} of {len(hashes)} sampled frames over {duration:.0f}s")
+    return frames, stats
+
+
+def extract_audio_track(video_path: str, out_path: str, kbps: str = "64") -> str:
+    """Pulls the audio out of a local video as mono mp3 (no network, no video re-encode)."""
+    subprocess.run(
+        ["ffmpeg", "-nostdin", "-loglevel", "error", "-y", "-i", video_path, "-vn", "-ac", "1", "-b:a", f"{kbps}k", out_path],
+        check=True, capture_output=True, timeout=600,
+    )
+    return out_path
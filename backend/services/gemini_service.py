@@ -1,37 +1,36 @@
 
-import vertexai
-from vertexai.generative_models import GenerativeModel, Part, FinishReason
-import vertexai.preview.generative_models as generative_models
-import google.generativeai as genai
 import os
 import json
-import time
+import hashlib
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from services.chunk_checkpoints import get_checkpoint_store
+from services.file_waiter import AUDIO_WAIT_DEADLINE_SECONDS
+from services.json_stream import ObjectMemberStream
+from services.model_gateway import get_model_gateway
+from services.model_backends import make_backend
+from services.tracing import span
+
+# Bump whenever the dashboard prompts change, so cached results from old prompts aren't reused
+PROMPT_VERSION = "2"
+
+# Long transcripts (by duration or size) are analysed in overlapping windows, then merged
+CHUNK_THRESHOLD_SECONDS = float(os.getenv("TRANSCRIPT_CHUNK_THRESHOLD_SECONDS", "2700"))
+CHUNK_THRESHOLD_CHARS = int(os.getenv("TRANSCRIPT_CHUNK_THRESHOLD_CHARS", "120000"))
+CHUNK_WINDOW_SECONDS = float(os.getenv("TRANSCRIPT_CHUNK_WINDOW_SECONDS", "600"))
+CHUNK_OVERLAP_SECONDS = float(os.getenv("TRANSCRIPT_CHUNK_OVERLAP_SECONDS", "60"))
+CHUNK_CONCURRENCY = int(os.getenv("TRANSCRIPT_CHUNK_CONCURRENCY", "4"))
 
 class GeminiService:
-    def __init__(self, project_id: str = None, location: str = "us-central1"):
-        self.use_api_key = False
-        
-        # Check for API Key first (Local Development Mode)
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-             # Try alternate env var just in case
-             api_key = os.getenv("gemini_api_key")
-
-        if api_key:
-            print("Using Gemini API Key Authentication (Local Mode)")
-            genai.configure(api_key=api_key)
-            # Use the model confirmed to work: gemini-2.0-flash
-            self.model = genai.GenerativeModel('gemini-2.0-flash')
-            self.use_api_key = True
-        elif project_id:
-            # Fallback to Vertex AI (Production/Cloud Run Mode)
-            print(f"Using Vertex AI Authentication (Project: {project_id})")
-            vertexai.init(project=project_id, location=location)
-            self.model = GenerativeModel("gemini-1.5-flash")
-        else:
-             print("Warning: No Gemini Auth configured.")
-
-    def analyze_video(self, video_path: str, metadata: dict = None) -> dict:
+    def __init__(self, project_id: str = None, location: str = "us-central1", backend=None):
+        # genai with an API key (local development), Vertex AI with a project (Cloud Run),
+        # or the local fake (MODEL_BACKEND=fake); see services/model_backends.py
+        self.backend = backend or make_backend(project_id, location)
+        self.model_name = self.backend.model_name if self.backend is not None else None
+        # Rate limits, retries and the circuit breaker shared by every model call
+        self.gateway = get_model_gateway()
+
+    def analyze_video(self, video_path: str, metadata: dict = None, cancel=None) -> dict:
         """
         Analyzes a video.
         If API Key is used, 'video_path' must be a local file path.
@@ -153,55 +152,18 @@ class GeminiService:
         if metadata and metadata.get("description"):
             prompt += f"\n\n**Additional Context (Video Description)**:\n{metadata['description']}\n\n*Use the above description to help identify the true name of the speaker if possible.*"
 
-        if self.use_api_key:
-            # --- API Key Mode (Local File) ---
-            print(f"Uploading file {video_path} to Gemini...")
-            
-            if not os.path.exists(video_path):
-                raise ValueError(f"Local video file not found: {video_path}")
-
-            import mimetypes
-            mime_type, _ = mimetypes.guess_type(video_path)
-            if not mime_type:
-                mime_type = "video/mp4" # Safe fallback
-
-            video_file = genai.upload_file(path=video_path, mime_type=mime_type)
-            
-            # Wait for processing
-            print(f"Waiting for video processing: {video_file.name}")
-            while video_file.state.name == "PROCESSING":
-                print(".", end='', flush=True)
-                time.sleep(2)
-                video_file = genai.get_file(video_file.name)
-            print("Done.")
-            
-            if video_file.state.name == "FAILED":
-                raise ValueError("Gemini file processing failed.")
-
+        # A local file (uploaded with the API key) or a gs:// URI on Vertex
+        with self.backend.media_part(video_path, self._guess_mime(video_path, "video/mp4"), kind="video", cancel=cancel) as video:
             print("Generating analysis content...")
-            response = self.model.generate_content(
-                [video_file, prompt],
-                generation_config={"response_mime_type": "application/json"}
-            )
-            
-            # Cleanup remote file (best practice)
-            # genai.delete_file(video_file.name) 
-            
-            return self._parse_response(response.text)
+            response = self._generate("full", [video, prompt])
+        return self._parse_response(response.text)
 
-        else:
-            # --- Vertex AI Mode (GCS URI) ---
-            video = Part.from_uri(mime_type="video/mp4", uri=video_path)
-            
-            responses = self.model.generate_content(
-                [video, prompt],
-                generation_config={"response_mime_type": "application/json"}
-            )
-            return self._parse_response(responses.text)
-    def analyze_audio_multimodal(self, audio_path: str) -> dict:
+    def analyze_audio_multimodal(self, audio_path: str, cancel=None, keyframes: list = None, on_section=None) -> dict:
         """
         Analyzes an audio file directly using Gemini's multimodal capabilities.
         This provides deeper analysis of tone, pacing, and confidence than transcript-only analysis.
+        Optional keyframes ([(seconds, jpeg_path)]) add visual cues without a full video download.
+        on_section(key, value) receives dashboard sections while the response streams in.
         """
         prompt = """
         You are an elite Executive Communication Coach for the AI era. Listen to this audio recording of an executive's speech or interview.
@@ -303,62 +265,99 @@ class GeminiService:
             "summary": "Comprehensive narrative summary based on what you heard..."
         }
         """
+        if keyframes:
+            prompt += self._keyframes_prompt(len(keyframes))
+        frame_parts = self._keyframe_parts(keyframes or [])
+
+        audio_mime = self._guess_mime(audio_path, "audio/mpeg")
+        with self.backend.media_part(audio_path, audio_mime, kind="audio", deadline=AUDIO_WAIT_DEADLINE_SECONDS, cancel=cancel) as audio:
+            text = self._generate_text([audio, *frame_parts, prompt], on_section)
+        return self._parse_response(text)
+
+    def _keyframes_prompt(self, count: int) -> str:
+        return f"""
+        **Visual Cues**: You are also given {count} still frames sampled evenly across the recording, each labelled with its timestamp.
+        Use them for the visual side of executive presence (facial expression, eye contact, posture, gestures, setting)
+        and reflect it in the scores, emotion_radar, timeline insights and summary. Add
+        "visual_analysis": {{"facial_expression": "...", "eye_contact": "...", "posture": "...", "observation": "..."}}
+        to "detailed_analysis". Stills are sparse, so do not infer motion or timing from them.
+        """
 
-        if self.use_api_key:
-            # --- API Key Mode (Local File) ---
-            print(f"Uploading audio {audio_path} to Gemini...")
-            if not os.path.exists(audio_path):
-                raise ValueError(f"Local audio file not found: {audio_path}")
-
-            import mimetypes
-            mime_type, _ = mimetypes.guess_type(audio_path)
-            if not mime_type:
-                mime_type = "audio/mp3" # Safe fallback
-
-            audio_file = genai.upload_file(path=audio_path, mime_type=mime_type)
-            
-            # Wait for processing
-            print(f"Waiting for audio processing: {audio_file.name}")
-            start_time = time.time()
-            while audio_file.state.name == "PROCESSING":
-                print(".", end='', flush=True)
-                time.sleep(2)
-                audio_file = genai.get_file(audio_file.name)
-                if time.time() - start_time > 120: # 2 min timeout
-                    raise TimeoutError("Gemini audio processing timed out.")
-            print("Done.")
-            
-            if audio_file.state.name == "FAILED":
-                raise ValueError("Gemini audio processing failed.")
-
-            response = self.model.generate_content(
-                [audio_file, prompt],
-                generation_config={"response_mime_type": "application/json"}
-            )
-            return self._parse_response(response.text)
+    def _keyframe_parts(self, keyframes: list) -> list:
+        parts = []
+        for seconds, path in keyframes:
+            with open(path, "rb") as f:
+                data = f.read()
+            parts.append(f"Frame at {self._format_timestamp(seconds)}:")
+            parts.append(self.backend.inline_part(data, "image/jpeg"))
+        return parts
 
-        else:
-            # --- Vertex AI Mode (GCS URI) ---
-            # Assumption: audio_path is a GCS URI like gs://...
-            if not audio_path.startswith("gs://"):
-                # If it's a local file in prod, we need to upload to GCS first
-                # But for now, let's assume the caller handles GCS upload if using Vertex
-                audio = Part.from_data(data=open(audio_path, 'rb').read(), mime_type="audio/mpeg")
-            else:
-                audio = Part.from_uri(mime_type="audio/mpeg", uri=audio_path)
-            
-            response = self.model.generate_content(
-                [audio, prompt],
-                generation_config={"response_mime_type": "application/json"}
-            )
-            return self._parse_response(response.text)
+    def analyze_frames(self, frames: list) -> dict:
+        """
+        Visual analysis of de-duplicated frames ([(seconds, jpeg_path)]) in one batched multi-image request.
+        Returns {"frames": [...per-frame reads...], "visual_analysis": {...}, "visual_scores": {...}}.
+        """
+        prompt = f"""
+        You are an elite Executive Communication Coach. You are given {len(frames)} still frames from a video of an executive,
+        each labelled with its timestamp. Near-duplicate frames have been removed, so each frame marks a visual change.
+        Focus on the primary speaker (the interviewee, not the host).
+
+        Return a strict JSON object with this EXACT structure:
+        {{
+            "frames": [
+                {{
+                    "timestamp": "MM:SS (copy the frame label)",
+                    "emotion_label": "Confident",
+                    "confidence_score": 85,
+                    "eye_contact": "Direct | Intermittent | Averted | Not visible",
+                    "posture": "Open | Closed | Leaning in | Not visible",
+                    "observation": "One short visual observation."
+                }}
+            ],
+            "visual_analysis": {{
+                "facial_expression": "Summary of facial expressions across the frames",
+                "eye_contact": "Summary of eye contact",
+                "posture": "Summary of posture and gestures",
+                "setting": "Lighting, framing and background",
+                "observation": "Overall visual presence in 2-3 sentences."
+            }},
+            "visual_scores": {{"confidence": 80, "composure": 80, "authority": 80}}
+        }}
 
-    def analyze_full_transcript(self, transcript_text: str, metadata: dict) -> dict:
+        Include one entry in "frames" per frame, in order.
         """
-        Analyzes a full video transcript as an alternative to analyzing the raw video file.
-        This bypasses the need to download the video, avoiding YouTube bot blocking.
+        response = self._generate("full", [*self._keyframe_parts(frames), prompt])
+        return self._parse_response(response.text)
+
+    def merge_visual_analysis(self, dashboard: dict, visual: dict, max_distance: float = 30.0) -> dict:
         """
-        prompt = """
+        Maps per-frame visual reads onto the dashboard: each timeline_analysis event gets the nearest
+        frame (within max_distance seconds) as "visual", and the summary goes into detailed_analysis.
+        """
+        frames = []
+        for frame in visual.get("frames") or []:
+            seconds = self._parse_timestamp(frame.get("timestamp"))
+            if seconds is not None:
+                frames.append((seconds, frame))
+        frames.sort(key=lambda item: item[0])
+
+        for event in dashboard.get("timeline_analysis") or []:
+            seconds = self._parse_timestamp(event.get("timestamp"))
+            if seconds is None or not frames:
+                continue
+            nearest_seconds, nearest = min(frames, key=lambda item: abs(item[0] - seconds))
+            if abs(nearest_seconds - seconds) <= max_distance:
+                event["visual"] = nearest
+
+        if visual.get("visual_analysis"):
+            dashboard.setdefault("detailed_analysis", {})["visual_analysis"] = visual["visual_analysis"]
+        if visual.get("visual_scores"):
+            dashboard["visual_scores"] = visual["visual_scores"]
+        return dashboard
+
+    def _transcript_dashboard_prompt(self) -> str:
+        """Dashboard instructions and JSON structure shared by the single-pass and chunked transcript analyses."""
+        return """
         You are an elite Executive Communication Coach for the AI era. You are analyzing a transcript of an executive's speech or presentation to generate a comprehensive "Executive Dashboard" report.
         Even though you cannot see the video, evaluate their communication style based on the spoken text, structure, pacing (implied by content), and implicit tone.
 
@@ -461,7 +460,19 @@ class GeminiService:
             ],
             "summary": "WRITE A HIGHLY INSIGHTFUL, ELITE EXECUTIVE COACH'S NOTE HERE. Do not write a plain summary. Write 2-3 hard-hitting paragraphs analyzing their psychological presence, tactical communication strengths, and precise areas where they are leaking authority or engagement. Use professional consulting/executive coaching terminology (e.g., 'cognitive load', 'executive presence', 'strategic pausing'). Make the user feel they are receiving a $10,000/hour consultation."
         }
-        
+        """
+
+    def analyze_full_transcript(self, transcript_text: str, metadata: dict, segments: list = None, on_section=None) -> dict:
+        """
+        Analyzes a full video transcript as an alternative to analyzing the raw video file.
+        This bypasses the need to download the video, avoiding YouTube bot blocking.
+        Long transcripts with timed segments go through the chunked map-reduce path instead.
+        on_section(key, value) receives dashboard sections as soon as they are available.
+        """
+        if segments and self._needs_chunking(segments, transcript_text):
+            return self._analyze_transcript_chunked(transcript_text, segments, metadata, on_section)
+
+        prompt = self._transcript_dashboard_prompt() + """
         Analyze the following transcript:
         """ + transcript_text
 
@@ -469,25 +480,209 @@ class GeminiService:
             prompt += f"\n\n**Additional Context (Video Description)**:\n{metadata['description']}\n\n*Use the above description to help identify the true name of the speaker if possible.*"
 
         try:
-            if self.use_api_key:
-                response = self.model.generate_content(
-                    prompt,
-                    generation_config={"response_mime_type": "application/json"}
-                )
-            else:
-                response = self.model.generate_content(
-                    prompt,
-                    generation_config={"response_mime_type": "application/json"}
-                )
-            return self._parse_response(response.text)
+            return self._parse_response(self._generate_text(prompt, on_section))
         except Exception as e:
             print(f"Transcript full analysis failed: {e}")
             raise e
 
-    def analyze_snapshot(self, image_data: bytes, mime_type: str = "image/jpeg") -> dict:
+    def _needs_chunking(self, segments: list, transcript_text: str) -> bool:
+        duration = segments[-1]["end"] - segments[0]["start"] if segments else 0
+        return duration > CHUNK_THRESHOLD_SECONDS or len(transcript_text) > CHUNK_THRESHOLD_CHARS
+
+    def _chunk_segments(self, segments: list) -> list:
         """
-        Analyzes a single image snapshot.
+        Splits timed segments into overlapping windows of CHUNK_WINDOW_SECONDS.
+        Each chunk "owns" the middle of its window (the overlap is split between
+        neighbours), which is used to de-duplicate timeline events when merging.
         """
+        chunks = []
+        start = segments[0]["start"]
+        last_end = segments[-1]["end"]
+        step = max(CHUNK_WINDOW_SECONDS - CHUNK_OVERLAP_SECONDS, 1)
+        while True:
+            end = start + CHUNK_WINDOW_SECONDS
+            window = [seg for seg in segments if seg["end"] > start and seg["start"] < end]
+            if window:
+                chunks.append({
+                    "index": len(chunks),
+                    "start": start,
+                    "end": min(end, last_end),
+                    "text": "\n".join(f"[{self._format_timestamp(seg['start'])}] {seg['text']}" for seg in window),
+                })
+            if end >= last_end:
+                break
+            start += step
+
+        half = CHUNK_OVERLAP_SECONDS / 2
+        for i, chunk in enumerate(chunks):
+            chunk["owns_from"] = chunk["start"] + half if i > 0 else float("-inf")
+            chunk["owns_to"] = chunk["end"] - half if i < len(chunks) - 1 else float("inf")
+        return chunks
+
+    def _analyze_chunk(self, chunk: dict, total: int) -> dict:
+        prompt = f"""
+        You are an elite Executive Communication Coach. You are analyzing PART {chunk['index'] + 1} of {total} of a long transcript
+        ({self._format_timestamp(chunk['start'])} to {self._format_timestamp(chunk['end'])}). Each line starts with its [MM:SS] timestamp in the full recording.
+
+        Return a strict JSON object with this EXACT structure:
+        {{
+            "timeline_analysis": [
+                {{
+                    "timestamp": "MM:SS (absolute, taken from the transcript lines)",
+                    "event": "Short event name",
+                    "sentiment": "positive | neutral | negative",
+                    "emotion_label": "Confident",
+                    "confidence_score": 85,
+                    "engagement_score": 80,
+                    "insight": "One-sentence coaching insight."
+                }}
+            ],
+            "emotion_radar": {{"confidence": 80, "empathy": 70, "authority": 80, "composure": 80, "enthusiasm": 70, "trust": 80}},
+            "high_level_metrics": {{
+                "confidence": {{"score": 80, "label": "Confidence"}},
+                "trustworthiness": {{"score": 80, "label": "Trustworthiness"}},
+                "engagement": {{"score": 80, "label": "Engagement"}},
+                "clarity": {{"score": 80, "label": "Clarity"}}
+            }},
+            "observations": ["2-4 concise observations about this part: strengths, weaknesses, notable moments"],
+            "speaker_name": "Name of the main speaker if stated, else Unknown"
+        }}
+
+        Provide 2-5 timeline events for this part.
+
+        Transcript part:
+        {chunk['text']}
+        """
+        response = self._generate("full", prompt)
+        result = self._parse_response(response.text)
+        if "error" in result:
+            raise ValueError(f"Chunk {chunk['index']} returned invalid JSON: {result['error']}")
+        return result
+
+    def _analyze_transcript_chunked(self, transcript_text: str, segments: list, metadata: dict, on_section=None) -> dict:
+        """
+        Map-reduce analysis for long transcripts: overlapping windows are analysed in parallel
+        (at most CHUNK_CONCURRENCY at a time), each result is checkpointed, and a final reduce
+        call turns the merged chunk results into the full dashboard.
+        """
+        chunks = self._chunk_segments(segments)
+        run_key = hashlib.sha256("|".join([
+            transcript_text, PROMPT_VERSION, str(self.model_name), str(CHUNK_WINDOW_SECONDS), str(CHUNK_OVERLAP_SECONDS)
+        ]).encode("utf-8")).hexdigest()
+
+        checkpoints = get_checkpoint_store()
+        results = checkpoints.load(run_key)
+        todo = [chunk for chunk in chunks if chunk["index"] not in results]
+        print(f"Chunked transcript analysis: {len(chunks)} chunks, {len(results)} restored from checkpoint")
+
+        errors = []
+        if todo:
+            with ThreadPoolExecutor(max_workers=CHUNK_CONCURRENCY, thread_name_prefix="chunk") as pool:
+                futures = {pool.submit(self._analyze_chunk, chunk, len(chunks)): chunk for chunk in todo}
+                for fut in as_completed(futures):
+                    chunk = futures[fut]
+                    try:
+                        results[chunk["index"]] = fut.result()
+                        checkpoints.save(run_key, chunk["index"], results[chunk["index"]])
+                    except Exception as e:
+                        print(f"Chunk {chunk['index']} failed: {e}")
+                        errors.append(e)
+        if errors:
+            raise ValueError(f"{len(errors)} of {len(chunks)} transcript chunks failed (completed chunks are checkpointed): {errors[0]}")
+
+        merged = self._merge_chunk_results(chunks, results)
+        if on_section is not None:
+            # The evidence-based sections are final before the reduce call starts
+            for key in ("timeline_analysis", "emotion_radar", "high_level_metrics"):
+                on_section(key, merged[key])
+        dashboard = self._reduce_chunks(merged, metadata)
+
+        # The merged, evidence-based sections win over whatever the reduce call restated
+        dashboard["timeline_analysis"] = merged["timeline_analysis"]
+        dashboard["emotion_radar"] = merged["emotion_radar"]
+        dashboard["high_level_metrics"] = merged["high_level_metrics"]
+        checkpoints.clear(run_key)
+        # Runs that never finished leave their chunks behind until they expire
+        checkpoints.purge_expired()
+        return dashboard
+
+    def _merge_chunk_results(self, chunks: list, results: dict) -> dict:
+        timeline, observations, names = [], [], []
+        # Scores are averaged over the chunks that reported them, weighted by chunk length
+        radar_totals, radar_weights, metric_totals = {}, {}, {}
+
+        for chunk in chunks:
+            result = results[chunk["index"]]
+            weight = max(chunk["end"] - chunk["start"], 1.0)
+
+            for event in result.get("timeline_analysis") or []:
+                seconds = self._parse_timestamp(event.get("timestamp"))
+                if seconds is None or chunk["owns_from"] <= seconds < chunk["owns_to"]:
+                    timeline.append((seconds if seconds is not None else chunk["start"], event))
+
+            for key, value in (result.get("emotion_radar") or {}).items():
+                if isinstance(value, (int, float)):
+                    radar_totals[key] = radar_totals.get(key, 0.0) + value * weight
+                    radar_weights[key] = radar_weights.get(key, 0.0) + weight
+
+            for key, metric in (result.get("high_level_metrics") or {}).items():
+                if isinstance(metric, dict) and isinstance(metric.get("score"), (int, float)):
+                    entry = metric_totals.setdefault(key, {"score": 0.0, "weight": 0.0, "label": metric.get("label", key.title())})
+                    entry["score"] += metric["score"] * weight
+                    entry["weight"] += weight
+
+            observations.extend(
+                f"[{self._format_timestamp(chunk['start'])}-{self._format_timestamp(chunk['end'])}] {obs}"
+                for obs in result.get("observations") or []
+            )
+            if result.get("speaker_name") and result["speaker_name"] != "Unknown":
+                names.append(result["speaker_name"])
+
+        timeline.sort(key=lambda item: item[0])
+        return {
+            "timeline_analysis": [event for _, event in timeline],
+            "emotion_radar": {k: round(v / radar_weights[k]) for k, v in radar_totals.items()},
+            "high_level_metrics": {
+                k: {"score": round(v["score"] / v["weight"]), "label": v["label"]} for k, v in metric_totals.items()
+            },
+            "observations": observations,
+            "speaker_name": max(set(names), key=names.count) if names else "Unknown",
+        }
+
+    def _reduce_chunks(self, merged: dict, metadata: dict) -> dict:
+        prompt = self._transcript_dashboard_prompt() + """
+        This recording was too long to analyze in one pass. Instead of the raw transcript, you are given
+        the merged results of a section-by-section analysis. Fill in every field of the structure above from them;
+        keep "timeline_analysis", "emotion_radar" and "high_level_metrics" consistent with these inputs.
+
+        Section analysis:
+        """ + json.dumps(merged, ensure_ascii=False)
+
+        if metadata and metadata.get("description"):
+            prompt += f"\n\n**Additional Context (Video Description)**:\n{metadata['description']}\n\n*Use the above description to help identify the true name of the speaker if possible.*"
+
+        response = self._generate("full", prompt)
+        dashboard = self._parse_response(response.text)
+        if "error" in dashboard:
+            raise ValueError(f"Reduce step returned invalid JSON: {dashboard['error']}")
+        return dashboard
+
+    def _format_timestamp(self, seconds: float) -> str:
+        seconds = int(seconds)
+        if seconds >= 3600:
+            return f"{seconds // 3600}:{(seconds % 3600) // 60:02d}:{seconds % 60:02d}"
+        return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+    def _parse_timestamp(self, value) -> float:
+        try:
+            seconds = 0.0
+            for part in str(value).strip().split(":"):
+                seconds = seconds * 60 + float(part)
+            return seconds
+        except (TypeError, ValueError):
+            return None
+
+    def _snapshot_contents(self, image_data: bytes, mime_type: str) -> list:
         prompt = """
         Analyze this video snapshot to evaluate the Executive Presence of the main spokesperson.
 
@@ -508,40 +703,101 @@ class GeminiService:
             "key_observation": "Brief observation on why they look authoritative (or not)."
         }
         """
-        
+        return [self.backend.inline_part(image_data, mime_type), prompt]
+
+    def analyze_snapshot(self, image_data: bytes, mime_type: str = "image/jpeg") -> dict:
+        """
+        Analyzes a single image snapshot.
+        """
         try:
-            if self.use_api_key:
-                # --- API Key Mode ---
-                # genai supports PIL Image or bytes? 
-                # For safety, let's wrap contents in a list
-                # We need to construct a 'blob' for genai if passing raw bytes is tricky, 
-                # but usually it accepts a dict {'mime_type': ..., 'data': ...}
-                image_blob = {'mime_type': mime_type, 'data': image_data}
-                
-                response = self.model.generate_content(
-                    [prompt, image_blob],
-                    generation_config={"response_mime_type": "application/json"}
-                )
-                return self._parse_response(response.text)
-                
-            else:
-                # --- Vertex AI Mode ---
-                image_part = Part.from_data(data=image_data, mime_type=mime_type)
-                
-                response = self.model.generate_content(
-                    [image_part, prompt],
-                    generation_config={"response_mime_type": "application/json"}
-                )
-                return self._parse_response(response.text)
-                
+            response = self._generate("snapshot", self._snapshot_contents(image_data, mime_type))
+            return self._parse_response(response.text)
         except Exception as e:
             print(f"Snapshot analysis failed: {e}")
             return {"error": str(e), "score": 0, "feedback": "Analysis failed."}
 
-    def analyze_audio(self, audio_data: bytes, mime_type: str = "audio/webm") -> dict:
+    async def analyze_snapshot_async(self, image_data: bytes, mime_type: str = "image/jpeg") -> dict:
+        try:
+            response = await self._generate_async("snapshot", self._snapshot_contents(image_data, mime_type))
+            return self._parse_response(response.text)
+        except Exception as e:
+            print(f"Snapshot analysis failed: {e}")
+            return {"error": str(e), "score": 0, "feedback": "Analysis failed."}
+
+    def _snapshot_batch_contents(self, frames) -> list:
+        """frames: [(image_bytes, mime_type, timestamp)]. Each image is preceded by its index label."""
+        prompt = f"""
+        You are given {len(frames)} snapshots from the same video, each labelled "Frame <index> at <MM:SS>".
+        Evaluate the Executive Presence of the main spokesperson in EACH frame independently.
+
+        **Target Identification Rules**:
+        1. Identify the primary speaker who is being interviewed (the guest/executive).
+        2. **Prioritize the person associated with "Equinix"** if visible in text overlays (lower thirds) or background logos.
+        3. Ignore the interviewer/host (usually the one asking questions or positioned as the anchor).
+        4. If unsure, focus on the person acting as the domain expert or answering questions.
+
+        **Analysis**:
+        Evaluate their facial expression, eye contact, hand gestures, and posture.
+
+        Return a JSON object with exactly one entry per frame, in frame order:
+        {{
+            "frames": [
+                {{
+                    "index": (frame index as labelled),
+                    "score": (0-100 integer reflecting confidence and authority),
+                    "feedback": "Concise feedback focusing on the spokesperson's delivery (max 20 words).",
+                    "emotion": "Current detected emotion (e.g., Confident, Thoughtful, Defensive)",
+                    "key_observation": "Brief observation on why they look authoritative (or not)."
+                }}
+            ]
+        }}
         """
-        Analyzes a short audio chunk.
+        contents = []
+        for i, (image_data, mime_type, timestamp) in enumerate(frames):
+            contents.append(f"Frame {i} at {self._format_timestamp(timestamp or 0)}:")
+            contents.append(self.backend.inline_part(image_data, mime_type))
+        contents.append(prompt)
+        return contents
+
+    def _split_snapshot_batch(self, frames, result: dict) -> list:
+        """Maps the model's per-frame entries back onto the input order; frames it skipped get an error entry."""
+        entries = result.get("frames") if isinstance(result, dict) else result
+        by_index = {}
+        for position, entry in enumerate(entries or []):
+            if not isinstance(entry, dict):
+                continue
+            try:
+                index = int(entry.pop("index", position))
+            except (TypeError, ValueError):
+                index = position
+            by_index.setdefault(index, entry)
+        results = []
+        for i, (_, _, timestamp) in enumerate(frames):
+            entry = by_index.get(i) or {"error": "No result for frame", "score": 0, "feedback": "Analysis failed."}
+            results.append({"timestamp": timestamp, **entry})
+        return results
+
+    def analyze_snapshot_batch(self, frames) -> list:
         """
+        Scores several snapshots in one model call.
+        frames: [(image_bytes, mime_type, timestamp)]; returns one result dict per frame, in order.
+        """
+        try:
+            response = self._generate("snapshot", self._snapshot_batch_contents(frames))
+            return self._split_snapshot_batch(frames, self._parse_response(response.text))
+        except Exception as e:
+            print(f"Snapshot batch analysis failed: {e}")
+            return [{"timestamp": ts, "error": str(e), "score": 0, "feedback": "Analysis failed."} for _, _, ts in frames]
+
+    async def analyze_snapshot_batch_async(self, frames) -> list:
+        try:
+            response = await self._generate_async("snapshot", self._snapshot_batch_contents(frames))
+            return self._split_snapshot_batch(frames, self._parse_response(response.text))
+        except Exception as e:
+            print(f"Snapshot batch analysis failed: {e}")
+            return [{"timestamp": ts, "error": str(e), "score": 0, "feedback": "Analysis failed."} for _, _, ts in frames]
+
+    def _audio_contents(self, audio_data: bytes, mime_type: str) -> list:
         prompt = """
         Listen to this audio clip of an executive speaker.
         Evaluate their vocal delivery based on:
@@ -556,32 +812,29 @@ class GeminiService:
             "metric": "Key strength or weakness observed (e.g., 'Monotone', 'Dynamic', 'Too Fast')"
         }
         """
-        
+        return [self.backend.inline_part(audio_data, mime_type), prompt]
+
+    def analyze_audio(self, audio_data: bytes, mime_type: str = "audio/webm") -> dict:
+        """
+        Analyzes a short audio chunk.
+        """
         try:
-            if self.use_api_key:
-                audio_blob = {'mime_type': mime_type, 'data': audio_data}
-                response = self.model.generate_content(
-                    [prompt, audio_blob],
-                    generation_config={"response_mime_type": "application/json"}
-                )
-                return self._parse_response(response.text)
-            else:
-                audio_part = Part.from_data(data=audio_data, mime_type=mime_type)
-                response = self.model.generate_content(
-                    [audio_part, prompt],
-                    generation_config={"response_mime_type": "application/json"}
-                )
-                return self._parse_response(response.text)
-                
+            response = self._generate("live", self._audio_contents(audio_data, mime_type))
+            return self._parse_response(response.text)
         except Exception as e:
             print(f"Audio analysis failed: {e}")
             return {"error": str(e), "score": 0, "feedback": "Audio analysis failed."}
 
-    def analyze_transcript(self, text: str) -> dict:
-        """
-        Analyzes a short transcript text.
-        """
-        prompt = f"""
+    async def analyze_audio_async(self, audio_data: bytes, mime_type: str = "audio/webm") -> dict:
+        try:
+            response = await self._generate_async("live", self._audio_contents(audio_data, mime_type))
+            return self._parse_response(response.text)
+        except Exception as e:
+            print(f"Audio analysis failed: {e}")
+            return {"error": str(e), "score": 0, "feedback": "Audio analysis failed."}
+
+    def _transcript_prompt(self, text: str) -> str:
+        return f"""
         Analyze this spoken sentence by an executive (in any language):
         "{text}"
         
@@ -597,27 +850,122 @@ class GeminiService:
             "feedback": "Brief feedback in English (max 10 words)."
         }}
         """
-        
+
+    def analyze_transcript(self, text: str) -> dict:
+        """
+        Analyzes a short transcript text.
+        """
         try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config={"response_mime_type": "application/json"}
-            )
+            response = self._generate("live", self._transcript_prompt(text))
             return self._parse_response(response.text)
         except Exception as e:
             print(f"Transcript analysis failed: {e}")
             return {"error": str(e), "score": 0, "feedback": "Analysis failed."}
 
-    def _parse_response(self, text: str) -> dict:
+    async def analyze_transcript_async(self, text: str) -> dict:
         try:
-            clean_text = text.strip()
-            if clean_text.startswith("```json"):
-                clean_text = clean_text[7:]
-            if clean_text.startswith("```"):
-                clean_text = clean_text[3:]
-            if clean_text.endswith("```"):
-                clean_text = clean_text[:-3]
-            return json.loads(clean_text.strip())
+            response = await self._generate_async("live", self._transcript_prompt(text))
+            return self._parse_response(response.text)
         except Exception as e:
-            print(f"Error parsing response: {e}")
-            return {"error": str(e), "raw": text}
+            print(f"Transcript analysis failed: {e}")
+            return {"error": str(e), "score": 0, "feedback": "Analysis failed."}
+
+    def _generate(self, lane: str, contents):
+        """Blocking JSON generation through the model gateway (lane: "full", "snapshot" or "live")."""
+        return self.gateway.call(
+            lane, self._call_backend, lane, contents,
+            generation_config={"response_mime_type": "application/json"}
+        )
+
+    def _call_backend(self, lane: str, contents, **kwargs):
+        # One span per attempt; the gateway's queueing and retry delays stay outside it
+        with span("gemini.generate", lane=lane) as s:
+            response = self.backend.generate_content(contents, **kwargs)
+            self._record_usage(s, response)
+            return response
+
+    async def _call_backend_async(self, lane: str, contents, **kwargs):
+        with span("gemini.generate", lane=lane) as s:
+            response = await self.backend.generate_content_async(contents, **kwargs)
+            self._record_usage(s, response)
+            return response
+
+    @staticmethod
+    def _record_usage(s, response, text: str = None):
+        """Adds the response size and the token counts the API reports (usage_metadata) to span `s`."""
+        if text is None:
+            try:
+                text = response.text
+            except ValueError:
+                # Blocked / empty candidates have no text
+                text = ""
+        usage = getattr(response, "usage_metadata", None)
+        s.add(
+            bytes=len(text.encode("utf-8")),
+            prompt_tokens=getattr(usage, "prompt_token_count", 0),
+            output_tokens=getattr(usage, "candidates_token_count", 0),
+        )
+
+    def _generate_text(self, contents, on_section=None) -> str:
+        """
+        Blocking JSON generation for full analyses. With on_section the response is streamed, and each
+        top-level key is passed to on_section(key, value) as soon as its value is complete.
+        """
+        if on_section is None:
+            return self._generate("full", contents).text
+        return self.gateway.call("full", self._stream_text, contents, on_section)
+
+    def _stream_text(self, contents, on_section) -> str:
+        # A retried stream starts over; sections sent again simply replace the earlier ones
+        parser = ObjectMemberStream()
+        parts = []
+        generation_config = {"response_mime_type": "application/json"}
+        with span("gemini.generate", lane="full") as s:
+            chunk = None
+            for chunk in self.backend.generate_content(contents, generation_config=generation_config, stream=True):
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunks without text parts (finish reason / safety metadata only)
+                    continue
+                parts.append(text)
+                for key, value in parser.feed(text):
+                    try:
+                        on_section(key, value)
+                    except Exception as e:
+                        print(f"Section callback failed for {key}: {e}")
+            # The last chunk carries the usage totals for the whole response
+            self._record_usage(s, chunk, "".join(parts))
+        return "".join(parts)
+
+    async def _generate_async(self, lane: str, contents):
+        """
+        Uses the backend's async client (both genai and Vertex have one; otherwise the blocking
+        call runs on the bounded gemini pool), through the model gateway's lane limits.
+        """
+        return await self.gateway.call_async(
+            lane, self._call_backend_async, lane, contents,
+            generation_config={"response_mime_type": "application/json"}
+        )
+
+    @staticmethod
+    def _guess_mime(path: str, fallback: str) -> str:
+        mime_type, _ = mimetypes.guess_type(path)
+        return mime_type or fallback
+
+    def _parse_response(self, text: str) -> dict:
+        with span("gemini.parse") as s:
+            try:
+                s.add(bytes=len(text.encode("utf-8")))
+                clean_text = text.strip()
+                if clean_text.startswith("```json"):
+                    clean_text = clean_text[7:]
+                if clean_text.startswith("```"):
+                    clean_text = clean_text[3:]
+                if clean_text.endswith("```"):
+                    clean_text = clean_text[:-3]
+                return json.loads(clean_text.strip())
+            except Exception as e:
+                print(f"Error parsing response: {e}")
+                s.outcome = "error"
+                return {"error": str(e), "raw": text}
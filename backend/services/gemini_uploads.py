@@ -0,0 +1,242 @@
+import os
+import time
+import hashlib
+import threading
+from services.storage import SQLiteStore, data_path
+from services.file_waiter import wait_for_file, FileWaitCancelled, WAIT_DEADLINE_SECONDS
+from services.tracing import span
+
+# Gemini keeps uploaded files for 48h; stop handing them out a little before that
+UPLOAD_TTL_SECONDS = float(os.getenv("GEMINI_UPLOAD_TTL_SECONDS", str(46 * 3600)))
+# Unused uploads are deleted after this long, so re-analyses shortly after still hit
+UPLOAD_IDLE_SECONDS = float(os.getenv("GEMINI_UPLOAD_IDLE_SECONDS", str(6 * 3600)))
+# How long an acquired upload is protected from the sweeper (covers a crashed worker that never releases)
+UPLOAD_LEASE_SECONDS = float(os.getenv("GEMINI_UPLOAD_LEASE_SECONDS", "3600"))
+UPLOAD_SWEEP_INTERVAL = float(os.getenv("GEMINI_UPLOAD_SWEEP_INTERVAL", "600"))
+
+
+def file_sha256(path: str, block_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class GeminiUploads(SQLiteStore):
+    """
+    Remote Gemini file handles keyed by content hash, shared by every process on the host.
+    acquire() reuses a live upload of the same bytes instead of uploading again; release() marks it idle,
+    and a background sweeper deletes uploads that are expired or have been idle for UPLOAD_IDLE_SECONDS.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS gemini_uploads (
+        content_hash TEXT PRIMARY KEY,
+        file_name TEXT NOT NULL,
+        mime_type TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        expires_at REAL NOT NULL,
+        last_used REAL NOT NULL,
+        leased_until REAL NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS gemini_upload_stats (
+        name TEXT PRIMARY KEY,
+        value REAL NOT NULL DEFAULT 0
+    );
+    """
+
+    def __init__(self, path: str = None, upload_file=None, get_file=None, delete_file=None,
+                 ttl_seconds: float = UPLOAD_TTL_SECONDS, idle_seconds: float = UPLOAD_IDLE_SECONDS,
+                 lease_seconds: float = UPLOAD_LEASE_SECONDS):
+        self.upload_file = upload_file
+        self.get_file = get_file
+        self.delete_file = delete_file
+        self.ttl_seconds = ttl_seconds
+        self.idle_seconds = idle_seconds
+        self.lease_seconds = lease_seconds
+        self._hash_locks = {}
+        self._hash_locks_lock = threading.Lock()
+        self._one_shot = set()
+        self._sweeper = None
+        self._stop = threading.Event()
+        super().__init__(path or data_path("gemini_uploads.db"))
+
+    def _bump(self, **counters):
+        conn = self._conn()
+        for name, delta in counters.items():
+            conn.execute(
+                "INSERT INTO gemini_upload_stats (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, delta),
+            )
+
+    def _lock_for(self, content_hash: str) -> threading.Lock:
+        with self._hash_locks_lock:
+            return self._hash_locks.setdefault(content_hash, threading.Lock())
+
+    def _reuse(self, content_hash: str, kind: str, deadline: float, cancel):
+        """Returns a live handle for content_hash (leasing it), or None."""
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute("SELECT * FROM gemini_uploads WHERE content_hash = ?", (content_hash,)).fetchone()
+        if row is None:
+            return None
+        if row["expires_at"] < now:
+            self._forget(row["content_hash"], row["file_name"])
+            return None
+        try:
+            handle = self.get_file(row["file_name"])
+            if handle.state.name == "PROCESSING":
+                handle = wait_for_file(handle, self.get_file, kind=kind, deadline=deadline, cancel=cancel)
+            if handle.state.name != "ACTIVE":
+                raise ValueError(f"state {handle.state.name}")
+        except FileWaitCancelled:
+            raise
+        except Exception as e:
+            print(f"Cached upload {row['file_name']} unusable ({e}), uploading again")
+            self._forget(row["content_hash"], row["file_name"])
+            return None
+        conn.execute(
+            "UPDATE gemini_uploads SET last_used = ?, leased_until = ? WHERE content_hash = ?",
+            (now, now + self.lease_seconds, content_hash),
+        )
+        self._bump(reuses=1, bytes_saved=row["size"])
+        return handle
+
+    def acquire(self, path: str, mime_type: str, kind: str = "file", deadline: float = WAIT_DEADLINE_SECONDS,
+                cancel: threading.Event = None):
+        """
+        Returns an ACTIVE Gemini file handle for the local file at `path`, uploading it only if
+        no live upload of the same content exists. Call release() with the handle when done.
+        """
+        self._ensure_sweeper()
+        content_hash = file_sha256(path)
+        with self._lock_for(content_hash):
+            handle = self._reuse(content_hash, kind, deadline, cancel)
+            if handle is not None:
+                print(f"Reusing uploaded {kind} {handle.name} ({content_hash[:12]})")
+                return handle
+
+            size = os.path.getsize(path)
+            with span("gemini.upload", kind=kind) as s:
+                s.add(bytes=size)
+                handle = self.upload_file(path=path, mime_type=mime_type)
+            self._bump(uploads=1, bytes_uploaded=size)
+            try:
+                handle = wait_for_file(handle, self.get_file, kind=kind, deadline=deadline, cancel=cancel)
+            except Exception:
+                self._delete_remote(handle.name)
+                raise
+
+            now = time.time()
+            inserted = self._conn().execute(
+                "INSERT INTO gemini_uploads "
+                "(content_hash, file_name, mime_type, size, created_at, expires_at, last_used, leased_until) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(content_hash) DO NOTHING",
+                (content_hash, handle.name, mime_type, size, now, now + self.ttl_seconds, now, now + self.lease_seconds),
+            ).rowcount
+            if not inserted:
+                # Another process uploaded the same bytes meanwhile; ours is used once and then dropped
+                self._one_shot.add(handle.name)
+            return handle
+
+    def release(self, handle):
+        """Marks an acquired upload idle; the sweeper deletes it once it has been idle long enough."""
+        if handle.name in self._one_shot:
+            self._one_shot.discard(handle.name)
+            self._delete_async(handle.name)
+            return
+        self._conn().execute(
+            "UPDATE gemini_uploads SET last_used = ?, leased_until = 0 WHERE file_name = ?",
+            (time.time(), handle.name),
+        )
+
+    def _forget(self, content_hash: str, file_name: str):
+        self._conn().execute(
+            "DELETE FROM gemini_uploads WHERE content_hash = ? AND file_name = ?", (content_hash, file_name)
+        )
+        self._delete_async(file_name)
+
+    def _delete_remote(self, file_name: str) -> bool:
+        try:
+            self.delete_file(file_name)
+            self._bump(deletions=1)
+            return True
+        except Exception as e:
+            # Already gone (expired or deleted elsewhere) is fine
+            print(f"Gemini file delete warning ({file_name}): {e}")
+            return False
+
+    def _delete_async(self, file_name: str):
+        threading.Thread(target=self._delete_remote, args=(file_name,), daemon=True, name="gemini-upload-delete").start()
+
+    def sweep(self) -> int:
+        """Deletes expired uploads and unleased ones idle for longer than idle_seconds. Returns the count."""
+        conn = self._conn()
+        now = time.time()
+        rows = conn.execute(
+            "SELECT content_hash, file_name FROM gemini_uploads "
+            "WHERE expires_at < ? OR (leased_until < ? AND last_used < ?)",
+            (now, now, now - self.idle_seconds),
+        ).fetchall()
+        removed = 0
+        for row in rows:
+            # Only the process whose DELETE wins deletes the remote file
+            if conn.execute(
+                "DELETE FROM gemini_uploads WHERE content_hash = ? AND file_name = ?",
+                (row["content_hash"], row["file_name"]),
+            ).rowcount:
+                self._delete_remote(row["file_name"])
+                removed += 1
+        return removed
+
+    def _ensure_sweeper(self):
+        if self._sweeper is not None or self.delete_file is None:
+            return
+        with self._hash_locks_lock:
+            if self._sweeper is None:
+                self._sweeper = threading.Thread(target=self._sweep_loop, daemon=True, name="gemini-upload-sweeper")
+                self._sweeper.start()
+
+    def _sweep_loop(self):
+        while not self._stop.wait(UPLOAD_SWEEP_INTERVAL):
+            try:
+                removed = self.sweep()
+                if removed:
+                    print(f"Deleted {removed} idle Gemini uploads")
+            except Exception as e:
+                print(f"Gemini upload sweep error: {e}")
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        counters = {row["name"]: row["value"] for row in conn.execute("SELECT name, value FROM gemini_upload_stats")}
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM gemini_uploads").fetchone()
+        return {
+            "live_uploads": entries,
+            "live_bytes": size,
+            "uploads": int(counters.get("uploads", 0)),
+            "reuses": int(counters.get("reuses", 0)),
+            "deletions": int(counters.get("deletions", 0)),
+            "bytes_uploaded": int(counters.get("bytes_uploaded", 0)),
+            "bytes_saved": int(counters.get("bytes_saved", 0)),
+        }
+
+
+_uploads = None
+_uploads_lock = threading.Lock()
+
+
+def get_gemini_uploads() -> GeminiUploads:
+    """Process-wide upload manager bound to the google.generativeai file API."""
+    global _uploads
+    if _uploads is None:
+        with _uploads_lock:
+            if _uploads is None:
+                import google.generativeai as genai
+                _uploads = GeminiUploads(upload_file=genai.upload_file, get_file=genai.get_file, delete_file=genai.delete_file)
+    return _uploads
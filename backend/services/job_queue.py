@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import threading
+from dataclasses import dataclass
+from services.storage import SQLiteStore, data_path
+
+MAX_PENDING = int(os.getenv("JOB_QUEUE_MAX_PENDING", "100"))
+LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "600"))
+MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Finished and failed jobs are kept this long (for stats and debugging) before prune() deletes them
+RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "86400"))
+EXPIRED_ERROR = "Worker lease expired too many times"
+
+
+class QueueFull(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    id: int
+    analysis_id: str
+    kind: str
+    payload: dict
+    attempts: int
+
+
+class JobQueue:
+    """
+    Interface for the analysis job queue.
+    Jobs are keyed by analysis_id (one job per video_analyses row) and claimed
+    by workers under a lease, so a crashed worker's job goes back to 'pending'.
+    """
+
+    def enqueue(self, analysis_id: str, payload: dict, kind: str = "analysis") -> bool:
+        raise NotImplementedError
+
+    def claim(self, worker_id: str):
+        raise NotImplementedError
+
+    def heartbeat(self, job_id: int):
+        raise NotImplementedError
+
+    def complete(self, job_id: int):
+        raise NotImplementedError
+
+    def fail(self, job_id: int, error: str):
+        raise NotImplementedError
+
+    def reclaim_expired(self):
+        raise NotImplementedError
+
+    def prune(self, older_than_seconds: float = RETENTION_SECONDS) -> int:
+        raise NotImplementedError
+
+    def depth(self) -> int:
+        raise NotImplementedError
+
+    def has_capacity(self) -> bool:
+        return self.depth() < self.max_pending
+
+    def stats(self) -> dict:
+        raise NotImplementedError
+
+
+class SQLiteJobQueue(SQLiteStore, JobQueue):
+    """Default queue: a local SQLite file, no outside service needed."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        analysis_id TEXT NOT NULL UNIQUE,
+        kind TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        worker_id TEXT,
+        lease_expires REAL,
+        error TEXT,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, id);
+    """
+
+    def __init__(self, path: str = None, max_pending: int = MAX_PENDING, lease_seconds: float = LEASE_SECONDS):
+        self.max_pending = max_pending
+        self.lease_seconds = lease_seconds
+        super().__init__(path or data_path("jobs.db"))
+
+    def enqueue(self, analysis_id: str, payload: dict, kind: str = "analysis") -> bool:
+        """Returns False if a job for this analysis_id already exists. Raises QueueFull on backpressure."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            depth = conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'running')").fetchone()[0]
+            if depth >= self.max_pending:
+                raise QueueFull(f"Job queue is full ({depth} jobs pending)")
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO jobs (analysis_id, kind, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (analysis_id, kind, json.dumps(payload), now, now),
+            )
+            conn.execute("COMMIT")
+            return cur.rowcount > 0
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def claim(self, worker_id: str):
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'pending' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker_id = ?, attempts = attempts + 1, lease_expires = ?, updated_at = ? WHERE id = ?",
+                (worker_id, now + self.lease_seconds, now, row["id"]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return Job(row["id"], row["analysis_id"], row["kind"], json.loads(row["payload"]), row["attempts"] + 1)
+
+    def heartbeat(self, job_id: int):
+        now = time.time()
+        self._conn().execute(
+            "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND status = 'running'",
+            (now + self.lease_seconds, now, job_id),
+        )
+
+    def complete(self, job_id: int):
+        self._conn().execute(
+            "UPDATE jobs SET status = 'done', lease_expires = NULL, updated_at = ? WHERE id = ?",
+            (time.time(), job_id),
+        )
+
+    def fail(self, job_id: int, error: str):
+        self._conn().execute(
+            "UPDATE jobs SET status = 'failed', error = ?, lease_expires = NULL, updated_at = ? WHERE id = ?",
+            (error, time.time(), job_id),
+        )
+
+    def reclaim_expired(self):
+        """
+        Puts jobs whose worker stopped heartbeating back in the queue, or fails them after MAX_ATTEMPTS.
+        Returns (number re-queued, the Jobs that were failed) so the caller can fail what they were running for.
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            exhausted = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'running' AND lease_expires < ? AND attempts >= ?",
+                (now, MAX_ATTEMPTS),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE jobs SET status = 'failed', error = ?, lease_expires = NULL, updated_at = ? WHERE id = ?",
+                [(EXPIRED_ERROR, now, row["id"]) for row in exhausted],
+            )
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'pending', worker_id = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE status = 'running' AND lease_expires < ?",
+                (now, now),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        failed = [Job(row["id"], row["analysis_id"], row["kind"], json.loads(row["payload"]), row["attempts"]) for row in exhausted]
+        return cur.rowcount, failed
+
+    def prune(self, older_than_seconds: float = RETENTION_SECONDS) -> int:
+        cur = self._conn().execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+            (time.time() - older_than_seconds,),
+        )
+        return cur.rowcount
+
+    def depth(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'running')").fetchone()[0]
+
+    def stats(self) -> dict:
+        rows = self._conn().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        counts = {row["status"]: row["n"] for row in rows}
+        return {"max_pending": self.max_pending, **counts}
+
+
+# Pluggable backends: JOB_QUEUE_BACKEND picks one; "inline" keeps the old in-process BackgroundTasks
+QUEUE_BACKENDS = {
+    "sqlite": SQLiteJobQueue,
+}
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Returns the configured process-wide JobQueue, or None for inline mode."""
+    global _queue
+    backend = os.getenv("JOB_QUEUE_BACKEND", "sqlite").lower()
+    if backend == "inline":
+        return None
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                if backend not in QUEUE_BACKENDS:
+                    raise ValueError(f"Unknown JOB_QUEUE_BACKEND: {backend}")
+                _queue = QUEUE_BACKENDS[backend]()
+    return _queue
@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+from services.tracing import span
+
+# Non-terminal status writes wait this long, so repeated transitions collapse and concurrent jobs share one UPDATE
+JOB_STATE_FLUSH_SECONDS = float(os.getenv("JOB_STATE_FLUSH_MS", "250")) / 1000
+
+
+class JobStateWriter:
+    """
+    Coalesced, batched writes of video_analyses state for running jobs.
+    - set_status() only records the latest wanted status per job and returns immediately; a status
+      equal to the one already written (e.g. analyzing -> downloading -> analyzing) is dropped
+    - a background thread flushes every flush_seconds, grouping jobs that move to the same fields
+      into one update(...).in_("id", ids)
+    - finish() writes terminal fields synchronously, superseding anything still pending for the job
+    - stage() times pipeline stages; the timings go into the row's stage_timings column
+    on_written(analysis_id, fields) runs after every successful write.
+    """
+
+    def __init__(self, supabase, flush_seconds: float = JOB_STATE_FLUSH_SECONDS, on_written=None):
+        self.supabase = supabase
+        self.flush_seconds = flush_seconds
+        self.on_written = on_written
+        self._pending = {}
+        self._written = {}
+        self._timings = {}
+        self._lock = threading.Lock()
+        # Jobs whose deferred write is in flight; finish() waits for them so it can't be overtaken
+        self._inflight = set()
+        self._inflight_done = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._timings_column = True
+        self.counters = {"requested": 0, "collapsed": 0, "statements": 0, "rows_written": 0}
+        self._thread = threading.Thread(target=self._run, name="job-state-writer", daemon=True)
+        self._thread.start()
+
+    def set_status(self, analysis_id: str, status: str):
+        with self._lock:
+            self.counters["requested"] += 1
+            if analysis_id in self._pending:
+                # Superseded before it was written
+                self.counters["collapsed"] += 1
+                del self._pending[analysis_id]
+            if self._written.get(analysis_id) == status:
+                self.counters["collapsed"] += 1
+                return
+            self._pending[analysis_id] = {"status": status}
+
+    @contextmanager
+    def stage(self, analysis_id: str, name: str):
+        """
+        Times a pipeline stage; a stage entered twice (e.g. a second download tier) accumulates its seconds.
+        Each entry is also an "analysis.<name>" span, the parent of the service spans inside it.
+        """
+        started = time.time()
+        try:
+            with span(f"analysis.{name}"):
+                yield
+        finally:
+            seconds = time.time() - started
+            with self._lock:
+                timing = self._timings.setdefault(analysis_id, {}).setdefault(name, {"started_at": round(started, 3), "seconds": 0.0})
+                timing["seconds"] = round(timing["seconds"] + seconds, 3)
+
+    def finish(self, analysis_id: str, fields: dict):
+        """Writes terminal (or otherwise non-deferrable) fields now, with the stage timings recorded so far."""
+        with self._lock:
+            self.counters["requested"] += 1
+            self._pending.pop(analysis_id, None)
+            while analysis_id in self._inflight:
+                self._inflight_done.wait()
+            timings = self._timings.pop(analysis_id, None)
+        if timings and self._timings_column:
+            fields = {**fields, "stage_timings": timings}
+        started = time.time()
+        self._write([analysis_id], fields)
+        with self._lock:
+            # The job is over; nothing further to collapse against
+            self._written.pop(analysis_id, None)
+            if timings and self._timings_column:
+                # The save itself is recorded by a follow-up write, off the critical path
+                timings["save"] = {"started_at": round(started, 3), "seconds": round(time.time() - started, 3)}
+                self._pending.setdefault(analysis_id, {})["stage_timings"] = timings
+
+    def fan_out(self, analysis_ids: list, fields: dict):
+        """Writes the same terminal fields to several rows (e.g. single-flight followers) in one UPDATE."""
+        if not analysis_ids:
+            return
+        with self._lock:
+            self.counters["requested"] += len(analysis_ids)
+            for analysis_id in analysis_ids:
+                self._pending.pop(analysis_id, None)
+            while self._inflight.intersection(analysis_ids):
+                self._inflight_done.wait()
+        self._write(list(analysis_ids), fields)
+        with self._lock:
+            for analysis_id in analysis_ids:
+                self._written.pop(analysis_id, None)
+
+    def _write(self, analysis_ids: list, fields: dict):
+        query = self.supabase.table("video_analyses").update(fields)
+        query = query.eq("id", analysis_ids[0]) if len(analysis_ids) == 1 else query.in_("id", analysis_ids)
+        try:
+            with span("supabase.write", table="video_analyses") as s:
+                s.add(bytes=len(json.dumps(fields, default=str)))
+                s.set(rows=len(analysis_ids))
+                query.execute()
+        except Exception as e:
+            if "stage_timings" not in fields or "stage_timings" not in str(e):
+                raise
+            # Column not migrated yet (see schema_stage_timings.sql): keep writing state without timings
+            print(f"stage_timings column unavailable, timings disabled: {e}")
+            self._timings_column = False
+            fields = {k: v for k, v in fields.items() if k != "stage_timings"}
+            if not fields:
+                return
+            self._write(analysis_ids, fields)
+            return
+        with self._lock:
+            self.counters["statements"] += 1
+            self.counters["rows_written"] += len(analysis_ids)
+            if "status" in fields:
+                for analysis_id in analysis_ids:
+                    self._written[analysis_id] = fields["status"]
+        if self.on_written is not None:
+            for analysis_id in analysis_ids:
+                try:
+                    self.on_written(analysis_id, fields)
+                except Exception as e:
+                    print(f"Job state callback failed for {analysis_id}: {e}")
+
+    def flush(self):
+        """Writes everything pending, one UPDATE per distinct set of fields."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._inflight.update(pending)
+        groups = {}
+        for analysis_id, fields in pending.items():
+            key = json.dumps(fields, sort_keys=True, default=str)
+            groups.setdefault(key, (fields, []))[1].append(analysis_id)
+        for fields, analysis_ids in groups.values():
+            try:
+                self._write(analysis_ids, fields)
+            except Exception as e:
+                print(f"Deferred state write for {len(analysis_ids)} analyses failed: {e}")
+            finally:
+                with self._lock:
+                    self._inflight.difference_update(analysis_ids)
+                    self._inflight_done.notify_all()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_seconds):
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counters, "pending": len(self._pending)}
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_job_state_writer(supabase, on_written=None) -> JobStateWriter:
+    """Process-wide writer for a Supabase client; flushed at interpreter exit."""
+    key = id(supabase)
+    if key not in _writers:
+        with _writers_lock:
+            if key not in _writers:
+                writer = JobStateWriter(supabase, on_written=on_written)
+                atexit.register(writer.close)
+                _writers[key] = writer
+    return _writers[key]
@@ -0,0 +1,62 @@
+import json
+
+
+class ObjectMemberStream:
+    """
+    Incremental parser for a streamed JSON object: feed() the text as it arrives and get back the
+    top-level (key, value) members completed so far, long before the closing brace.
+    Anything before the first "{" (e.g. a ```json fence) is skipped. The scan is linear: every
+    character is looked at once, and each finished member is parsed once.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+        self.done = False
+
+    def feed(self, text: str) -> list:
+        self._buffer += text
+        members = []
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer) and not self.done:
+            ch = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    if ch != "{":
+                        self.done = True
+                        break
+                    self._member_start = i + 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(buffer[self._member_start:i], members)
+                    self.done = True
+            elif ch == "," and self._depth == 1:
+                self._emit(buffer[self._member_start:i], members)
+                self._member_start = i + 1
+            i += 1
+        self._pos = i
+        return members
+
+    def _emit(self, text: str, members: list):
+        if not text.strip():
+            return
+        try:
+            members.extend(json.loads("{" + text + "}").items())
+        except ValueError as e:
+            print(f"Skipping unparseable streamed member: {e}")
@@ -0,0 +1,123 @@
+import os
+import time
+import struct
+import asyncio
+from collections import deque
+
+# Binary messages on the live socket: 1-byte kind, big-endian float64 media timestamp (seconds), then the payload
+BINARY_HEADER = struct.Struct(">Bd")
+BINARY_KINDS = {1: "frame", 2: "audio"}
+
+# Transcript lines that arrive while a transcript call is in flight are joined, keeping the newest this many characters
+LIVE_TRANSCRIPT_MAX_CHARS = int(os.getenv("LIVE_TRANSCRIPT_MAX_CHARS", "4000"))
+# End-to-end latencies kept per kind for the stats message
+LIVE_LATENCY_WINDOW = 1000
+
+
+def parse_binary(data: bytes):
+    """(kind, timestamp, payload) for a binary live message; raises ValueError on an unknown header."""
+    if len(data) < BINARY_HEADER.size:
+        raise ValueError("Binary message shorter than its header")
+    code, timestamp = BINARY_HEADER.unpack_from(data)
+    if code not in BINARY_KINDS:
+        raise ValueError(f"Unknown binary message kind {code}")
+    return BINARY_KINDS[code], timestamp, data[BINARY_HEADER.size:]
+
+
+def _percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class LiveSession:
+    """
+    Schedules model calls for one live-coaching connection.
+    Each kind ("frame", "audio", "transcript") has at most one call in flight. Input arriving meanwhile
+    waits in a pending slot: with coalescing, a newer frame or audio chunk replaces the waiting one
+    (latest wins, counted as dropped) and transcript lines are appended; without it, inputs queue FIFO.
+    Every result is pushed through `send(message)` as soon as its call finishes.
+    """
+
+    def __init__(self, handlers: dict, send, coalesce: bool = True):
+        self.handlers = handlers  # kind -> async fn(payload, timestamp) -> result dict
+        self.send = send
+        self.coalesce = coalesce
+        self._pending = {kind: [] for kind in handlers}
+        self._tasks = {}
+        self._latencies = {kind: deque(maxlen=LIVE_LATENCY_WINDOW) for kind in handlers}
+        self._closed = False
+        self.received = 0
+        self.scored = 0
+        self.dropped = 0
+
+    def submit(self, kind: str, payload, timestamp: float = None):
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown live input kind: {kind}")
+        if self._closed:
+            return
+        self.received += 1
+        item = {"payload": payload, "timestamp": timestamp, "received_at": time.perf_counter(), "merged": 1}
+        pending = self._pending[kind]
+        if self.coalesce and pending:
+            if kind == "transcript":
+                previous = pending.pop()
+                item["payload"] = (previous["payload"] + "\n" + payload)[-LIVE_TRANSCRIPT_MAX_CHARS:]
+                # Latency is measured from the oldest line the call covers
+                item["received_at"] = previous["received_at"]
+                item["merged"] = previous["merged"] + 1
+            else:
+                self.dropped += len(pending)
+                pending.clear()
+        pending.append(item)
+        task = self._tasks.get(kind)
+        if task is None or task.done():
+            self._tasks[kind] = asyncio.ensure_future(self._drain(kind))
+
+    async def _drain(self, kind: str):
+        handler = self.handlers[kind]
+        pending = self._pending[kind]
+        while pending and not self._closed:
+            item = pending.pop(0)
+            try:
+                result = await handler(item["payload"], item["timestamp"])
+            except Exception as e:
+                print(f"Live {kind} analysis failed: {e}")
+                result = {"error": str(e), "score": 0, "feedback": "Analysis failed."}
+            latency = time.perf_counter() - item["received_at"]
+            self._latencies[kind].append(latency)
+            self.scored += 1
+            try:
+                await self.send({
+                    "type": kind,
+                    "timestamp": item["timestamp"],
+                    "merged": item["merged"],
+                    "latency_ms": round(latency * 1000, 1),
+                    "result": result,
+                })
+            except Exception as e:
+                print(f"Live session send failed, closing: {e}")
+                self.close()
+
+    def stats(self) -> dict:
+        return {
+            "received": self.received,
+            "scored": self.scored,
+            "dropped": self.dropped,
+            "latency_ms": {
+                kind: {
+                    "count": len(values),
+                    "p50": round(_percentile(values, 0.50) * 1000, 1),
+                    "p99": round(_percentile(values, 0.99) * 1000, 1),
+                }
+                for kind, values in self._latencies.items()
+            },
+        }
+
+    def close(self):
+        self._closed = True
+        current = asyncio.current_task()
+        for task in self._tasks.values():
+            if task is not current and not task.done():
+                task.cancel()
@@ -0,0 +1,89 @@
+import os
+import shutil
+import threading
+from services.storage import data_path
+
+# gcs: Vertex-readable gs:// objects in the YouTubeService bucket; local: filesystem stand-in for tests/local runs
+MEDIA_STORE_BACKEND = os.getenv("MEDIA_STORE", "gcs")
+MEDIA_PREFIX = os.getenv("MEDIA_STORE_PREFIX", "media/")
+# Resumable upload chunk size: the most a streaming upload buffers in memory (GCS needs a multiple of 256KB)
+UPLOAD_CHUNK_SIZE = int(os.getenv("MEDIA_UPLOAD_CHUNK_MB", "8")) * 1024 * 1024
+
+
+class MediaStore:
+    """
+    Destination for streamed media. open_writer() returns a binary file-like object that
+    accepts the stream chunk by chunk; uri() is what the analysis step reads back.
+    """
+
+    def open_writer(self, name: str, content_type: str):
+        raise NotImplementedError
+
+    def uri(self, name: str) -> str:
+        raise NotImplementedError
+
+    def delete(self, uri: str):
+        raise NotImplementedError
+
+
+class GCSMediaStore(MediaStore):
+    """Streams into a resumable GCS upload, holding at most one UPLOAD_CHUNK_SIZE chunk in memory."""
+
+    def __init__(self, bucket_name: str, prefix: str = MEDIA_PREFIX):
+        from google.cloud import storage
+        self.bucket = storage.Client().bucket(bucket_name)
+        self.prefix = prefix
+
+    def open_writer(self, name: str, content_type: str):
+        blob = self.bucket.blob(self.prefix + name)
+        return blob.open("wb", content_type=content_type, chunk_size=UPLOAD_CHUNK_SIZE)
+
+    def uri(self, name: str) -> str:
+        return f"gs://{self.bucket.name}/{self.prefix}{name}"
+
+    def delete(self, uri: str):
+        blob_name = uri.split(f"gs://{self.bucket.name}/", 1)[-1]
+        self.bucket.blob(blob_name).delete()
+
+
+class LocalMediaStore(MediaStore):
+    """Filesystem stand-in for GCS with the same streaming interface."""
+
+    def __init__(self, root: str = None):
+        self.root = root or data_path("media")
+
+    def open_writer(self, name: str, content_type: str):
+        path = self.uri(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return open(path, "wb")
+
+    def uri(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def delete(self, uri: str):
+        if os.path.exists(uri):
+            os.remove(uri)
+        parent = os.path.dirname(uri)
+        if parent != self.root and os.path.isdir(parent) and not os.listdir(parent):
+            shutil.rmtree(parent, ignore_errors=True)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_media_store(bucket_name: str = None):
+    """Process-wide MediaStore for MEDIA_STORE, or None when streaming has nowhere to go (gcs without a bucket)."""
+    if MEDIA_STORE_BACKEND == "gcs" and not bucket_name:
+        return None
+    key = (MEDIA_STORE_BACKEND, bucket_name)
+    if key not in _stores:
+        with _stores_lock:
+            if key not in _stores:
+                if MEDIA_STORE_BACKEND == "local":
+                    _stores[key] = LocalMediaStore()
+                elif MEDIA_STORE_BACKEND == "gcs":
+                    _stores[key] = GCSMediaStore(bucket_name)
+                else:
+                    raise ValueError(f"Unknown MEDIA_STORE backend: {MEDIA_STORE_BACKEND}")
+    return _stores[key]
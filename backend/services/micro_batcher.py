@@ -0,0 +1,62 @@
+import asyncio
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item requests into shared batch calls on the running event loop.
+    submit() waits until the batch fills (max_batch) or max_wait seconds pass since its first item,
+    then `process_batch(items) -> results` runs once for the whole batch.
+    """
+
+    def __init__(self, process_batch, max_batch: int = 8, max_wait: float = 0.05):
+        self.process_batch = process_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending = []
+        self._timer = None
+        # Running batch tasks; the loop only keeps weak references to tasks, so they are held here until done
+        self._tasks = set()
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await self.process_batch([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"Batch returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+        }
@@ -0,0 +1,348 @@
+import os
+import re
+import json
+import time
+import uuid
+import random
+import shutil
+import asyncio
+import hashlib
+import threading
+from contextlib import contextmanager
+from services.executor import run_blocking
+from services.file_waiter import WAIT_DEADLINE_SECONDS
+
+# "genai", "vertex" or "fake"; unset picks genai with GEMINI_API_KEY, else Vertex with a project id
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "").strip().lower()
+
+# Fake backend: log-normal latency around a median, per response size, and injected failures
+FAKE_MODEL_LATENCY_MS = float(os.getenv("FAKE_MODEL_LATENCY_MS", "600"))
+FAKE_MODEL_DASHBOARD_LATENCY_MS = float(os.getenv("FAKE_MODEL_DASHBOARD_LATENCY_MS", "6000"))
+FAKE_MODEL_LATENCY_SIGMA = float(os.getenv("FAKE_MODEL_LATENCY_SIGMA", "0.4"))
+FAKE_MODEL_429_RATE = float(os.getenv("FAKE_MODEL_429_RATE", "0"))
+FAKE_MODEL_5XX_RATE = float(os.getenv("FAKE_MODEL_5XX_RATE", "0"))
+FAKE_MODEL_INVALID_JSON_RATE = float(os.getenv("FAKE_MODEL_INVALID_JSON_RATE", "0"))
+FAKE_MODEL_SEED = os.getenv("FAKE_MODEL_SEED")
+
+# Vertex: local media up to this size is sent inline; larger files are staged in the GCS media store
+# (the whole file would otherwise sit in memory, and inline requests are capped at about 20MB)
+VERTEX_INLINE_MAX_BYTES = int(os.getenv("VERTEX_INLINE_MAX_MB", "8")) * 1024 * 1024
+
+
+class ModelBackend:
+    """
+    What GeminiService needs from a model SDK:
+    - generate_content(contents, generation_config, stream) -> response with .text (an iterator of them when streaming)
+    - generate_content_async(contents, generation_config)
+    - inline_part(data, mime_type): raw image / audio bytes as a content part
+    - media_part(path, mime_type, kind, ...): context manager yielding a part for a media file
+    local_files_only is True when media must be a local file (it gets uploaded), False when gs:// URIs work.
+    """
+
+    name = ""
+    model_name = None
+    local_files_only = False
+
+    def generate_content(self, contents, generation_config=None, stream=False):
+        raise NotImplementedError
+
+    async def generate_content_async(self, contents, generation_config=None):
+        return await run_blocking("gemini", self.generate_content, contents, generation_config=generation_config)
+
+    def inline_part(self, data: bytes, mime_type: str):
+        raise NotImplementedError
+
+    def media_part(self, path: str, mime_type: str, kind: str = "file", deadline: float = WAIT_DEADLINE_SECONDS, cancel=None):
+        """Context manager yielding a content part for the media at `path` (a local file or a gs:// URI)."""
+        raise NotImplementedError
+
+
+class GenAIBackend(ModelBackend):
+    """google.generativeai with an API key (local development); media is uploaded through the Files API."""
+
+    name = "genai"
+    local_files_only = True
+
+    def __init__(self, api_key: str, model_name: str = "gemini-2.0-flash"):
+        import google.generativeai as genai
+        print("Using Gemini API Key Authentication (Local Mode)")
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate_content(self, contents, generation_config=None, stream=False):
+        return self.model.generate_content(contents, generation_config=generation_config, stream=stream)
+
+    async def generate_content_async(self, contents, generation_config=None):
+        return await self.model.generate_content_async(contents, generation_config=generation_config)
+
+    def inline_part(self, data: bytes, mime_type: str):
+        # genai accepts a dict {'mime_type': ..., 'data': ...} for raw bytes
+        return {'mime_type': mime_type, 'data': data}
+
+    @contextmanager
+    def media_part(self, path: str, mime_type: str, kind: str = "file", deadline: float = WAIT_DEADLINE_SECONDS, cancel=None):
+        from services.gemini_uploads import get_gemini_uploads
+        print(f"Uploading {kind} {path} to Gemini...")
+        if not os.path.exists(path):
+            raise ValueError(f"Local {kind} file not found: {path}")
+        # Reuses a live upload of the same bytes; idle uploads are deleted in the background
+        uploads = get_gemini_uploads()
+        handle = uploads.acquire(path, mime_type, kind=kind, deadline=deadline, cancel=cancel)
+        print("Done.")
+        try:
+            yield handle
+        finally:
+            uploads.release(handle)
+
+
+class VertexBackend(ModelBackend):
+    """
+    Vertex AI (Production/Cloud Run Mode); media is read from gs:// URIs. Small local files are sent inline,
+    larger ones are streamed to the GCS media store for the call and deleted afterwards.
+    """
+
+    name = "vertex"
+
+    def __init__(self, project_id: str, location: str = "us-central1", model_name: str = "gemini-1.5-flash",
+                 bucket_name: str = None):
+        import vertexai
+        from vertexai.generative_models import GenerativeModel, Part
+        print(f"Using Vertex AI Authentication (Project: {project_id})")
+        vertexai.init(project=project_id, location=location)
+        self._part = Part
+        self.model_name = model_name
+        self.model = GenerativeModel(model_name)
+        self.bucket_name = bucket_name or os.getenv("GCP_BUCKET_NAME")
+
+    def generate_content(self, contents, generation_config=None, stream=False):
+        return self.model.generate_content(contents, generation_config=generation_config, stream=stream)
+
+    async def generate_content_async(self, contents, generation_config=None):
+        return await self.model.generate_content_async(contents, generation_config=generation_config)
+
+    def inline_part(self, data: bytes, mime_type: str):
+        return self._part.from_data(data=data, mime_type=mime_type)
+
+    @contextmanager
+    def media_part(self, path: str, mime_type: str, kind: str = "file", deadline: float = WAIT_DEADLINE_SECONDS, cancel=None):
+        if path.startswith("gs://"):
+            yield self._part.from_uri(mime_type=mime_type, uri=path)
+            return
+        from services.media_store import get_media_store, GCSMediaStore
+        store = get_media_store(self.bucket_name)
+        size = os.path.getsize(path)
+        if size <= VERTEX_INLINE_MAX_BYTES or not isinstance(store, GCSMediaStore):
+            if size > VERTEX_INLINE_MAX_BYTES:
+                print(f"Warning: no GCS media store configured, sending {kind} {path} inline")
+            with open(path, "rb") as f:
+                yield self._part.from_data(data=f.read(), mime_type=mime_type)
+            return
+        name = f"staged/{uuid.uuid4()}{os.path.splitext(path)[1]}"
+        print(f"Staging {kind} {path} in GCS for Vertex...")
+        with open(path, "rb") as src, store.open_writer(name, mime_type) as dst:
+            shutil.copyfileobj(src, dst)
+        uri = store.uri(name)
+        try:
+            yield self._part.from_uri(mime_type=mime_type, uri=uri)
+        finally:
+            try:
+                store.delete(uri)
+            except Exception as e:
+                print(f"Could not delete staged media {uri}: {e}")
+
+
+class FakeModelError(Exception):
+    """Injected failure; carries the HTTP status in .code like the google.api_core exceptions."""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class _FakeUsage:
+    def __init__(self, prompt_token_count: int, candidates_token_count: int):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+
+
+class _FakeResponse:
+    def __init__(self, text: str, usage_metadata: _FakeUsage = None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+class FakeBackend(ModelBackend):
+    """
+    Local, deterministic stand-in for load tests and benchmarks: no network, no credentials.
+    Answers every GeminiService prompt with schema-valid JSON derived from a hash of the request,
+    so the same input always gets the same dashboard. Latency is log-normal around latency_ms
+    (dashboard_latency_ms for full dashboards); rate_429 / rate_5xx inject errors and
+    invalid_json_rate truncates the output.
+    """
+
+    name = "fake"
+    model_name = "fake-model"
+
+    def __init__(self, latency_ms: float = FAKE_MODEL_LATENCY_MS, dashboard_latency_ms: float = FAKE_MODEL_DASHBOARD_LATENCY_MS,
+                 sigma: float = FAKE_MODEL_LATENCY_SIGMA, rate_429: float = FAKE_MODEL_429_RATE, rate_5xx: float = FAKE_MODEL_5XX_RATE,
+                 invalid_json_rate: float = FAKE_MODEL_INVALID_JSON_RATE, seed=FAKE_MODEL_SEED):
+        print(f"Using fake model backend (median latency {latency_ms:.0f}ms / {dashboard_latency_ms:.0f}ms for dashboards)")
+        self.latency_ms = latency_ms
+        self.dashboard_latency_ms = dashboard_latency_ms
+        self.sigma = sigma
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.invalid_json_rate = invalid_json_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def inline_part(self, data: bytes, mime_type: str):
+        return {'mime_type': mime_type, 'data': data}
+
+    @contextmanager
+    def media_part(self, path: str, mime_type: str, kind: str = "file", deadline: float = WAIT_DEADLINE_SECONDS, cancel=None):
+        yield {'mime_type': mime_type, 'uri': path}
+
+    def _respond(self, contents):
+        """Returns (seconds to take, response text, usage), raising an injected error instead when one is drawn."""
+        with self._lock:
+            self.calls += 1
+            roll, truncate, jitter = self._random.random(), self._random.random(), self._random.lognormvariate(0, self.sigma)
+        if roll < self.rate_429:
+            raise FakeModelError(429, "Resource has been exhausted (fake)")
+        if roll < self.rate_429 + self.rate_5xx:
+            raise FakeModelError(503, "Service unavailable (fake)")
+        prompt = "\n".join(part for part in (contents if isinstance(contents, list) else [contents]) if isinstance(part, str))
+        digest = hashlib.sha256(repr(contents).encode("utf-8", "replace")).hexdigest()
+        body, dashboard = _fake_response(prompt, random.Random(digest))
+        text = json.dumps(body, ensure_ascii=False)
+        if truncate < self.invalid_json_rate:
+            text = text[:len(text) // 2]
+        median = self.dashboard_latency_ms if dashboard else self.latency_ms
+        # Rough token counts: ~4 characters per text token, a flat 258 per media part (Gemini's per-image rate)
+        parts = contents if isinstance(contents, list) else [contents]
+        usage = _FakeUsage(len(prompt) // 4 + 258 * sum(1 for part in parts if not isinstance(part, str)), len(text) // 4)
+        return median / 1000 * jitter, text, usage
+
+    def generate_content(self, contents, generation_config=None, stream=False):
+        seconds, text, usage = self._respond(contents)
+        if not stream:
+            time.sleep(seconds)
+            return _FakeResponse(text, usage)
+        return self._stream(seconds, text, usage)
+
+    def _stream(self, seconds: float, text: str, usage: _FakeUsage, pieces: int = 8):
+        # Time to first token is a fifth of the total, the rest is spread over the chunks
+        time.sleep(seconds / 5)
+        size = max(1, -(-len(text) // pieces))
+        for start in range(0, len(text), size):
+            time.sleep(seconds * 4 / 5 / pieces)
+            # Like the real API, the final chunk reports the usage totals
+            yield _FakeResponse(text[start:start + size], usage if start + size >= len(text) else None)
+
+    async def generate_content_async(self, contents, generation_config=None):
+        seconds, text, usage = self._respond(contents)
+        await asyncio.sleep(seconds)
+        return _FakeResponse(text, usage)
+
+
+def _score(rng: random.Random, low: int = 55, high: int = 95) -> int:
+    return rng.randint(low, high)
+
+
+def _fake_dashboard(rng: random.Random) -> dict:
+    labels = ("Confident", "Thoughtful", "Composed", "Enthusiastic", "Hesitant")
+    radar = {k: _score(rng) for k in ("confidence", "empathy", "authority", "composure", "enthusiasm", "trust")}
+    metrics = {k: {"score": _score(rng), "label": k.title()} for k in ("confidence", "trustworthiness", "engagement", "clarity")}
+    overall = round(sum(m["score"] for m in metrics.values()) / len(metrics))
+    return {
+        "analysis_reliability": {"score": _score(rng, 70), "notice": "Generated by the fake model backend."},
+        "video_metadata": {"duration": "Duration Unknown", "published_date": "Unknown", "extracted_interviewee_name": "Fake Speaker"},
+        "overall_performance": {"score": overall, "level": "Excellent" if overall >= 80 else "Good", "summary": "Fake assessment.", "badge": "Top Performer"},
+        "high_level_metrics": metrics,
+        "detailed_analysis": {
+            "voice_analysis": {"speaking_rate": "Moderate", "pause_frequency": "Balanced", "volume_variation": "Dynamic",
+                               "clarity_rating": "Good", "observation": "Fake voice observation."},
+            "message_analysis": {"keyword_density": "Appropriate", "emotional_tone": "Positive", "structure_rating": "Logical",
+                                 "logic_flow": "Well-organized", "observation": "Fake message observation."},
+        },
+        "emotion_radar": radar,
+        "timeline_analysis": [
+            {"timestamp": f"{minute:02d}:00", "event": f"Segment {i + 1}", "sentiment": rng.choice(("positive", "neutral")),
+             "emotion_label": rng.choice(labels), "confidence_score": _score(rng), "engagement_score": _score(rng),
+             "insight": "Fake timeline insight."}
+            for i, minute in enumerate(sorted(rng.sample(range(30), 4)))
+        ],
+        "benchmark_comparison": {
+            "your_score": overall, "industry_average": 72, "top_ceos": 92,
+            "metrics": ["Confidence", "Trustworthiness", "Engagement", "Clarity"],
+            "emotion_radar_benchmark": {"confidence": 85, "empathy": 80, "authority": 90, "composure": 85, "enthusiasm": 70, "trust": 85},
+        },
+        "recommendations": [
+            {"title": "Fake recommendation", "rationale": "Fake rationale.", "strategy": "Fake strategy.",
+             "priority": "High", "timeframe": "Immediate", "expected_impact": "Significant"},
+        ],
+        "key_takeaways": ["Fake takeaway 1", "Fake takeaway 2", "Fake takeaway 3"],
+        "summary": "Fake coach's note.",
+    }
+
+
+def _fake_response(prompt: str, rng: random.Random):
+    """(JSON body, is_dashboard) for a GeminiService prompt, told apart by the wording each prompt uses."""
+    emotions = ("Confident", "Thoughtful", "Composed", "Defensive")
+    batch = re.search(r"You are given (\d+) snapshots", prompt)
+    if batch:
+        return {"frames": [
+            {"index": i, "score": _score(rng), "feedback": "Fake feedback.", "emotion": rng.choice(emotions), "key_observation": "Fake."}
+            for i in range(int(batch.group(1)))
+        ]}, False
+    stills = re.search(r"You are given (\d+) still frames", prompt)
+    if stills:
+        stamps = re.findall(r"Frame at ([\d:]+):", prompt)
+        return {
+            "frames": [
+                {"timestamp": stamps[i] if i < len(stamps) else "00:00", "emotion_label": rng.choice(emotions),
+                 "confidence_score": _score(rng), "eye_contact": "Direct", "posture": "Open", "observation": "Fake."}
+                for i in range(int(stills.group(1)))
+            ],
+            "visual_analysis": {"facial_expression": "Fake.", "eye_contact": "Fake.", "posture": "Fake.", "setting": "Fake.", "observation": "Fake."},
+            "visual_scores": {"confidence": _score(rng), "composure": _score(rng), "authority": _score(rng)},
+        }, False
+    if "Transcript part:" in prompt:
+        stamps = re.findall(r"\[(\d+:\d{2}(?::\d{2})?)\]", prompt) or ["00:00"]
+        dashboard = _fake_dashboard(rng)
+        return {
+            "timeline_analysis": [dict(event, timestamp=stamp) for event, stamp in zip(dashboard["timeline_analysis"], stamps[::max(1, len(stamps) // 3)])],
+            "emotion_radar": dashboard["emotion_radar"],
+            "high_level_metrics": dashboard["high_level_metrics"],
+            "observations": ["Fake observation."],
+            "speaker_name": "Fake Speaker",
+        }, False
+    if "Listen to this audio clip" in prompt:
+        return {"score": _score(rng), "feedback": "Fake vocal feedback.", "metric": rng.choice(("Dynamic", "Monotone", "Too Fast"))}, False
+    if "Analyze this spoken sentence" in prompt:
+        return {"score": _score(rng), "metric": rng.choice(("Concise", "Vague", "Powerful")), "feedback": "Fake feedback."}, False
+    if "Analyze this video snapshot" in prompt:
+        return {"score": _score(rng), "feedback": "Fake feedback.", "emotion": rng.choice(emotions), "key_observation": "Fake."}, False
+    return _fake_dashboard(rng), True
+
+
+def make_backend(project_id: str = None, location: str = "us-central1"):
+    """The backend selected by MODEL_BACKEND, or the one the available credentials allow; None if neither."""
+    api_key = os.getenv("GEMINI_API_KEY") or os.getenv("gemini_api_key")
+    if MODEL_BACKEND == "fake":
+        return FakeBackend()
+    if MODEL_BACKEND == "genai" or (not MODEL_BACKEND and api_key):
+        if not api_key:
+            raise ValueError("MODEL_BACKEND=genai needs GEMINI_API_KEY")
+        return GenAIBackend(api_key)
+    if MODEL_BACKEND == "vertex" or (not MODEL_BACKEND and project_id):
+        if not project_id:
+            raise ValueError("MODEL_BACKEND=vertex needs GCP_PROJECT_ID")
+        return VertexBackend(project_id, location)
+    if MODEL_BACKEND:
+        raise ValueError(f"Unknown MODEL_BACKEND: {MODEL_BACKEND}")
+    print("Warning: No Gemini Auth configured.")
+    return None
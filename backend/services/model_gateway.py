@@ -0,0 +1,433 @@
+import os
+import time
+import asyncio
+import threading
+from services.executor import run_blocking
+from services.file_waiter import backoff_delays
+from services.storage import SQLiteStore, data_path
+
+# Project-wide model request budget, shared through SQLite by the API process and every worker
+MODEL_RPM = float(os.getenv("MODEL_RPM", "600"))
+MODEL_BURST = float(os.getenv("MODEL_BURST", "20"))
+# Model calls in flight per process
+MODEL_CONCURRENCY = int(os.getenv("MODEL_CONCURRENCY", "8"))
+
+# Per lane: priority (0 is served first), its own rate limit, the share of the global burst it must leave
+# for higher-priority lanes, how long a call may wait to be admitted, and attempts on 429 / 5xx.
+# Live results go stale within seconds, so live calls neither wait long nor retry.
+LANES = {
+    "full": {
+        "priority": 0, "rpm": float(os.getenv("MODEL_FULL_RPM", str(MODEL_RPM))), "reserve": 0.0,
+        "max_wait": float(os.getenv("MODEL_FULL_MAX_WAIT_SECONDS", "600")), "attempts": int(os.getenv("MODEL_FULL_ATTEMPTS", "5")),
+    },
+    "snapshot": {
+        "priority": 1, "rpm": float(os.getenv("MODEL_SNAPSHOT_RPM", "240")), "reserve": 0.3,
+        "max_wait": float(os.getenv("MODEL_SNAPSHOT_MAX_WAIT_SECONDS", "3")), "attempts": int(os.getenv("MODEL_SNAPSHOT_ATTEMPTS", "2")),
+    },
+    "live": {
+        "priority": 2, "rpm": float(os.getenv("MODEL_LIVE_RPM", "240")), "reserve": 0.5,
+        "max_wait": float(os.getenv("MODEL_LIVE_MAX_WAIT_SECONDS", "1")), "attempts": int(os.getenv("MODEL_LIVE_ATTEMPTS", "1")),
+    },
+}
+
+# Retry schedule on 429 / 5xx: exponential with jitter, capped
+MODEL_RETRY_INITIAL_SECONDS = float(os.getenv("MODEL_RETRY_INITIAL_SECONDS", "1"))
+MODEL_RETRY_MAX_SECONDS = float(os.getenv("MODEL_RETRY_MAX_SECONDS", "30"))
+# Retries allowed per first attempt, so an outage can't multiply traffic; RETRY_BUDGET_MAX can be saved up
+RETRY_BUDGET_RATIO = float(os.getenv("MODEL_RETRY_BUDGET_RATIO", "0.2"))
+RETRY_BUDGET_MAX = float(os.getenv("MODEL_RETRY_BUDGET_MAX", "10"))
+# Consecutive 5xx / timeouts that open the circuit, and how long it stays open before a probe call
+BREAKER_FAILURES = int(os.getenv("MODEL_BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN_SECONDS = float(os.getenv("MODEL_BREAKER_COOLDOWN_SECONDS", "30"))
+
+# How often callers waiting for a slot, or for the half-open probe to finish, look again
+SLOT_POLL_SECONDS = 0.05
+# Admission waits on capacity every lane shares; a higher-priority caller waiting on one of these holds back lower lanes
+SHARED_WAITS = {"no free slot", "rate limited (global)"}
+
+THROTTLED_CODES = {429}
+UNAVAILABLE_CODES = {500, 502, 503, 504}
+
+
+class ModelCallRejected(Exception):
+    """A call was not admitted within its lane's max_wait (rate limited, or the circuit is open)."""
+
+
+def classify_error(e: Exception):
+    """
+    "throttled" for 429, "unavailable" for 5xx, timeouts and dropped connections, None for errors
+    a retry won't fix. google.api_core exceptions (raised by both genai and Vertex) carry the HTTP status in .code.
+    """
+    code = getattr(e, "code", None)
+    if not isinstance(code, int):
+        code = getattr(e, "status_code", None)
+    if code in THROTTLED_CODES:
+        return "throttled"
+    if code in UNAVAILABLE_CODES or isinstance(e, (TimeoutError, ConnectionError)):
+        return "unavailable"
+    return None
+
+
+class ModelRateLimits(SQLiteStore):
+    """
+    Token buckets shared by every process on the host: one global bucket for the project quota
+    and one per lane, plus per-lane call counters.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS model_buckets (
+        name TEXT PRIMARY KEY,
+        tokens REAL NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS model_gateway_stats (
+        name TEXT PRIMARY KEY,
+        value REAL NOT NULL DEFAULT 0
+    );
+    """
+
+    def __init__(self, path: str = None):
+        super().__init__(path or data_path("model_limits.db"))
+
+    def _bump(self, **counters):
+        conn = self._conn()
+        for name, delta in counters.items():
+            conn.execute(
+                "INSERT INTO model_gateway_stats (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, delta),
+            )
+
+    @staticmethod
+    def _refill(conn, name: str, rate: float, burst: float, now: float) -> float:
+        row = conn.execute("SELECT tokens, updated_at FROM model_buckets WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return burst
+        return min(burst, row["tokens"] + max(0.0, now - row["updated_at"]) * rate)
+
+    def take(self, lane: str, lane_rate: float, global_rate: float, burst: float, reserve: float, now: float):
+        """
+        Takes one token from the lane's bucket and one from the global bucket, leaving at least
+        reserve * burst global tokens for higher-priority lanes. Returns (0, None), or
+        (seconds until it could succeed, "lane" or "global": the bucket that is short longest).
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            lane_tokens = self._refill(conn, lane, lane_rate, burst, now)
+            global_tokens = self._refill(conn, "global", global_rate, burst, now)
+            floor = 1 + reserve * burst
+            if lane_tokens >= 1 and global_tokens >= floor:
+                lane_tokens -= 1
+                global_tokens -= 1
+                wait, short = 0.0, None
+            else:
+                lane_wait, global_wait = (1 - lane_tokens) / lane_rate, (floor - global_tokens) / global_rate
+                wait, short = max(lane_wait, global_wait, 0.001), "global" if global_wait >= lane_wait else "lane"
+            conn.executemany(
+                "INSERT OR REPLACE INTO model_buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                [(lane, lane_tokens, now), ("global", global_tokens, now)],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait, short
+
+    def penalize(self, now: float):
+        """Empties the global bucket after a 429, so every process backs off instead of only the one that was throttled."""
+        self._conn().execute(
+            "INSERT INTO model_buckets (name, tokens, updated_at) VALUES ('global', 0, ?) "
+            "ON CONFLICT(name) DO UPDATE SET tokens = MIN(tokens, 0), updated_at = excluded.updated_at",
+            (now,),
+        )
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        lanes = {}
+        for row in conn.execute("SELECT name, value FROM model_gateway_stats"):
+            lane, _, name = row["name"].partition(".")
+            value = round(row["value"], 2) if name == "wait_seconds" else int(row["value"])
+            lanes.setdefault(lane, {})[name] = value
+        buckets = {row["name"]: round(row["tokens"], 2) for row in conn.execute("SELECT name, tokens FROM model_buckets")}
+        return {"lanes": lanes, "buckets": buckets}
+
+
+class CircuitBreaker:
+    """
+    Opens after `failures` consecutive unavailable errors; while open, calls wait for it (or are rejected)
+    instead of piling onto a backend that is down. After `cooldown` seconds one probe call goes through:
+    success closes the circuit, failure opens it for another cooldown.
+    Not thread-safe on its own; ModelGateway guards it with its lock.
+    """
+
+    def __init__(self, failures: int = BREAKER_FAILURES, cooldown: float = BREAKER_COOLDOWN_SECONDS):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.opens = 0
+        self._open = False
+        self._consecutive = 0
+        self._opened_until = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if not self._open:
+            return "closed"
+        return "half_open" if self._probing or time.time() >= self._opened_until else "open"
+
+    def blocked_for(self, now: float) -> float:
+        if not self._open:
+            return 0.0
+        if now < self._opened_until:
+            return self._opened_until - now
+        return SLOT_POLL_SECONDS if self._probing else 0.0
+
+    def admit(self, now: float) -> bool:
+        """Called once a call is admitted; returns True if it is the half-open probe."""
+        if self._open and now >= self._opened_until:
+            self._probing = True
+            return True
+        return False
+
+    def record(self, outcome, now: float, probe: bool) -> bool:
+        """outcome: "ok" (the backend answered), "unavailable", or None (call abandoned). Returns True if the circuit opened."""
+        if probe:
+            self._probing = False
+        if outcome == "ok":
+            self._open = False
+            self._consecutive = 0
+        elif outcome == "unavailable":
+            self._consecutive += 1
+            if probe or (not self._open and self._consecutive >= self.failures):
+                self._open = True
+                self._opened_until = now + self.cooldown
+                self.opens += 1
+                return True
+        return False
+
+
+class ModelGateway:
+    """
+    Every model call goes through call() / call_async() with a lane ("full", "snapshot", "live"):
+    - admission: per-process concurrency slots handed out in lane priority order, then a token from
+      the lane's bucket and the shared global bucket (lower lanes can't drain the global burst)
+    - retries with jittered backoff on 429 / 5xx, up to the lane's attempts and within a retry budget;
+      a 429 empties the global bucket for every process
+    - a circuit breaker that stops calls while the backend keeps failing
+    A call that can't be admitted within its lane's max_wait raises ModelCallRejected.
+    _lock only guards the in-memory state; the SQLite buckets and counters are never touched while
+    holding it, and call_async() does that I/O on the gateway pool rather than on the event loop.
+    """
+
+    def __init__(self, rpm: float = MODEL_RPM, burst: float = MODEL_BURST, concurrency: int = MODEL_CONCURRENCY,
+                 lanes: dict = None, limits: ModelRateLimits = None, breaker: CircuitBreaker = None,
+                 retry_initial: float = MODEL_RETRY_INITIAL_SECONDS, retry_max: float = MODEL_RETRY_MAX_SECONDS):
+        self.rate = rpm / 60
+        self.burst = burst
+        self.concurrency = concurrency
+        self.lanes = lanes or LANES
+        self.limits = limits or ModelRateLimits()
+        self.breaker = breaker or CircuitBreaker()
+        self.retry_initial = retry_initial
+        self.retry_max = retry_max
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._in_flight = 0
+        # Callers per priority currently waiting on shared capacity (see SHARED_WAITS)
+        self._blocked = {}
+        self._retry_tokens = RETRY_BUDGET_MAX
+
+    def _reserve_slot(self, spec: dict, now: float):
+        """Takes a concurrency slot; returns None, or (seconds to wait, reason) if none can be had yet."""
+        with self._lock:
+            wait = self.breaker.blocked_for(now)
+            if wait:
+                return wait, "circuit open"
+            if self._in_flight >= self.concurrency or any(n for p, n in self._blocked.items() if p < spec["priority"]):
+                return SLOT_POLL_SECONDS, "no free slot"
+            self._in_flight += 1
+            return None
+
+    def _try_admit(self, lane: str, spec: dict):
+        """Returns (0, is_probe) once a slot and tokens are taken, else (seconds to wait, reason)."""
+        now = time.time()
+        refused = self._reserve_slot(spec, now)
+        if refused:
+            return refused
+        try:
+            wait, short = self.limits.take(lane, spec["rpm"] / 60, self.rate, self.burst, spec["reserve"], now)
+        except BaseException:
+            self._release_slot()
+            raise
+        if wait:
+            self._release_slot()
+            return wait, f"rate limited ({short})"
+        with self._lock:
+            return 0.0, self.breaker.admit(now)
+
+    def _release_slot(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._changed.notify_all()
+
+    def _mark_blocked(self, spec: dict, was: bool, now_blocked: bool) -> bool:
+        """Keeps _blocked in step with whether this caller is waiting on shared capacity; returns now_blocked."""
+        if was != now_blocked:
+            with self._lock:
+                self._blocked[spec["priority"]] = self._blocked.get(spec["priority"], 0) + (1 if now_blocked else -1)
+                self._changed.notify_all()
+        return now_blocked
+
+    def _rejected(self, lane: str, spec: dict, reason: str):
+        self.limits._bump(**{f"{lane}.rejected": 1})
+        return ModelCallRejected(f"{lane} model call not admitted within {spec['max_wait']:g}s: {reason}")
+
+    def _admit(self, lane: str, spec: dict) -> bool:
+        deadline = time.monotonic() + spec["max_wait"]
+        blocked = False
+        try:
+            while True:
+                wait, detail = self._try_admit(lane, spec)
+                if not wait:
+                    return detail
+                blocked = self._mark_blocked(spec, blocked, detail in SHARED_WAITS)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise self._rejected(lane, spec, detail)
+                with self._lock:
+                    self._changed.wait(min(wait, remaining))
+        finally:
+            self._mark_blocked(spec, blocked, False)
+
+    async def _admit_async(self, lane: str, spec: dict) -> bool:
+        deadline = time.monotonic() + spec["max_wait"]
+        blocked = False
+        try:
+            while True:
+                admit = asyncio.ensure_future(run_blocking("gateway", self._try_admit, lane, spec))
+                try:
+                    wait, detail = await asyncio.shield(admit)
+                except asyncio.CancelledError:
+                    # The admission still completes on the pool; give back whatever it takes
+                    admit.add_done_callback(self._undo_admit)
+                    raise
+                if not wait:
+                    return detail
+                blocked = self._mark_blocked(spec, blocked, detail in SHARED_WAITS)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise await run_blocking("gateway", self._rejected, lane, spec, detail)
+                await asyncio.sleep(min(wait, remaining))
+        finally:
+            self._mark_blocked(spec, blocked, False)
+
+    def _undo_admit(self, admit):
+        if not admit.cancelled() and admit.exception() is None:
+            wait, probe = admit.result()
+            if not wait:
+                self._abandoned(probe)
+
+    def _finished(self, lane: str, spec: dict, probe: bool, error, attempt: int, waited: float, delays):
+        """Releases the slot and records the outcome; returns the delay before a retry, or None to stop."""
+        kind = classify_error(error) if error is not None else None
+        now = time.time()
+        counters = {f"{lane}.calls": 1, f"{lane}.wait_seconds": waited}
+        with self._lock:
+            self._in_flight -= 1
+            self._changed.notify_all()
+            if attempt == 1:
+                self._retry_tokens = min(RETRY_BUDGET_MAX, self._retry_tokens + RETRY_BUDGET_RATIO)
+            if self.breaker.record("unavailable" if kind == "unavailable" else "ok", now, probe):
+                counters["breaker.opens"] = 1
+            retry = kind is not None and attempt < spec["attempts"] and self._retry_tokens >= 1
+            if retry:
+                self._retry_tokens -= 1
+        if error is None:
+            counters[f"{lane}.ok"] = 1
+        elif kind is not None:
+            counters[f"{lane}.{kind}"] = 1
+        if kind == "throttled":
+            self.limits.penalize(now)
+        if error is not None:
+            counters[f"{lane}.retries" if retry else f"{lane}.failed"] = 1
+        self.limits._bump(**counters)
+        return next(delays) if retry else None
+
+    def _abandoned(self, probe: bool):
+        with self._lock:
+            self._in_flight -= 1
+            self._changed.notify_all()
+            self.breaker.record(None, time.time(), probe)
+
+    def call(self, lane: str, func, *args, **kwargs):
+        """Runs the blocking model call func(*args, **kwargs) under the lane's limits, retrying 429 / 5xx."""
+        spec = self.lanes[lane]
+        delays = backoff_delays(self.retry_initial, self.retry_max, 2.0)
+        attempt = 1
+        while True:
+            started = time.monotonic()
+            probe = self._admit(lane, spec)
+            waited = time.monotonic() - started
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                delay = self._finished(lane, spec, probe, e, attempt, waited, delays)
+                if delay is None:
+                    raise
+            except BaseException:
+                self._abandoned(probe)
+                raise
+            else:
+                self._finished(lane, spec, probe, None, attempt, waited, delays)
+                return result
+            time.sleep(delay)
+            attempt += 1
+
+    async def call_async(self, lane: str, func, *args, **kwargs):
+        """call() for coroutine functions; waiting for admission or a retry doesn't block the event loop."""
+        spec = self.lanes[lane]
+        delays = backoff_delays(self.retry_initial, self.retry_max, 2.0)
+        attempt = 1
+        while True:
+            started = time.monotonic()
+            probe = await self._admit_async(lane, spec)
+            waited = time.monotonic() - started
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                delay = await run_blocking("gateway", self._finished, lane, spec, probe, e, attempt, waited, delays)
+                if delay is None:
+                    raise
+            except BaseException:
+                self._abandoned(probe)
+                raise
+            else:
+                await run_blocking("gateway", self._finished, lane, spec, probe, None, attempt, waited, delays)
+                return result
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def stats(self) -> dict:
+        """Host-wide lane counters and bucket levels, plus this process' breaker and slots."""
+        with self._lock:
+            local = {
+                "breaker": self.breaker.state,
+                "in_flight": self._in_flight,
+                "waiting": sum(self._blocked.values()),
+                "retry_budget": round(self._retry_tokens, 2),
+            }
+        return {**self.limits.stats(), **local}
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_model_gateway() -> ModelGateway:
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = ModelGateway()
+    return _gateway
@@ -0,0 +1,83 @@
+import os
+import json
+import time
+import threading
+from services.storage import SQLiteStore, data_path
+
+# Events of finished analyses are kept this long so late or reconnecting subscribers can still replay them
+PROGRESS_RETENTION_SECONDS = float(os.getenv("PROGRESS_RETENTION_SECONDS", "3600"))
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+class ProgressStore(SQLiteStore):
+    """
+    Append-only log of analysis progress, written by the worker processes and read by the API's
+    event stream: status changes and dashboard sections as they are parsed out of the model's output.
+    Event ids are monotonic, so a subscriber resumes with events_after(last_id).
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS progress_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        analysis_id TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        name TEXT NOT NULL,
+        data TEXT,
+        created_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_progress_analysis ON progress_events(analysis_id, id);
+    """
+
+    def __init__(self, path: str = None, retention_seconds: float = PROGRESS_RETENTION_SECONDS):
+        self.retention_seconds = retention_seconds
+        super().__init__(path or data_path("progress.db"))
+
+    def publish(self, analysis_id: str, kind: str, name: str, data=None) -> int:
+        """
+        kind is "status" (name = the new status) or "section" (name = dashboard key, data = its value).
+        Returns the event id.
+        """
+        event_id = self._conn().execute(
+            "INSERT INTO progress_events (analysis_id, kind, name, data, created_at) VALUES (?, ?, ?, ?, ?)",
+            (analysis_id, kind, name, json.dumps(data) if data is not None else None, time.time()),
+        ).lastrowid
+        if kind == "status" and name in TERMINAL_STATUSES:
+            self.purge_expired()
+        return event_id
+
+    def status_version(self, analysis_id: str) -> int:
+        """Id of the analysis' latest status event (0 if none): changes whenever its row is updated."""
+        row = self._conn().execute(
+            "SELECT MAX(id) FROM progress_events WHERE analysis_id = ? AND kind = 'status'", (analysis_id,)
+        ).fetchone()
+        return row[0] or 0
+
+    def events_after(self, analysis_id: str, after_id: int = 0, limit: int = 100) -> list:
+        rows = self._conn().execute(
+            "SELECT id, kind, name, data FROM progress_events WHERE analysis_id = ? AND id > ? ORDER BY id LIMIT ?",
+            (analysis_id, after_id, limit),
+        ).fetchall()
+        return [
+            {"id": row["id"], "kind": row["kind"], "name": row["name"],
+             "data": json.loads(row["data"]) if row["data"] is not None else None}
+            for row in rows
+        ]
+
+    def purge_expired(self) -> int:
+        return self._conn().execute(
+            "DELETE FROM progress_events WHERE created_at < ?", (time.time() - self.retention_seconds,)
+        ).rowcount
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_progress_store() -> ProgressStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ProgressStore()
+    return _store
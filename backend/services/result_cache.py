@@ -0,0 +1,187 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from services.storage import SQLiteStore, data_path
+
+CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", str(30 * 86400)))
+CACHE_MEMORY_ENTRIES = int(os.getenv("RESULT_CACHE_MEMORY_ENTRIES", "256"))
+CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Preference order when any cached mode is acceptable (richest analysis first);
+# audio_keyframes is the audio tier with keyframe stills, which plain audio results can't stand in for
+MODES = ("video", "audio_keyframes", "audio", "transcript")
+
+
+class ResultCache(SQLiteStore):
+    """
+    Content-addressed cache of finished dashboard results.
+    Keyed by (video_id, mode, prompt_version, model_name), with an in-memory LRU tier
+    in front of a SQLite tier shared by every process on the host.
+    Entries expire after ttl_seconds; the SQLite tier is trimmed to max_bytes (least recently used first).
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS result_cache (
+        key TEXT PRIMARY KEY,
+        video_id TEXT NOT NULL,
+        mode TEXT NOT NULL,
+        prompt_version TEXT NOT NULL,
+        model_name TEXT NOT NULL,
+        result TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        compute_seconds REAL NOT NULL,
+        created_at REAL NOT NULL,
+        last_access REAL NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_result_cache_access ON result_cache(last_access);
+    CREATE TABLE IF NOT EXISTS result_cache_stats (
+        name TEXT PRIMARY KEY,
+        value REAL NOT NULL DEFAULT 0
+    );
+    """
+
+    def __init__(self, path: str = None, ttl_seconds: float = CACHE_TTL_SECONDS,
+                 memory_entries: int = CACHE_MEMORY_ENTRIES, max_bytes: int = CACHE_MAX_BYTES):
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()
+        self._memory_lock = threading.Lock()
+        super().__init__(path or data_path("result_cache.db"))
+
+    @staticmethod
+    def make_key(video_id: str, mode: str, prompt_version: str, model_name: str) -> str:
+        raw = "|".join([video_id, mode, str(prompt_version), str(model_name)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _bump(self, **counters):
+        conn = self._conn()
+        for name, delta in counters.items():
+            conn.execute(
+                "INSERT INTO result_cache_stats (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, delta),
+            )
+
+    def _memory_get(self, key: str):
+        with self._memory_lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            if entry["expires_at"] < time.time():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return entry
+
+    def _memory_put(self, key: str, entry: dict):
+        with self._memory_lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, video_id: str, mode: str, prompt_version: str, model_name: str, count_miss: bool = True):
+        """Returns a copy of the cached result dict, or None."""
+        key = self.make_key(video_id, mode, prompt_version, model_name)
+        now = time.time()
+
+        entry = self._memory_get(key)
+        if entry is not None:
+            self._bump(hits_memory=1, seconds_saved=entry["compute_seconds"])
+            return json.loads(entry["result"])
+
+        conn = self._conn()
+        row = conn.execute("SELECT * FROM result_cache WHERE key = ?", (key,)).fetchone()
+        if row is not None and row["expires_at"] >= now:
+            conn.execute("UPDATE result_cache SET last_access = ? WHERE key = ?", (now, key))
+            entry = {"result": row["result"], "compute_seconds": row["compute_seconds"], "expires_at": row["expires_at"]}
+            self._memory_put(key, entry)
+            self._bump(hits_disk=1, seconds_saved=row["compute_seconds"])
+            return json.loads(row["result"])
+
+        if row is not None:
+            conn.execute("DELETE FROM result_cache WHERE key = ?", (key,))
+        if count_miss:
+            self._bump(misses=1)
+        return None
+
+    def get_any(self, video_id: str, prompt_version: str, model_name: str, modes=MODES, count_miss: bool = True):
+        """Returns (mode, result) for the first cached mode in `modes`, or None."""
+        for mode in modes:
+            result = self.get(video_id, mode, prompt_version, model_name, count_miss=False)
+            if result is not None:
+                return mode, result
+        if count_miss:
+            self._bump(misses=1)
+        return None
+
+    def put(self, video_id: str, mode: str, prompt_version: str, model_name: str, result: dict, compute_seconds: float = 0.0):
+        key = self.make_key(video_id, mode, prompt_version, model_name)
+        payload = json.dumps(result)
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+
+        self._conn().execute(
+            "INSERT OR REPLACE INTO result_cache "
+            "(key, video_id, mode, prompt_version, model_name, result, size, compute_seconds, created_at, last_access, expires_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, video_id, mode, str(prompt_version), str(model_name), payload, len(payload), compute_seconds, now, now, expires_at),
+        )
+        self._memory_put(key, {"result": payload, "compute_seconds": compute_seconds, "expires_at": expires_at})
+        self.evict()
+
+    def evict(self) -> int:
+        """Drops expired entries, then least recently used ones until the tier fits max_bytes."""
+        conn = self._conn()
+        removed = conn.execute("DELETE FROM result_cache WHERE expires_at < ?", (time.time(),)).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM result_cache").fetchone()[0]
+        while total > self.max_bytes:
+            row = conn.execute("SELECT key, size FROM result_cache ORDER BY last_access LIMIT 1").fetchone()
+            if row is None:
+                break
+            conn.execute("DELETE FROM result_cache WHERE key = ?", (row["key"],))
+            with self._memory_lock:
+                self._memory.pop(row["key"], None)
+            total -= row["size"]
+            removed += 1
+        if removed:
+            self._bump(evictions=removed)
+        return removed
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        counters = {row["name"]: row["value"] for row in conn.execute("SELECT name, value FROM result_cache_stats")}
+        hits = counters.get("hits_memory", 0) + counters.get("hits_disk", 0)
+        lookups = hits + counters.get("misses", 0)
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM result_cache").fetchone()
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits_memory": int(counters.get("hits_memory", 0)),
+            "hits_disk": int(counters.get("hits_disk", 0)),
+            "misses": int(counters.get("misses", 0)),
+            "evictions": int(counters.get("evictions", 0)),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "seconds_saved": round(counters.get("seconds_saved", 0), 2),
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """Process-wide ResultCache, or None when RESULT_CACHE_ENABLED=0."""
+    global _cache
+    if os.getenv("RESULT_CACHE_ENABLED", "1") == "0":
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResultCache()
+    return _cache
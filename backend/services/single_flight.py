@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import threading
+from services.storage import SQLiteStore, data_path
+
+# A flight whose leader hasn't finished by then is treated as dead, and the next submission takes it over
+FLIGHT_LEASE_SECONDS = float(os.getenv("FLIGHT_LEASE_SECONDS", "3600"))
+# Leader failures before the error is fanned out to every follower instead of promoting the next one
+FLIGHT_MAX_ATTEMPTS = int(os.getenv("FLIGHT_MAX_ATTEMPTS", "3"))
+
+
+class SingleFlight(SQLiteStore):
+    """
+    Single-flight de-duplication of analyses across processes, keyed by video and mode.
+    The first submission for a key becomes the flight's leader and is queued as usual; concurrent
+    submissions join as followers and are not queued at all. When the leader finishes, its
+    result (or, after FLIGHT_MAX_ATTEMPTS, its error) is fanned out to every follower row.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS flights (
+        key TEXT PRIMARY KEY,
+        leader TEXT NOT NULL UNIQUE,
+        attempts INTEGER NOT NULL DEFAULT 1,
+        created_at REAL NOT NULL,
+        lease_until REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS flight_followers (
+        analysis_id TEXT PRIMARY KEY,
+        key TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        joined_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_flight_followers_key ON flight_followers(key, joined_at);
+    CREATE TABLE IF NOT EXISTS flight_stats (
+        name TEXT PRIMARY KEY,
+        value REAL NOT NULL DEFAULT 0
+    );
+    """
+
+    def __init__(self, path: str = None, lease_seconds: float = FLIGHT_LEASE_SECONDS):
+        self.lease_seconds = lease_seconds
+        super().__init__(path or data_path("flights.db"))
+
+    @staticmethod
+    def make_key(video_id: str, mode: str, *variant) -> str:
+        return "|".join([video_id, mode, *(str(v) for v in variant)])
+
+    def _bump(self, **counters):
+        conn = self._conn()
+        for name, delta in counters.items():
+            conn.execute(
+                "INSERT INTO flight_stats (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, delta),
+            )
+
+    def join(self, key: str, analysis_id: str, payload: dict) -> bool:
+        """
+        Atomically leads or joins the flight for `key`. Returns True if `analysis_id` is the leader
+        (the caller runs it), False if it attached to an in-flight computation.
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT leader, lease_until FROM flights WHERE key = ?", (key,)).fetchone()
+            if row is not None and row["lease_until"] >= now:
+                conn.execute(
+                    "INSERT OR IGNORE INTO flight_followers (analysis_id, key, payload, joined_at) VALUES (?, ?, ?, ?)",
+                    (analysis_id, key, json.dumps(payload), now),
+                )
+                leader = False
+            else:
+                # No flight, or its leader died: take over (followers of a dead leader stay attached)
+                conn.execute(
+                    "INSERT OR REPLACE INTO flights (key, leader, attempts, created_at, lease_until) VALUES (?, ?, 1, ?, ?)",
+                    (key, analysis_id, now, now + self.lease_seconds),
+                )
+                leader = True
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._bump(**({"flights": 1} if leader else {"deduplicated": 1}))
+        return leader
+
+    def followers(self, leader: str) -> list:
+        """Analysis ids currently attached to the flight led by `leader` ([] if it leads none)."""
+        rows = self._conn().execute(
+            "SELECT f.analysis_id FROM flight_followers f JOIN flights l ON l.key = f.key "
+            "WHERE l.leader = ? ORDER BY f.joined_at",
+            (leader,),
+        ).fetchall()
+        return [row["analysis_id"] for row in rows]
+
+    def is_follower(self, analysis_id: str) -> bool:
+        return self._conn().execute(
+            "SELECT 1 FROM flight_followers WHERE analysis_id = ?", (analysis_id,)
+        ).fetchone() is not None
+
+    def land(self, leader: str) -> list:
+        """Ends the flight led by `leader` after it completed; returns every follower to fan the result out to."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT key FROM flights WHERE leader = ?", (leader,)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return []
+            followers = [r["analysis_id"] for r in conn.execute(
+                "SELECT analysis_id FROM flight_followers WHERE key = ? ORDER BY joined_at", (row["key"],)
+            )]
+            conn.execute("DELETE FROM flight_followers WHERE key = ?", (row["key"],))
+            conn.execute("DELETE FROM flights WHERE key = ?", (row["key"],))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if followers:
+            self._bump(results_fanned_out=len(followers))
+        return followers
+
+    def abort(self, leader: str):
+        """
+        Handles a failed leader. Returns ("retry", new_leader_id, payload) after promoting the oldest follower,
+        ("fail", followers, None) once the flight has used up its attempts, or (None, [], None) without followers.
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            flight = conn.execute("SELECT * FROM flights WHERE leader = ?", (leader,)).fetchone()
+            if flight is None:
+                conn.execute("COMMIT")
+                return None, [], None
+            followers = conn.execute(
+                "SELECT analysis_id, payload FROM flight_followers WHERE key = ? ORDER BY joined_at", (flight["key"],)
+            ).fetchall()
+            if not followers or flight["attempts"] >= FLIGHT_MAX_ATTEMPTS:
+                conn.execute("DELETE FROM flight_followers WHERE key = ?", (flight["key"],))
+                conn.execute("DELETE FROM flights WHERE key = ?", (flight["key"],))
+                conn.execute("COMMIT")
+                return ("fail" if followers else None), [r["analysis_id"] for r in followers], None
+            promoted = followers[0]
+            conn.execute("DELETE FROM flight_followers WHERE analysis_id = ?", (promoted["analysis_id"],))
+            conn.execute(
+                "UPDATE flights SET leader = ?, attempts = attempts + 1, lease_until = ? WHERE key = ?",
+                (promoted["analysis_id"], now + self.lease_seconds, flight["key"]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._bump(promotions=1)
+        return "retry", promoted["analysis_id"], json.loads(promoted["payload"])
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        counters = {row["name"]: row["value"] for row in conn.execute("SELECT name, value FROM flight_stats")}
+        return {
+            "in_flight": conn.execute("SELECT COUNT(*) FROM flights").fetchone()[0],
+            "waiting_followers": conn.execute("SELECT COUNT(*) FROM flight_followers").fetchone()[0],
+            "flights": int(counters.get("flights", 0)),
+            "deduplicated": int(counters.get("deduplicated", 0)),
+            "results_fanned_out": int(counters.get("results_fanned_out", 0)),
+            "promotions": int(counters.get("promotions", 0)),
+        }
+
+
+_flights = None
+_flights_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    global _flights
+    if _flights is None:
+        with _flights_lock:
+            if _flights is None:
+                _flights = SingleFlight()
+    return _flights
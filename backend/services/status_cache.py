@@ -0,0 +1,111 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+STATUS_CACHE_ENTRIES = int(os.getenv("STATUS_CACHE_ENTRIES", "1024"))
+# Safety net for rows changed outside _update_analysis (e.g. edited in the dashboard)
+STATUS_CACHE_TTL_SECONDS = float(os.getenv("STATUS_CACHE_TTL_SECONDS", "300"))
+
+# Columns returned by the "status" projection while an analysis is still running
+STATUS_FIELDS = ("id", "status", "error_message")
+
+
+class StatusCache:
+    """
+    In-process read-through cache of video_analyses rows for GET /analyze/{id} polling.
+    Each entry is stamped with the analysis' progress version (its latest status event id, shared
+    across processes through the progress log), so a worker process changing the row invalidates it.
+    Entries keep the serialized body and its ETag, so an unchanged poll costs no DB read and no re-encoding.
+    """
+
+    def __init__(self, max_entries: int = STATUS_CACHE_ENTRIES, ttl_seconds: float = STATUS_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"polls": 0, "hits": 0, "db_reads": 0, "not_modified": 0, "bytes_sent": 0}
+
+    def _entry(self, row: dict, version: int) -> dict:
+        body = json.dumps(row, default=str).encode("utf-8")
+        return {
+            "row": row,
+            "version": version,
+            "body": body,
+            "etag": '"' + hashlib.sha1(body).hexdigest() + '"',
+            "expires_at": time.time() + self.ttl_seconds,
+        }
+
+    def get(self, analysis_id: str, version: int, projection: str):
+        """Cached (projected) entry, if it was stored at the analysis' current progress version."""
+        key = (analysis_id, projection)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry["version"] != version or entry["expires_at"] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, analysis_id: str, version: int, row: dict, projection: str) -> dict:
+        """Stores `row` already projected for `projection`."""
+        entry = self._entry(row, version)
+        key = (analysis_id, projection)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def update(self, analysis_id: str, fields: dict, version: int):
+        """Applies a write made in this process (inline jobs) to the cached rows instead of dropping them."""
+        with self._lock:
+            full = self._entries.get((analysis_id, "full"))
+            if full is not None:
+                self._entries[(analysis_id, "full")] = self._entry({**full["row"], **fields}, version)
+            status = self._entries.pop((analysis_id, "status"), None)
+            if status is not None and fields.get("status") != "completed":
+                row = project({**status["row"], **fields}, "status")
+                self._entries[(analysis_id, "status")] = self._entry(row, version)
+
+    def count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                self.counters[name] += delta
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+            entries = len(self._entries)
+        polls = counters["polls"] or 1
+        return {
+            **counters,
+            "entries": entries,
+            "db_reads_per_poll": round(counters["db_reads"] / polls, 3),
+            "bytes_per_poll": round(counters["bytes_sent"] / polls, 1),
+        }
+
+
+def project(row: dict, projection: str) -> dict:
+    """The "status" projection keeps only STATUS_FIELDS until the analysis has completed."""
+    if projection == "status" and row.get("status") != "completed":
+        return {key: row.get(key) for key in STATUS_FIELDS}
+    return row
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_status_cache() -> StatusCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = StatusCache()
+    return _cache
@@ -0,0 +1,44 @@
+import os
+import sqlite3
+import threading
+
+# Local state (job queue, caches) lives here unless DATA_DIR points elsewhere
+DATA_DIR = os.getenv("DATA_DIR") or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def data_path(filename: str) -> str:
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, filename)
+
+
+class SQLiteStore:
+    """
+    Small base class for the local SQLite-backed stores.
+    Keeps one connection per thread and creates SCHEMA on first open.
+    """
+    SCHEMA = ""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        dirname = os.path.dirname(os.path.abspath(path))
+        os.makedirs(dirname, exist_ok=True)
+        conn = self._conn()
+        conn.executescript(self.SCHEMA)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,379 @@
+import os
+import json
+import time
+import atexit
+import asyncio
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager, nullcontext
+from services.storage import SQLiteStore, data_path
+
+# Spans are aggregated in memory and written to the shared metrics store this often
+TRACE_FLUSH_SECONDS = float(os.getenv("TRACE_FLUSH_SECONDS", "5"))
+# Optional OpenTelemetry export of every span: "otlp" (configured by the usual OTEL_EXPORTER_OTLP_* variables),
+# "console", or "none". Needs opentelemetry-sdk (and opentelemetry-exporter-otlp-proto-http for otlp).
+OTEL_TRACES_EXPORTER = os.getenv("OTEL_TRACES_EXPORTER", "none").lower()
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "executive-comms-api")
+
+# Upper bounds (seconds) of the span duration histogram buckets; the last bucket is +Inf.
+# Spans range from millisecond state writes to ten-minute uploads and model calls.
+SPAN_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Quantities a span can carry, summed per span name / labels / outcome
+SPAN_COUNTERS = ("bytes", "prompt_tokens", "output_tokens")
+
+
+class Span:
+    """
+    One timed unit of pipeline work. `labels` are low-cardinality dimensions (lane, kind, strategy)
+    that become Prometheus labels; set() attributes (ids, URLs) only go to OpenTelemetry.
+    """
+
+    def __init__(self, name: str, labels: dict):
+        self.name = name
+        self.labels = labels
+        self.outcome = "ok"
+        self.bytes = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self._otel = None
+
+    def add(self, bytes: int = 0, prompt_tokens: int = 0, output_tokens: int = 0):
+        self.bytes += bytes or 0
+        self.prompt_tokens += prompt_tokens or 0
+        self.output_tokens += output_tokens or 0
+
+    def set(self, **attributes):
+        if self._otel is not None:
+            self._otel.set_attributes({k: v for k, v in attributes.items() if v is not None})
+
+
+# Stand-in returned by current_span() outside any span; what is added to it is dropped
+_NO_SPAN = Span("", {})
+_current = contextvars.ContextVar("current_span", default=None)
+
+
+def current_span() -> Span:
+    """The innermost open span of this task / thread, so callees can add byte and token counts to it."""
+    return _current.get() or _NO_SPAN
+
+
+_tracer = None
+_tracer_resolved = False
+_tracer_lock = threading.Lock()
+
+
+def _otel_tracer():
+    """OpenTelemetry tracer when OTEL_TRACES_EXPORTER asks for one and the SDK is installed, else None."""
+    global _tracer, _tracer_resolved
+    if not _tracer_resolved:
+        with _tracer_lock:
+            if not _tracer_resolved:
+                if OTEL_TRACES_EXPORTER in ("otlp", "console"):
+                    try:
+                        from opentelemetry import trace
+                        from opentelemetry.sdk.resources import Resource
+                        from opentelemetry.sdk.trace import TracerProvider
+                        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+                        if OTEL_TRACES_EXPORTER == "otlp":
+                            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+                            exporter = OTLPSpanExporter()
+                        else:
+                            exporter = ConsoleSpanExporter()
+                        provider = TracerProvider(resource=Resource.create({"service.name": OTEL_SERVICE_NAME}))
+                        provider.add_span_processor(BatchSpanProcessor(exporter))
+                        trace.set_tracer_provider(provider)
+                        atexit.register(provider.shutdown)
+                        _tracer = trace.get_tracer("pipeline")
+                        print(f"Exporting spans to OpenTelemetry ({OTEL_TRACES_EXPORTER})")
+                    except ImportError as e:
+                        print(f"OpenTelemetry export disabled, SDK not installed: {e}")
+                _tracer_resolved = True
+    return _tracer
+
+
+def _otel_finish(otel_span, s: Span):
+    otel_span.set_attributes({
+        "outcome": s.outcome, "bytes": s.bytes, "prompt_tokens": s.prompt_tokens, "output_tokens": s.output_tokens,
+    })
+
+
+@contextmanager
+def span(name: str, **labels):
+    """
+    Times the block as span `name`. The outcome is "ok", "error" if it raises, or "cancelled" for
+    task cancellation, unless the block set s.outcome itself.
+    """
+    s = Span(name, labels)
+    tracer = _otel_tracer()
+    otel = tracer.start_as_current_span(name, attributes=labels) if tracer is not None else nullcontext()
+    token = _current.set(s)
+    started = time.perf_counter()
+    try:
+        with otel as otel_span:
+            s._otel = otel_span
+            try:
+                yield s
+            except BaseException as e:
+                if s.outcome == "ok":
+                    s.outcome = "cancelled" if isinstance(e, asyncio.CancelledError) else "error"
+                raise
+            finally:
+                if otel_span is not None:
+                    _otel_finish(otel_span, s)
+    finally:
+        _current.reset(token)
+        get_span_recorder().record(s, time.perf_counter() - started)
+
+
+def traced(name: str, **labels):
+    """Decorator form of span() for a whole (blocking) function."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_span(name: str, seconds: float, outcome: str = "ok", attributes: dict = None, **labels):
+    """Records a span that ended just now after `seconds`, for code that already does its own timing."""
+    s = Span(name, labels)
+    s.outcome = outcome
+    tracer = _otel_tracer()
+    if tracer is not None:
+        end = time.time_ns()
+        otel_span = tracer.start_span(name, start_time=end - int(seconds * 1e9), attributes=labels)
+        if attributes:
+            otel_span.set_attributes(attributes)
+        _otel_finish(otel_span, s)
+        otel_span.end(end_time=end)
+    get_span_recorder().record(s, seconds)
+
+
+def bucket_for(seconds: float) -> str:
+    for bound in SPAN_BUCKETS:
+        if seconds <= bound:
+            return str(bound)
+    return "+Inf"
+
+
+class SpanMetrics(SQLiteStore):
+    """
+    Span duration histograms and byte / token totals per (span, labels, outcome), shared by the
+    API process and every worker process on the host so /metrics covers all of them.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS span_histogram (
+        name TEXT NOT NULL,
+        labels TEXT NOT NULL,
+        outcome TEXT NOT NULL,
+        bucket TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (name, labels, outcome, bucket)
+    );
+    CREATE TABLE IF NOT EXISTS span_totals (
+        name TEXT NOT NULL,
+        labels TEXT NOT NULL,
+        outcome TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        seconds REAL NOT NULL DEFAULT 0,
+        bytes INTEGER NOT NULL DEFAULT 0,
+        prompt_tokens INTEGER NOT NULL DEFAULT 0,
+        output_tokens INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (name, labels, outcome)
+    );
+    """
+
+    def __init__(self, path: str = None):
+        super().__init__(path or data_path("span_metrics.db"))
+
+    def record_many(self, aggregates: dict):
+        """Adds {(name, labels_json, outcome): {count, seconds, bytes, prompt_tokens, output_tokens, buckets}} in one transaction."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for (name, labels, outcome), entry in aggregates.items():
+                conn.execute(
+                    "INSERT INTO span_totals (name, labels, outcome, count, seconds, bytes, prompt_tokens, output_tokens) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(name, labels, outcome) DO UPDATE SET "
+                    "count = count + excluded.count, seconds = seconds + excluded.seconds, bytes = bytes + excluded.bytes, "
+                    "prompt_tokens = prompt_tokens + excluded.prompt_tokens, output_tokens = output_tokens + excluded.output_tokens",
+                    (name, labels, outcome, entry["count"], entry["seconds"], entry["bytes"],
+                     entry["prompt_tokens"], entry["output_tokens"]),
+                )
+                conn.executemany(
+                    "INSERT INTO span_histogram (name, labels, outcome, bucket, count) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(name, labels, outcome, bucket) DO UPDATE SET count = count + excluded.count",
+                    [(name, labels, outcome, bucket, count) for bucket, count in entry["buckets"].items()],
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def stats(self) -> list:
+        """[{span, labels, outcome, count, seconds, bytes, prompt_tokens, output_tokens, buckets: {le: count}}], sorted."""
+        conn = self._conn()
+        out = {}
+        for row in conn.execute("SELECT * FROM span_totals ORDER BY name, labels, outcome"):
+            out[(row["name"], row["labels"], row["outcome"])] = {
+                "span": row["name"],
+                "labels": json.loads(row["labels"]),
+                "outcome": row["outcome"],
+                "count": row["count"],
+                "seconds": row["seconds"],
+                **{counter: row[counter] for counter in SPAN_COUNTERS},
+                "buckets": {},
+            }
+        for row in conn.execute("SELECT * FROM span_histogram"):
+            entry = out.get((row["name"], row["labels"], row["outcome"]))
+            if entry is not None:
+                entry["buckets"][row["bucket"]] = row["count"]
+        order = [str(b) for b in SPAN_BUCKETS] + ["+Inf"]
+        for entry in out.values():
+            entry["buckets"] = {b: entry["buckets"][b] for b in order if b in entry["buckets"]}
+        return list(out.values())
+
+
+def _label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_string(labels: dict) -> str:
+    return ",".join(f'{key}="{_label_value(value)}"' for key, value in labels.items())
+
+
+def render_prometheus(stats: list) -> str:
+    """Prometheus text exposition of SpanMetrics.stats(): a duration histogram plus byte and token counters."""
+    lines = [
+        "# HELP pipeline_span_duration_seconds Duration of analysis pipeline spans.",
+        "# TYPE pipeline_span_duration_seconds histogram",
+    ]
+    for entry in stats:
+        labels = _label_string({"span": entry["span"], **entry["labels"], "outcome": entry["outcome"]})
+        cumulative = 0
+        for bound in [str(b) for b in SPAN_BUCKETS] + ["+Inf"]:
+            cumulative += entry["buckets"].get(bound, 0)
+            le = bound if bound == "+Inf" else repr(float(bound))
+            lines.append(f'pipeline_span_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f"pipeline_span_duration_seconds_sum{{{labels}}} {entry['seconds']:.6f}")
+        lines.append(f"pipeline_span_duration_seconds_count{{{labels}}} {entry['count']}")
+    helps = {
+        "bytes": "Bytes moved by analysis pipeline spans (downloads, uploads, model responses, row payloads).",
+        "prompt_tokens": "Model prompt tokens consumed by analysis pipeline spans.",
+        "output_tokens": "Model output tokens produced by analysis pipeline spans.",
+    }
+    for counter in SPAN_COUNTERS:
+        metric = f"pipeline_span_{counter}_total"
+        lines.append(f"# HELP {metric} {helps[counter]}")
+        lines.append(f"# TYPE {metric} counter")
+        for entry in stats:
+            if entry[counter]:
+                labels = _label_string({"span": entry["span"], **entry["labels"], "outcome": entry["outcome"]})
+                lines.append(f"{metric}{{{labels}}} {entry[counter]}")
+    return "\n".join(lines) + "\n"
+
+
+def _new_aggregate() -> dict:
+    return {"count": 0, "seconds": 0.0, "bytes": 0, "prompt_tokens": 0, "output_tokens": 0, "buckets": {}}
+
+
+class SpanRecorder:
+    """
+    Aggregates finished spans in memory and adds them to SpanMetrics every flush_seconds from a
+    background thread, so recording a span never waits on SQLite.
+    """
+
+    def __init__(self, store: SpanMetrics = None, flush_seconds: float = TRACE_FLUSH_SECONDS):
+        self._store = store
+        self.flush_seconds = flush_seconds
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def store(self) -> SpanMetrics:
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    self._store = SpanMetrics()
+        return self._store
+
+    def record(self, s: Span, seconds: float):
+        # Labels are serialised at flush time, not per span
+        key = (s.name, tuple(sorted(s.labels.items())), s.outcome)
+        bucket = bucket_for(seconds)
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                entry = self._pending[key] = _new_aggregate()
+            entry["count"] += 1
+            entry["seconds"] += seconds
+            entry["bytes"] += s.bytes
+            entry["prompt_tokens"] += s.prompt_tokens
+            entry["output_tokens"] += s.output_tokens
+            entry["buckets"][bucket] = entry["buckets"].get(bucket, 0) + 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="span-recorder", daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        # One flush at a time, so a failed batch can be merged back without racing a concurrent flush
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            try:
+                self.store.record_many({
+                    (name, json.dumps(dict(labels), default=str), outcome): entry
+                    for (name, labels, outcome), entry in pending.items()
+                })
+            except Exception as e:
+                print(f"Span metrics flush failed, keeping {len(pending)} aggregates for the next one: {e}")
+                with self._lock:
+                    for key, entry in pending.items():
+                        current = self._pending.setdefault(key, _new_aggregate())
+                        for field in ("count", "seconds", *SPAN_COUNTERS):
+                            current[field] += entry[field]
+                        for bucket, count in entry["buckets"].items():
+                            current["buckets"][bucket] = current["buckets"].get(bucket, 0) + count
+
+    def _run(self):
+        while not self._stop.wait(self.flush_seconds):
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+
+    def stats(self) -> list:
+        """Host-wide span aggregates, including what this process hasn't flushed yet."""
+        self.flush()
+        return self.store.stats()
+
+    def prometheus(self) -> str:
+        return render_prometheus(self.stats())
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_span_recorder() -> SpanRecorder:
+    """Process-wide recorder; flushed at interpreter exit."""
+    global _recorder
+    if _recorder is None:
+        with _recorder_lock:
+            if _recorder is None:
+                _recorder = SpanRecorder()
+                atexit.register(_recorder.close)
+    return _recorder
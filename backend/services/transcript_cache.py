@@ -0,0 +1,113 @@
+import os
+import json
+import time
+import threading
+from services.storage import SQLiteStore, data_path
+
+TRANSCRIPT_TTL_SECONDS = float(os.getenv("TRANSCRIPT_CACHE_TTL_SECONDS", str(30 * 86400)))
+# How long "this video has no captions" is remembered before both strategies are tried again
+NEGATIVE_TTL_SECONDS = float(os.getenv("TRANSCRIPT_NEGATIVE_TTL_SECONDS", str(6 * 3600)))
+
+# Language key used for negative entries (no captions in any language we asked for)
+ANY_LANG = "*"
+
+
+class TranscriptCache(SQLiteStore):
+    """
+    Persistent transcript store keyed by (video_id, lang).
+    Keeps the plain text plus timed segments, and negative entries for videos
+    without captions so they skip straight to the media fallback until the entry expires.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS transcripts (
+        video_id TEXT NOT NULL,
+        lang TEXT NOT NULL,
+        text TEXT,
+        segments TEXT,
+        source TEXT,
+        negative INTEGER NOT NULL DEFAULT 0,
+        error TEXT,
+        created_at REAL NOT NULL,
+        expires_at REAL NOT NULL,
+        PRIMARY KEY (video_id, lang)
+    );
+    CREATE INDEX IF NOT EXISTS idx_transcripts_expires ON transcripts(expires_at);
+    """
+
+    def __init__(self, path: str = None, ttl_seconds: float = TRANSCRIPT_TTL_SECONDS,
+                 negative_ttl_seconds: float = NEGATIVE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        super().__init__(path or data_path("transcripts.db"))
+
+    def lookup(self, video_id: str, langs):
+        """
+        Returns the first live entry for `langs` (in order), else a live negative entry, else None.
+        Entries are dicts: {lang, text, segments, source, negative, error}.
+        """
+        now = time.time()
+        rows = self._conn().execute(
+            "SELECT * FROM transcripts WHERE video_id = ? AND expires_at >= ?", (video_id, now)
+        ).fetchall()
+        by_lang = {row["lang"]: row for row in rows}
+
+        for lang in list(langs) + [l for l in by_lang if l not in langs and l != ANY_LANG]:
+            row = by_lang.get(lang)
+            if row is not None and not row["negative"]:
+                return self._to_entry(row)
+        if ANY_LANG in by_lang:
+            return self._to_entry(by_lang[ANY_LANG])
+        return None
+
+    def put(self, video_id: str, lang: str, text: str, segments=None, source: str = None):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO transcripts (video_id, lang, text, segments, source, negative, error, created_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?, 0, NULL, ?, ?)",
+            (video_id, lang or "unknown", text, json.dumps(segments or []), source, now, now + self.ttl_seconds),
+        )
+        # Captions showed up, so any earlier "no captions" entry is stale
+        conn.execute("DELETE FROM transcripts WHERE video_id = ? AND lang = ?", (video_id, ANY_LANG))
+        self.purge_expired()
+
+    def put_negative(self, video_id: str, error: str):
+        now = time.time()
+        self._conn().execute(
+            "INSERT OR REPLACE INTO transcripts (video_id, lang, text, segments, source, negative, error, created_at, expires_at) "
+            "VALUES (?, ?, NULL, NULL, NULL, 1, ?, ?, ?)",
+            (video_id, ANY_LANG, error, now, now + self.negative_ttl_seconds),
+        )
+        self.purge_expired()
+
+    def purge_expired(self) -> int:
+        """Deletes expired entries; runs on every write, so the file stays bounded by what's still live."""
+        return self._conn().execute("DELETE FROM transcripts WHERE expires_at < ?", (time.time(),)).rowcount
+
+    @staticmethod
+    def _to_entry(row) -> dict:
+        return {
+            "lang": row["lang"],
+            "text": row["text"],
+            "segments": json.loads(row["segments"]) if row["segments"] else [],
+            "source": row["source"],
+            "negative": bool(row["negative"]),
+            "error": row["error"],
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_transcript_cache():
+    """Process-wide TranscriptCache, or None when TRANSCRIPT_CACHE_ENABLED=0."""
+    global _cache
+    if os.getenv("TRANSCRIPT_CACHE_ENABLED", "1") == "0":
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TranscriptCache()
+    return _cache
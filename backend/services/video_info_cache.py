@@ -0,0 +1,77 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+# Raw yt-dlp extractions are reused for this long; the stream URLs in them stay valid for hours
+VIDEO_INFO_TTL_SECONDS = float(os.getenv("VIDEO_INFO_TTL_SECONDS", "900"))
+# Each entry holds the full format list (a few hundred KB), so keep only recent videos
+VIDEO_INFO_ENTRIES = int(os.getenv("VIDEO_INFO_ENTRIES", "64"))
+
+
+class VideoInfoCache:
+    """
+    In-process cache of yt-dlp info extractions per video, so the metadata fetch, the subtitle fallback
+    and download format selection of a job resolve the video once instead of once each.
+    A request for a video whose extraction is already running waits for it rather than starting another.
+    Failed extractions are not cached. Cached dicts are shared: callers must not modify them.
+    """
+
+    def __init__(self, max_entries: int = VIDEO_INFO_ENTRIES, ttl_seconds: float = VIDEO_INFO_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.counters = {"hits": 0, "shared": 0, "extractions": 0, "failures": 0}
+
+    def _lookup(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry["expires_at"] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry["info"]
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get(self, key: str, extract) -> dict:
+        """Cached info for `key`, or extract() run once (per key at a time) and cached."""
+        info = self._lookup(key)
+        if info is not None:
+            self._count("hits")
+            return info
+        with self._lock_for(key):
+            info = self._lookup(key)
+            if info is not None:
+                # Extracted by the request we waited for
+                self._count("shared")
+                return info
+            try:
+                info = extract()
+            except Exception:
+                with self._lock:
+                    self.counters["failures"] += 1
+                    self._key_locks.pop(key, None)
+                raise
+            with self._lock:
+                self.counters["extractions"] += 1
+                self._entries[key] = {"info": info, "expires_at": time.time() + self.ttl_seconds}
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                self._key_locks.pop(key, None)
+            return info
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counters, "entries": len(self._entries)}
@@ -0,0 +1,216 @@
+import os
+import time
+import fcntl
+import threading
+import importlib
+import multiprocessing
+import traceback
+from services.job_queue import EXPIRED_ERROR
+
+NUM_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+# How often the pool checks for dead worker processes (and, if it doesn't own the workers, for a dead owner)
+SUPERVISE_INTERVAL = float(os.getenv("JOB_SUPERVISE_INTERVAL", "5.0"))
+
+# Job kind -> "module:function" that runs it, called with (payload, stop) where stop is set when the worker
+# shuts down. Workers import these lazily.
+JOB_HANDLERS = {
+    "analysis": "routers.analysis:run_analysis_job",
+}
+# Job kind -> "module:function" called with (payload, error) when a job is given up on without running
+# to the end (its worker kept dying), so whatever it was running for isn't left in progress forever
+JOB_FAILURE_HANDLERS = {
+    "analysis": "routers.analysis:fail_analysis_job",
+}
+
+
+def _resolve_handler(kind: str, handlers: dict = JOB_HANDLERS):
+    module_name, func_name = handlers[kind].split(":")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def _reclaim(queue, worker_id: str):
+    """Re-queues jobs of dead workers, fails the ones out of attempts and prunes old finished jobs."""
+    reclaimed, exhausted = queue.reclaim_expired()
+    if reclaimed:
+        print(f"Worker {worker_id} re-queued {reclaimed} expired job(s)")
+    for job in exhausted:
+        print(f"Worker {worker_id} gave up on job {job.id} ({job.kind}) after {job.attempts} attempts")
+        if job.kind not in JOB_FAILURE_HANDLERS:
+            continue
+        try:
+            _resolve_handler(job.kind, JOB_FAILURE_HANDLERS)(job.payload, EXPIRED_ERROR)
+        except Exception:
+            traceback.print_exc()
+    pruned = queue.prune()
+    if pruned:
+        print(f"Worker {worker_id} pruned {pruned} finished job(s)")
+
+
+def _heartbeat_loop(queue, job_id, done: threading.Event):
+    interval = max(1.0, queue.lease_seconds / 3)
+    while not done.wait(interval):
+        try:
+            queue.heartbeat(job_id)
+        except Exception as e:
+            print(f"Job {job_id} heartbeat failed: {e}")
+
+
+def _worker_main(worker_id: str, stop_event, poll_interval: float, handlers: dict, failure_handlers: dict = None):
+    from services.job_queue import get_job_queue
+
+    JOB_HANDLERS.update(handlers)
+    JOB_FAILURE_HANDLERS.update(failure_handlers or {})
+    queue = get_job_queue()
+    print(f"Worker {worker_id} started (pid {os.getpid()})")
+    last_reclaim = 0.0
+
+    while not stop_event.is_set():
+        if time.time() - last_reclaim > poll_interval * 10:
+            try:
+                _reclaim(queue, worker_id)
+            except Exception as e:
+                print(f"Worker {worker_id} reclaim failed: {e}")
+            last_reclaim = time.time()
+
+        job = queue.claim(worker_id)
+        if job is None:
+            stop_event.wait(poll_interval)
+            continue
+
+        print(f"Worker {worker_id} claimed job {job.id} ({job.kind}) for analysis {job.analysis_id}")
+        done = threading.Event()
+        beat = threading.Thread(target=_heartbeat_loop, args=(queue, job.id, done), daemon=True)
+        beat.start()
+        try:
+            _resolve_handler(job.kind)(job.payload, stop_event)
+            queue.complete(job.id)
+        except Exception as e:
+            if stop_event.is_set():
+                # Interrupted by shutdown: once its lease runs out, reclaim_expired() hands it to another worker
+                print(f"Worker {worker_id} stopped during job {job.id}: {e}")
+            else:
+                traceback.print_exc()
+                queue.fail(job.id, str(e))
+        finally:
+            done.set()
+
+    # Spawned processes skip atexit hooks, so hand over the last spans explicitly
+    from services.tracing import get_span_recorder
+    get_span_recorder().flush()
+    print(f"Worker {worker_id} stopped")
+
+
+class _StopFlag:
+    """
+    Cross-process stop signal for the workers. Unlike multiprocessing.Event it holds no lock while waiting,
+    so a worker killed mid-wait can't leave set() blocked forever (which would hang stop() after a respawn).
+    """
+
+    def __init__(self, ctx):
+        self._flag = ctx.RawValue("b", 0)
+
+    def set(self):
+        self._flag.value = 1
+
+    def is_set(self) -> bool:
+        return bool(self._flag.value)
+
+    def wait(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(remaining, 0.1))
+        return True
+
+
+def _try_lock(path: str):
+    """Takes an exclusive lock on `path` without blocking; returns the open file holding it, or None."""
+    f = open(path, "a")
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+class WorkerPool:
+    """
+    Fixed-size pool of worker processes that claim jobs from the JobQueue.
+    Concurrency is bounded by the number of workers (one job per process at a time),
+    and blocking yt-dlp / Gemini / Supabase calls stay out of the API process.
+    A supervisor thread restarts workers that die. With a lock_path, only the process holding that
+    file lock runs workers (one pool per host, however many API processes start one); the others
+    keep trying, so one of them takes over if the owner exits. on_elected runs once a process
+    becomes the owner, before its workers start.
+    """
+
+    def __init__(self, num_workers: int = NUM_WORKERS, poll_interval: float = POLL_INTERVAL,
+                 lock_path: str = None, on_elected=None):
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval
+        self.lock_path = lock_path
+        self.on_elected = on_elected
+        self._ctx = multiprocessing.get_context("spawn")
+        self._stop = _StopFlag(self._ctx)
+        self._procs = []
+        self._lock_file = None
+        self._supervisor = None
+
+    def start(self):
+        self._supervisor = threading.Thread(target=self._supervise, name="worker-pool-supervisor", daemon=True)
+        self._supervisor.start()
+
+    def _spawn(self, i: int):
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(f"w{i}-{os.getpid()}", self._stop, self.poll_interval, dict(JOB_HANDLERS), dict(JOB_FAILURE_HANDLERS)),
+            daemon=True,
+        )
+        proc.start()
+        return proc
+
+    def _elect(self) -> bool:
+        if self.lock_path is None or self._lock_file is not None:
+            return True
+        self._lock_file = _try_lock(self.lock_path)
+        if self._lock_file is None:
+            return False
+        print(f"Process {os.getpid()} owns the analysis worker pool")
+        if self.on_elected is not None:
+            try:
+                self.on_elected()
+            except Exception as e:
+                print(f"Worker pool startup hook failed: {e}")
+        return True
+
+    def _supervise(self):
+        while not self._stop.is_set():
+            try:
+                if self._elect():
+                    if not self._procs:
+                        self._procs = [self._spawn(i) for i in range(self.num_workers)]
+                        print(f"Started {self.num_workers} analysis worker(s)")
+                    for i, proc in enumerate(self._procs):
+                        if not proc.is_alive() and not self._stop.is_set():
+                            print(f"Analysis worker w{i} exited with code {proc.exitcode}; restarting it")
+                            self._procs[i] = self._spawn(i)
+            except Exception as e:
+                print(f"Worker pool supervisor error: {e}")
+            self._stop.wait(SUPERVISE_INTERVAL)
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        if self._supervisor is not None:
+            self._supervisor.join(timeout)
+        for proc in self._procs:
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
+        self._procs = []
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
@@ -0,0 +1,317 @@
+import os
+import time
+import uuid
+import shutil
+import threading
+from services.storage import SQLiteStore, data_path
+
+WORKSPACE_ROOT = os.getenv("WORKSPACE_DIR") or data_path("workspaces")
+# Disk budget for all workspaces on the host; finished artefacts are evicted (least recently used first) to stay under it
+WORKSPACE_QUOTA_BYTES = int(os.getenv("WORKSPACE_QUOTA_MB", "5120")) * 1024 * 1024
+# Finished keyed artefacts (e.g. a video's audio) are kept this long for re-analyses
+WORKSPACE_RETENTION_SECONDS = float(os.getenv("WORKSPACE_RETENTION_SECONDS", str(6 * 3600)))
+# An active workspace whose holder hasn't released it by then is treated as orphaned (crashed worker)
+WORKSPACE_LEASE_SECONDS = float(os.getenv("WORKSPACE_LEASE_SECONDS", str(6 * 3600)))
+
+# Where downloads used to go before workspaces existed; swept at startup
+_SERVICES_DIR = os.path.dirname(os.path.abspath(__file__))
+LEGACY_TEMP_DIRS = [os.path.join(_SERVICES_DIR, "temp"), "/app/temp"]
+
+
+def dir_size(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+class Workspace:
+    """A per-job scratch directory. Use as a context manager, or call release() when done with its files."""
+
+    def __init__(self, manager, workspace_id: str, path: str, reused: bool = False):
+        self.manager = manager
+        self.id = workspace_id
+        self.path = path
+        self.reused = reused
+
+    def file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def release(self, failed: bool = False):
+        self.manager.release(self.id, failed=failed)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release(failed=exc_type is not None)
+        return False
+
+
+class WorkspaceManager(SQLiteStore):
+    """
+    Owns every download scratch directory under WORKSPACE_ROOT, across all processes on the host.
+    - open() creates a per-job dir; release() deletes it, or keeps it as a finished artefact when it has a key
+    - keyed artefacts can be picked up again with reuse() until evicted
+    - a global quota evicts finished artefacts least recently used first
+    - sweep() removes orphans: untracked dirs, expired leases, stale artefacts and legacy temp dirs
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS workspaces (
+        id TEXT PRIMARY KEY,
+        key TEXT,
+        kind TEXT NOT NULL,
+        path TEXT NOT NULL,
+        state TEXT NOT NULL,
+        holders INTEGER NOT NULL DEFAULT 0,
+        bytes INTEGER NOT NULL DEFAULT 0,
+        created_at REAL NOT NULL,
+        last_access REAL NOT NULL,
+        leased_until REAL NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS idx_workspaces_key ON workspaces(key);
+    CREATE INDEX IF NOT EXISTS idx_workspaces_access ON workspaces(state, last_access);
+    CREATE TABLE IF NOT EXISTS workspace_stats (
+        name TEXT PRIMARY KEY,
+        value REAL NOT NULL DEFAULT 0
+    );
+    """
+
+    def __init__(self, path: str = None, root: str = WORKSPACE_ROOT, quota_bytes: int = WORKSPACE_QUOTA_BYTES,
+                 retention_seconds: float = WORKSPACE_RETENTION_SECONDS, lease_seconds: float = WORKSPACE_LEASE_SECONDS):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.retention_seconds = retention_seconds
+        self.lease_seconds = lease_seconds
+        os.makedirs(root, exist_ok=True)
+        super().__init__(path or data_path("workspaces.db"))
+
+    def _bump(self, **counters):
+        conn = self._conn()
+        for name, delta in counters.items():
+            conn.execute(
+                "INSERT INTO workspace_stats (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, delta),
+            )
+
+    def open(self, kind: str, key: str = None) -> Workspace:
+        """Creates a fresh workspace dir. With a key, the finished result can be reused by later jobs."""
+        self.enforce_quota()
+        workspace_id = f"{kind}-{uuid.uuid4()}"
+        path = os.path.join(self.root, workspace_id)
+        now = time.time()
+        # Tracked before the dir exists, so a concurrent sweep never sees it as an orphan
+        self._conn().execute(
+            "INSERT INTO workspaces (id, key, kind, path, state, holders, created_at, last_access, leased_until) "
+            "VALUES (?, ?, ?, ?, 'active', 1, ?, ?, ?)",
+            (workspace_id, key, kind, path, now, now, now + self.lease_seconds),
+        )
+        os.makedirs(path)
+        return Workspace(self, workspace_id, path)
+
+    def reuse(self, key: str):
+        """Returns the finished (or still active) workspace for `key` with an extra holder, or None."""
+        conn = self._conn()
+        now = time.time()
+        # One transaction, so a concurrent release() can't delete the workspace between the check and the new holder
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT * FROM workspaces WHERE key = ? AND state IN ('finished', 'active') ORDER BY last_access DESC LIMIT 1",
+                (key,),
+            ).fetchone()
+            if row is None or (row["state"] == "active" and row["bytes"] == 0) or not os.path.isdir(row["path"]):
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE workspaces SET state = 'active', holders = holders + 1, last_access = ?, leased_until = ? WHERE id = ?",
+                (now, now + self.lease_seconds, row["id"]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._bump(reuses=1, bytes_reused=row["bytes"])
+        return Workspace(self, row["id"], row["path"], reused=True)
+
+    def mark_complete(self, workspace: Workspace):
+        """Records the size of a keyed workspace whose artefact is fully written (so reuse() may hand it out)."""
+        self._conn().execute(
+            "UPDATE workspaces SET bytes = ? WHERE id = ?", (max(dir_size(workspace.path), 1), workspace.id)
+        )
+
+    def release(self, workspace_id: str, failed: bool = False):
+        """
+        Drops one holder. Unkeyed or failed workspaces are deleted when the last holder leaves;
+        keyed ones become finished artefacts subject to retention and the quota.
+        """
+        conn = self._conn()
+        row = conn.execute("SELECT path FROM workspaces WHERE id = ?", (workspace_id,)).fetchone()
+        if row is None:
+            return
+        # Measured before the transaction so the write lock isn't held while walking the dir
+        size = dir_size(row["path"])
+        delete_path = None
+        # Holder count is read and written in one transaction, so concurrent releases and reuses don't lose updates
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT * FROM workspaces WHERE id = ?", (workspace_id,)).fetchone()
+            if row is None:
+                pass
+            elif failed or row["key"] is None:
+                if row["holders"] <= 1:
+                    conn.execute("DELETE FROM workspaces WHERE id = ?", (workspace_id,))
+                    delete_path = row["path"]
+                else:
+                    conn.execute("UPDATE workspaces SET holders = holders - 1 WHERE id = ?", (workspace_id,))
+            else:
+                holders = max(row["holders"] - 1, 0)
+                conn.execute(
+                    "UPDATE workspaces SET holders = ?, state = ?, bytes = ?, last_access = ?, leased_until = ? WHERE id = ?",
+                    (holders, "active" if holders else "finished", size, time.time(),
+                     row["leased_until"] if holders else 0, workspace_id),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if delete_path is not None:
+            shutil.rmtree(delete_path, ignore_errors=True)
+        elif row is not None and not failed and row["key"] is not None:
+            self.enforce_quota()
+
+    def release_path(self, path: str, failed: bool = False):
+        """Releases the workspace that contains `path` (for callers that only kept the file path)."""
+        path = os.path.abspath(path)
+        for row in self._conn().execute("SELECT id, path FROM workspaces"):
+            if path == row["path"] or path.startswith(row["path"] + os.sep):
+                self.release(row["id"], failed=failed)
+                return
+        print(f"Workspace release: {path} is not inside a tracked workspace")
+
+    def _delete(self, row, condition: str, params: tuple = ()) -> bool:
+        """
+        Deletes a workspace picked by an earlier SELECT if it still matches `condition`. The row is claimed in
+        its own transaction, so a reuse() that picked it up in the meantime keeps its dir. Returns True if deleted.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            claimed = conn.execute(
+                f"DELETE FROM workspaces WHERE id = ? AND ({condition})", (row["id"], *params)
+            ).rowcount == 1
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if claimed:
+            shutil.rmtree(row["path"], ignore_errors=True)
+        return claimed
+
+    @staticmethod
+    def _remove_path(path: str):
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def usage(self) -> dict:
+        conn = self._conn()
+        finished = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM workspaces WHERE state = 'finished'"
+        ).fetchone()
+        active_rows = conn.execute("SELECT path FROM workspaces WHERE state = 'active'").fetchall()
+        return {
+            "active": len(active_rows),
+            "active_bytes": sum(dir_size(row["path"]) for row in active_rows),
+            "finished": finished[0],
+            "finished_bytes": finished[1],
+        }
+
+    def enforce_quota(self) -> int:
+        """Evicts finished artefacts, least recently used first, until usage fits the quota."""
+        usage = self.usage()
+        total = usage["active_bytes"] + usage["finished_bytes"]
+        if total <= self.quota_bytes:
+            return 0
+        conn = self._conn()
+        evicted = 0
+        for row in conn.execute("SELECT * FROM workspaces WHERE state = 'finished' ORDER BY last_access").fetchall():
+            if total <= self.quota_bytes:
+                break
+            if not self._delete(row, "state = 'finished'"):
+                continue
+            total -= row["bytes"]
+            evicted += 1
+            self._bump(evictions=1, bytes_evicted=row["bytes"])
+        if total > self.quota_bytes:
+            print(f"Workspace quota exceeded by active jobs: {total / 1e6:.0f}MB in use, quota {self.quota_bytes / 1e6:.0f}MB")
+        return evicted
+
+    def sweep(self) -> int:
+        """
+        Removes orphans: expired leases (crashed holders), finished artefacts past retention,
+        dirs under the root that nothing tracks, and legacy temp dirs. Returns the number removed.
+        """
+        conn = self._conn()
+        now = time.time()
+        removed = 0
+        stale_condition = "(state = 'active' AND leased_until < ?) OR (state = 'finished' AND last_access < ?)"
+        stale_params = (now, now - self.retention_seconds)
+        stale = conn.execute(f"SELECT * FROM workspaces WHERE {stale_condition}", stale_params).fetchall()
+        for row in stale:
+            if self._delete(row, stale_condition, stale_params):
+                removed += 1
+
+        tracked = {row["path"] for row in conn.execute("SELECT path FROM workspaces")}
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if path not in tracked:
+                self._remove_path(path)
+                removed += 1
+
+        for legacy in LEGACY_TEMP_DIRS:
+            if os.path.isdir(legacy) and os.path.abspath(legacy) != os.path.abspath(self.root):
+                for name in os.listdir(legacy):
+                    self._remove_path(os.path.join(legacy, name))
+                    removed += 1
+        if removed:
+            self._bump(orphans_swept=removed)
+            print(f"Workspace sweep removed {removed} orphaned entries")
+        return removed
+
+    def stats(self) -> dict:
+        counters = {row["name"]: row["value"] for row in self._conn().execute("SELECT name, value FROM workspace_stats")}
+        usage = self.usage()
+        return {
+            **usage,
+            "bytes_in_use": usage["active_bytes"] + usage["finished_bytes"],
+            "quota_bytes": self.quota_bytes,
+            "reuses": int(counters.get("reuses", 0)),
+            "bytes_reused": int(counters.get("bytes_reused", 0)),
+            "evictions": int(counters.get("evictions", 0)),
+            "bytes_evicted": int(counters.get("bytes_evicted", 0)),
+            "orphans_swept": int(counters.get("orphans_swept", 0)),
+        }
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_workspace_manager() -> WorkspaceManager:
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = WorkspaceManager()
+    return _manager
@@ -1,12 +1,133 @@
 import yt_dlp
 import os
 import re
+import copy
 import http.cookiejar
+import threading
+import time
+import contextvars
+from concurrent.futures import wait, FIRST_COMPLETED
 import requests as req_lib
+from requests.adapters import HTTPAdapter
+from services.transcript_cache import get_transcript_cache
+from services.executor import get_pool
+from services.captions import iter_segments, segments_to_text
+from services.media_store import get_media_store
+from services.workspace import get_workspace_manager
+from services.tracing import span, traced, current_span
+from services.video_info_cache import VideoInfoCache
+
+HTTP_POOL_SIZE = int(os.getenv("YOUTUBE_HTTP_POOL_SIZE", "16"))
+TRANSCRIPT_LANGS = ['en', 'en-US', 'ja']
+# Caption languages the yt-dlp fallback looks for in the extraction, in order of preference
+SUBTITLE_LANGS = ['en', 'ja']
+# sequential: yt-dlp only after youtube-transcript-api fails
+# hedged: yt-dlp also starts if youtube-transcript-api hasn't answered after TRANSCRIPT_HEDGE_DELAY seconds
+# parallel: both start together
+TRANSCRIPT_STRATEGY_MODE = os.getenv("TRANSCRIPT_STRATEGY_MODE", "hedged").lower()
+TRANSCRIPT_HEDGE_DELAY = float(os.getenv("TRANSCRIPT_HEDGE_DELAY", "3.0"))
+
+# Speech-grade audio for the audio fallback tier: the ~50-70kbps Opus/AAC streams, re-encoded to a small mp3
+AUDIO_FORMAT = os.getenv("AUDIO_DOWNLOAD_FORMAT", "bestaudio[abr<=80]/bestaudio/best")
+AUDIO_MP3_KBPS = os.getenv("AUDIO_MP3_KBPS", "64")
+# Low-rate stills for visual cues in the audio tier, grabbed by seeking into a low-res video-only stream
+KEYFRAME_COUNT = int(os.getenv("KEYFRAME_COUNT", "12"))
+KEYFRAME_HEIGHT = int(os.getenv("KEYFRAME_HEIGHT", "360"))
+KEYFRAME_FORMAT = os.getenv(
+    "KEYFRAME_STREAM_FORMAT", f"bestvideo[height<={KEYFRAME_HEIGHT}][ext=mp4]/bestvideo[height<={KEYFRAME_HEIGHT}]/worst"
+)
+KEYFRAME_CONCURRENCY = int(os.getenv("KEYFRAME_CONCURRENCY", "4"))
+
+VIDEO_FORMAT = 'bestvideo[height<=720][ext=mp4]+bestaudio[ext=m4a]/best[height<=720][ext=mp4]/best'
+
+# Streaming mode pipes media into the MediaStore instead of staging it in a local workspace
+MEDIA_STREAMING = os.getenv("MEDIA_STREAMING", "1") == "1"
+STREAM_AUDIO_FORMAT = os.getenv("STREAM_AUDIO_FORMAT", AUDIO_FORMAT)
+STREAM_VIDEO_FORMAT = os.getenv("STREAM_VIDEO_FORMAT", VIDEO_FORMAT)
+STREAM_READ_SIZE = 1024 * 1024
+
+
+class NoCaptionsError(ValueError):
+    """The video has no usable captions (as opposed to a transient fetch failure)."""
+    pass
+
+
+class StrategyCancelled(Exception):
+    pass
+
+
+# Per-strategy outcome counts and latency, shared by every YouTubeService in the process
+_strategy_stats = {}
+_strategy_stats_lock = threading.Lock()
+
+
+def _record_strategy(name: str, outcome: str, latency: float = None):
+    with _strategy_stats_lock:
+        stats = _strategy_stats.setdefault(name, {"wins": 0, "succeeded": 0, "failed": 0, "cancelled": 0, "total_seconds": 0.0})
+        stats[outcome] += 1
+        if latency is not None:
+            stats["total_seconds"] += latency
+    if latency is not None:
+        print(f"Transcript strategy {name}: {outcome} in {latency:.2f}s")
+
+
+def _record_strategy_win(name: str):
+    with _strategy_stats_lock:
+        stats = _strategy_stats.setdefault(name, {"wins": 0, "succeeded": 0, "failed": 0, "cancelled": 0, "total_seconds": 0.0})
+        stats["wins"] += 1
+        wins = {n: s["wins"] for n, s in _strategy_stats.items()}
+    print(f"Transcript strategy {name} won (wins so far: {wins})")
+
+
+def transcript_strategy_stats() -> dict:
+    with _strategy_stats_lock:
+        result = {}
+        for name, stats in _strategy_stats.items():
+            runs = stats["succeeded"] + stats["failed"] + stats["cancelled"]
+            result[name] = {**stats, "avg_seconds": round(stats["total_seconds"] / runs, 3) if runs else None}
+        return result
 
 class YouTubeService:
     def __init__(self, bucket_name: str = None):
         self.bucket_name = bucket_name
+        # cookie_path (None: no cookies) -> pooled requests session
+        self._sessions = {}
+        self._session_lock = threading.Lock()
+        # One yt-dlp extraction per video, shared by metadata, the subtitle fallback and the downloads
+        self.info_cache = VideoInfoCache()
+
+    def _get_http_session(self, cookie_path: str = None) -> req_lib.Session:
+        """
+        Shared requests session (pooled keep-alive connections) for caption fetches.
+        There is one per cookie file (and one without cookies), built on first use, so a caller's cookies
+        apply even when an earlier caller passed none.
+        """
+        session = self._sessions.get(cookie_path)
+        if session is None:
+            with self._session_lock:
+                session = self._sessions.get(cookie_path)
+                if session is None:
+                    session = req_lib.Session()
+                    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    if cookie_path:
+                        # Load cookies and inject into requests session
+                        cj = http.cookiejar.MozillaCookieJar(cookie_path)
+                        cj.load(ignore_discard=True, ignore_expires=True)
+                        session.cookies = cj
+                    session.headers.update({
+                        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
+                        'Accept-Language': 'en-US,en;q=0.9',
+                    })
+                    self._sessions[cookie_path] = session
+        return session
+
+    def close(self):
+        with self._session_lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
 
     def _extract_video_id(self, url: str) -> str:
         m = re.search(r'(?:v=|youtu\.be/)([a-zA-Z0-9_-]{11})', url)
@@ -14,6 +135,36 @@ class YouTubeService:
             raise ValueError(f"Could not extract video ID from URL: {url}")
         return m.group(1)
 
+    def _video_info(self, youtube_url: str) -> dict:
+        """
+        The video's raw yt-dlp extraction (before format selection), cached in info_cache.
+        Read-only: use _process_info() to select formats or download from it.
+        """
+        try:
+            key = self._extract_video_id(youtube_url)
+        except ValueError:
+            key = youtube_url
+
+        def extract():
+            ydl_opts = {'quiet': True, 'no_warnings': True}
+            cookie_path = self._get_cookie_path()
+            if cookie_path:
+                ydl_opts['cookiefile'] = cookie_path
+            with span("youtube.extract_info"):
+                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                    return ydl.extract_info(youtube_url, download=False, process=False)
+
+        return self.info_cache.get(key, extract)
+
+    def _process_info(self, youtube_url: str, ydl_opts: dict, download: bool = False) -> dict:
+        """
+        Runs yt-dlp format selection with ydl_opts (and the download and post-processing, if asked)
+        on a copy of the cached extraction, without resolving the video again.
+        """
+        info = copy.deepcopy(self._video_info(youtube_url))
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            return ydl.process_ie_result(info, download=download)
+
     def _get_cookie_path(self) -> str:
         base_dir = "/app" if os.path.isdir("/app") else os.path.dirname(os.path.abspath(__file__))
         paths_to_try = [
@@ -31,146 +182,271 @@ class YouTubeService:
         Primary: youtube-transcript-api with cookies (handles auto-generated + manual captions).
         Fallback: yt-dlp with cookies.
         """
+        return self.get_transcript_entry(youtube_url)["text"]
+
+    def get_transcript_entry(self, youtube_url: str) -> dict:
+        """
+        Same as get_transcript, but returns {lang, text, segments, source}.
+        The transcript store is checked before either strategy touches the network.
+        """
         vid = self._extract_video_id(youtube_url)
         print(f"Fetching transcript for video: {vid}")
 
+        cache = get_transcript_cache()
+        if cache:
+            cached = cache.lookup(vid, TRANSCRIPT_LANGS)
+            if cached and cached["negative"]:
+                print(f"Transcript cache: no captions for {vid} (cached)")
+                raise NoCaptionsError(f"Could not retrieve transcripts for this video: {cached['error']} (cached)")
+            if cached:
+                print(f"Transcript cache hit for {vid} ({cached['lang']}, {len(cached['text'])} chars)")
+                return cached
+
         cookie_path = self._get_cookie_path()
         print(f"Cookie path: {cookie_path}, exists: {bool(cookie_path)}")
 
-        # Strategy 1: youtube-transcript-api
         try:
-            from youtube_transcript_api import YouTubeTranscriptApi
-            
-            if cookie_path:
-                # Load cookies and inject into requests session
-                cj = http.cookiejar.MozillaCookieJar(cookie_path)
-                cj.load(ignore_discard=True, ignore_expires=True)
-                session = req_lib.Session()
-                session.cookies = cj
-                session.headers.update({
-                    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
-                    'Accept-Language': 'en-US,en;q=0.9',
-                })
-                
-                from youtube_transcript_api._transcripts import TranscriptListFetcher
-                fetcher = TranscriptListFetcher(session)
-                transcript_list = fetcher.fetch(vid)
+            if TRANSCRIPT_STRATEGY_MODE == "sequential":
+                entry = self._run_strategies_sequential(vid, youtube_url, cookie_path)
             else:
-                api = YouTubeTranscriptApi()
-                transcript_list = api.list(vid)
+                delay = 0.0 if TRANSCRIPT_STRATEGY_MODE == "parallel" else TRANSCRIPT_HEDGE_DELAY
+                entry = self._run_strategies_hedged(vid, youtube_url, cookie_path, delay)
+        except NoCaptionsError as e:
+            if cache:
+                cache.put_negative(vid, str(e))
+            raise NoCaptionsError(f"Could not retrieve transcripts for this video: {e}")
+        except Exception as e:
+            raise ValueError(f"Could not retrieve transcripts for this video: {e}")
 
-            # Try English first, then any available
-            transcript = None
-            for lang in ['en', 'en-US', 'ja']:
-                try:
-                    transcript = transcript_list.find_transcript([lang])
-                    break
-                except:
-                    pass
-            if not transcript:
+        if cache:
+            cache.put(vid, entry["lang"], entry["text"], entry["segments"], entry["source"])
+        return entry
+
+    def _run_strategies_sequential(self, vid: str, youtube_url: str, cookie_path: str) -> dict:
+        # Strategy 1: youtube-transcript-api
+        try:
+            entry = self._timed_strategy("transcript_api", self._fetch_via_transcript_api, vid, cookie_path)
+        except Exception as e:
+            print(f"youtube-transcript-api failed: {e}")
+
+            # Strategy 2: yt-dlp with cookies
+            print("Falling back to yt-dlp with cookies...")
+            entry = self._timed_strategy("yt_dlp", self._fetch_via_ytdlp, youtube_url, cookie_path)
+            _record_strategy_win("yt_dlp")
+            return entry
+
+        _record_strategy_win("transcript_api")
+        return entry
+
+    def _run_strategies_hedged(self, vid: str, youtube_url: str, cookie_path: str, delay: float) -> dict:
+        """
+        Starts youtube-transcript-api, and yt-dlp as well once `delay` seconds pass
+        (or as soon as the first one fails). The first valid transcript wins; the
+        other strategy is cancelled (not started, or its result discarded).
+        """
+        cancel = threading.Event()
+        pool = get_pool("transcript")
+        strategies = [
+            ("transcript_api", self._fetch_via_transcript_api, (vid, cookie_path, cancel)),
+            ("yt_dlp", self._fetch_via_ytdlp, (youtube_url, cookie_path, cancel)),
+        ]
+        running = {}
+        errors = {}
+        next_idx = 0
+
+        def launch():
+            nonlocal next_idx
+            name, fn, args = strategies[next_idx]
+            # In the caller's context, so the strategy spans nest under the transcript stage
+            ctx = contextvars.copy_context()
+            running[pool.submit(ctx.run, self._timed_strategy, name, fn, *args, cancel=cancel)] = name
+            next_idx += 1
+
+        launch()
+        while running:
+            timeout = delay if next_idx < len(strategies) else None
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                print(f"Transcript strategy still running after {delay}s, hedging with {strategies[next_idx][0]}")
+                launch()
+                continue
+
+            for fut in done:
+                name = running.pop(fut)
                 try:
-                    transcript = transcript_list.find_generated_transcript(['en', 'ja'])
-                except:
-                    pass
+                    entry = fut.result()
+                except Exception as e:
+                    print(f"Transcript strategy {name} failed: {e}")
+                    errors[name] = e
+                    continue
 
-            if not transcript:
-                raise ValueError("No English or Japanese transcript found for this video.")
+                cancel.set()
+                for loser, loser_name in running.items():
+                    if loser.cancel():
+                        _record_strategy(loser_name, "cancelled")
+                _record_strategy_win(name)
+                return entry
 
-            fetched = transcript.fetch()
-            text = " ".join(snip.text for snip in fetched.snippets)
-            text = re.sub(r'<[^>]+>', '', text)
-            text = text.replace('&nbsp;', ' ').replace('&#39;', "'").replace('&amp;', '&')
-            text = re.sub(r'\s+', ' ', text).strip()
-            print(f"youtube-transcript-api SUCCESS: {len(text)} chars")
-            return text
+            # A strategy failed; don't wait out the hedge delay before trying the next one
+            if next_idx < len(strategies):
+                launch()
 
-        except Exception as e:
-            print(f"youtube-transcript-api failed: {e}")
+        # yt-dlp is the authority on whether captions exist at all
+        raise errors.get("yt_dlp") or next(iter(errors.values()))
 
-        # Strategy 2: yt-dlp with cookies
-        print("Falling back to yt-dlp with cookies...")
-        import yt_dlp as ytdlp_mod, uuid, glob
+    def _timed_strategy(self, name: str, fn, *args, cancel: threading.Event = None):
+        start = time.perf_counter()
+        with span("youtube.transcript", strategy=name) as s:
+            try:
+                entry = fn(*args)
+            except StrategyCancelled:
+                s.outcome = "cancelled"
+                _record_strategy(name, "cancelled", time.perf_counter() - start)
+                raise
+            except Exception:
+                _record_strategy(name, "failed", time.perf_counter() - start)
+                raise
+            s.add(bytes=len(entry.get("text", "").encode("utf-8")))
+            outcome = "cancelled" if cancel is not None and cancel.is_set() else "succeeded"
+            _record_strategy(name, outcome, time.perf_counter() - start)
+            if outcome == "cancelled":
+                s.outcome = "cancelled"
+                raise StrategyCancelled(f"{name} finished after another strategy won")
+            return entry
 
-        base_dir = "/app" if os.path.isdir("/app") else os.path.dirname(os.path.abspath(__file__))
-        req_id = str(uuid.uuid4())
-        out_path = os.path.join(base_dir, "temp", req_id)
-        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    def _fetch_via_transcript_api(self, vid: str, cookie_path: str, cancel: threading.Event = None) -> dict:
+        from youtube_transcript_api import YouTubeTranscriptApi
 
-        ydl_opts = {
-            'quiet': False,
-            'skip_download': True,
-            'writesubtitles': True,
-            'writeautomaticsub': True,
-            'subtitleslangs': ['en', 'ja'],
-            'outtmpl': out_path,
-        }
         if cookie_path:
-            ydl_opts['cookiefile'] = cookie_path
+            session = self._get_http_session(cookie_path)
 
-        try:
-            with ytdlp_mod.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([youtube_url])
+            from youtube_transcript_api._transcripts import TranscriptListFetcher
+            fetcher = TranscriptListFetcher(session)
+            transcript_list = fetcher.fetch(vid)
+        else:
+            api = YouTubeTranscriptApi(http_client=self._get_http_session())
+            transcript_list = api.list(vid)
 
-            vtt_files = glob.glob(f"{out_path}*.vtt")
-            if not vtt_files:
-                raise ValueError("No captions found via yt-dlp.")
+        # Try English first, then any available
+        transcript = None
+        for lang in TRANSCRIPT_LANGS:
+            try:
+                transcript = transcript_list.find_transcript([lang])
+                break
+            except:
+                pass
+        if not transcript:
+            try:
+                transcript = transcript_list.find_generated_transcript(['en', 'ja'])
+            except:
+                pass
 
-            selected = vtt_files[0]
-            for f in vtt_files:
-                if '.en.' in f:
-                    selected = f
-                    break
+        if not transcript:
+            raise NoCaptionsError("No English or Japanese transcript found for this video.")
 
-            with open(selected, 'r', encoding='utf-8') as f:
-                vtt_content = f.read()
+        if cancel is not None and cancel.is_set():
+            raise StrategyCancelled("transcript_api cancelled")
+        fetched = transcript.fetch()
+        segments = []
+        for snip in fetched.snippets:
+            line = self._clean_caption_text(snip.text)
+            if line:
+                segments.append({"start": snip.start, "end": snip.start + snip.duration, "text": line})
+        text = " ".join(seg["text"] for seg in segments)
+        return {"lang": transcript.language_code, "text": text, "segments": segments, "source": "youtube-transcript-api"}
 
-            for f in vtt_files:
-                try: os.remove(f)
-                except: pass
+    def _fetch_via_ytdlp(self, youtube_url: str, cookie_path: str, cancel: threading.Event = None) -> dict:
+        """
+        Captions listed in the video's (shared) yt-dlp extraction, streamed as VTT over the pooled session
+        straight into the caption parser (never held whole in memory).
+        Uploaded subtitles are preferred to automatic captions for a language, like yt-dlp's --write-subs --write-auto-subs.
+        """
+        if cancel is not None and cancel.is_set():
+            raise StrategyCancelled("yt_dlp cancelled")
+        track = self._caption_track(self._video_info(youtube_url))
+        if cancel is not None and cancel.is_set():
+            raise StrategyCancelled("yt_dlp cancelled")
+        if track is None:
+            raise NoCaptionsError("No captions found via yt-dlp.")
 
-            return self._parse_vtt(vtt_content)
+        lang, url = track
+        with self._get_http_session(cookie_path).get(url, timeout=30, stream=True) as response:
+            response.raise_for_status()
+            # WebVTT is always UTF-8; without a charset requests would guess ISO-8859-1 for text/vtt
+            response.encoding = "utf-8"
+            segments = []
+            for segment in iter_segments(response.iter_lines(decode_unicode=True)):
+                if cancel is not None and cancel.is_set():
+                    raise StrategyCancelled("yt_dlp cancelled")
+                segments.append(segment)
+        return {"lang": lang, "text": segments_to_text(segments), "segments": segments, "source": "yt-dlp"}
 
-        except Exception as e:
-            raise ValueError(f"Could not retrieve transcripts for this video: {e}")
+    @staticmethod
+    def _caption_track(info: dict):
+        """(lang, vtt_url) of the preferred caption track in a yt-dlp extraction, or None."""
+        for lang in SUBTITLE_LANGS:
+            for tracks in (info.get("subtitles") or {}, info.get("automatic_captions") or {}):
+                for track in tracks.get(lang) or []:
+                    if track.get("ext") == "vtt" and track.get("url"):
+                        return lang, track["url"]
+        return None
 
-    def _parse_vtt(self, vtt: str) -> str:
-        lines = []
-        for line in vtt.split('\n'):
-            line = line.strip()
-            if not line or line == "WEBVTT" or '-->' in line:
-                continue
-            if any(line.startswith(p) for p in ('Kind:', 'Language:', 'NOTE')):
-                continue
-            line = re.sub(r'<[^>]+>', '', line)
-            line = line.replace('&nbsp;', ' ').replace('&#39;', "'").replace('&amp;', '&')
-            if line and (not lines or line != lines[-1]):
-                lines.append(line)
-        return ' '.join(lines)
+    def _clean_caption_text(self, text: str) -> str:
+        text = re.sub(r'<[^>]+>', '', text)
+        text = text.replace('&nbsp;', ' ').replace('&#39;', "'").replace('&amp;', '&')
+        return re.sub(r'\s+', ' ', text).strip()
+
+    def _download_workspace(self, kind: str, youtube_url: str, variant: str):
+        """
+        (workspace, cached_file) for a download. A finished download of the same video and variant
+        that is still on disk is handed out again instead of re-downloading.
+        """
+        import glob
 
+        workspaces = get_workspace_manager()
+        try:
+            key = f"{kind}:{self._extract_video_id(youtube_url)}:{variant}"
+        except ValueError:
+            key = None
+        if key:
+            workspace = workspaces.reuse(key)
+            if workspace is not None:
+                files = [f for f in glob.glob(os.path.join(workspace.path, "*")) if not f.endswith(".part")]
+                if files:
+                    print(f"Reusing downloaded {kind} for {youtube_url}")
+                    current_span().outcome = "cached"
+                    return workspace, max(files, key=os.path.getsize)
+                workspace.release(failed=True)
+        return workspaces.open(kind, key), None
+
+    def _finish_download(self, workspace, path: str) -> str:
+        get_workspace_manager().mark_complete(workspace)
+        current_span().add(bytes=os.path.getsize(path))
+        return path
+
+    @traced("youtube.download", kind="audio")
     def download_audio(self, youtube_url: str) -> str:
         """
         Download only audio from YouTube using yt-dlp.
-        Returns the path to the downloaded audio file.
+        Returns the path to the downloaded audio file; release it with get_workspace_manager().release_path().
         """
-        import uuid
         import os
-        import yt_dlp as ytdlp_mod
 
-        base_dir = "/app" if os.path.isdir("/app") else os.path.dirname(os.path.abspath(__file__))
-        req_id = str(uuid.uuid4())
-        out_dir = os.path.join(base_dir, "temp", req_id)
-        os.makedirs(out_dir, exist_ok=True)
+        workspace, cached = self._download_workspace("audio", youtube_url, f"{AUDIO_FORMAT}|{AUDIO_MP3_KBPS}")
+        if cached:
+            return cached
+        out_dir = workspace.path
         
         out_path = os.path.join(out_dir, "audio.%(ext)s")
         
         cookie_path = self._get_cookie_path()
         
         ydl_opts = {
-            'format': 'bestaudio/best',
+            'format': AUDIO_FORMAT,
             'postprocessors': [{
                 'key': 'FFmpegExtractAudio',
                 'preferredcodec': 'mp3',
-                'preferredquality': '128',
+                'preferredquality': AUDIO_MP3_KBPS,
             }],
             'outtmpl': out_path,
             'quiet': False,
@@ -181,8 +457,7 @@ class YouTubeService:
             
         try:
             print(f"Attempting audio download with yt-dlp: {youtube_url}")
-            with ytdlp_mod.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([youtube_url])
+            self._process_info(youtube_url, ydl_opts, download=True)
             
             # Find the actual downloaded file (extension might be changed by postprocessor)
             import glob
@@ -194,7 +469,7 @@ class YouTubeService:
             if not downloaded_files:
                 raise ValueError("Audio download failed: No file found.")
                 
-            return downloaded_files[0]
+            return self._finish_download(workspace, downloaded_files[0])
             
         except Exception as e:
             print(f"yt-dlp audio download failed: {e}. Trying pytubefix fallback...")
@@ -213,31 +488,176 @@ class YouTubeService:
                 # Convert to mp3 using moviepy (since it's in requirements) or just use as is if Gemini supports it
                 # Gemini supports various audio formats including mp4/m4a which pytube downloads
                 print(f"pytubefix download success: {download_path}")
-                return download_path
+                return self._finish_download(workspace, download_path)
                 
             except Exception as e2:
                 print(f"pytubefix audio download failed: {e2}")
+                workspace.release(failed=True)
                 raise ValueError(f"Could not download audio via any method. Last error: {e2}")
 
+    @traced("youtube.download", kind="keyframes")
+    def extract_keyframes(self, youtube_url: str, count: int = KEYFRAME_COUNT, duration: float = None):
+        """
+        Grabs `count` evenly spaced JPEG stills without downloading the video: ffmpeg seeks
+        straight into a low-res video-only stream with HTTP range requests for each frame.
+        Returns ([(seconds, jpeg_path)], workspace) for the frames that could be extracted; the caller
+        releases the workspace once done with them (it is None when no frame could be extracted).
+        """
+        import subprocess
+        from concurrent.futures import ThreadPoolExecutor
+
+        ydl_opts = {'format': KEYFRAME_FORMAT, 'quiet': True, 'no_warnings': True}
+        cookie_path = self._get_cookie_path()
+        if cookie_path:
+            ydl_opts['cookiefile'] = cookie_path
+
+        info = self._process_info(youtube_url, ydl_opts)
+        stream_url = info.get("url")
+        duration = duration or info.get("duration")
+        if not stream_url or not duration:
+            raise ValueError("Keyframe extraction failed: no seekable video stream.")
+        headers = "".join(f"{k}: {v}\r\n" for k, v in (info.get("http_headers") or {}).items())
+
+        workspace = get_workspace_manager().open("keyframes")
+        out_dir = workspace.path
+
+        def grab(i):
+            seconds = (i + 0.5) * duration / count
+            path = os.path.join(out_dir, f"frame_{i:03d}.jpg")
+            cmd = ["ffmpeg", "-nostdin", "-loglevel", "error", "-y", "-ss", f"{seconds:.2f}"]
+            if headers:
+                cmd += ["-headers", headers]
+            cmd += ["-i", stream_url, "-frames:v", "1", "-vf", f"scale=-2:{KEYFRAME_HEIGHT}", "-q:v", "4", path]
+            try:
+                subprocess.run(cmd, check=True, timeout=60, capture_output=True)
+            except Exception as e:
+                print(f"Keyframe at {seconds:.0f}s failed: {e}")
+                return None
+            return (seconds, path) if os.path.exists(path) else None
+
+        try:
+            with ThreadPoolExecutor(max_workers=KEYFRAME_CONCURRENCY, thread_name_prefix="keyframe") as pool:
+                frames = [frame for frame in pool.map(grab, range(count)) if frame]
+        except BaseException:
+            workspace.release(failed=True)
+            raise
+        print(f"Extracted {len(frames)}/{count} keyframes for {youtube_url}")
+        current_span().add(bytes=sum(os.path.getsize(path) for _, path in frames))
+        if not frames:
+            workspace.release()
+            return frames, None
+        return frames, workspace
+
+    @property
+    def media_store(self):
+        """Where streamed downloads go (GCS bucket, or the local stand-in); None disables streaming."""
+        if not MEDIA_STREAMING:
+            return None
+        return get_media_store(self.bucket_name)
+
+    def _stream_sources(self, youtube_url: str, kind: str) -> list:
+        """[(media_url, ffmpeg_headers)] for the selected format(s); yt-dlp first, pytubefix as fallback."""
+        ydl_opts = {'format': STREAM_AUDIO_FORMAT if kind == "audio" else STREAM_VIDEO_FORMAT, 'quiet': True, 'no_warnings': True}
+        cookie_path = self._get_cookie_path()
+        if cookie_path:
+            ydl_opts['cookiefile'] = cookie_path
+        try:
+            info = self._process_info(youtube_url, ydl_opts)
+            sources = []
+            for fmt in info.get("requested_formats") or [info]:
+                headers = "".join(f"{k}: {v}\r\n" for k, v in (fmt.get("http_headers") or {}).items())
+                sources.append((fmt["url"], headers))
+            return sources
+        except Exception as e:
+            print(f"yt-dlp stream extraction failed: {e}. Trying pytubefix fallback...")
+            from pytubefix import YouTube
+            yt = YouTube(youtube_url)
+            if kind == "audio":
+                stream = yt.streams.get_audio_only()
+            else:
+                stream = yt.streams.filter(progressive=True, file_extension='mp4').order_by('resolution').desc().first()
+            if not stream:
+                raise ValueError(f"No {kind} stream found via pytubefix.")
+            return [(stream.url, "")]
+
+    def _stream_media(self, youtube_url: str, kind: str, store) -> str:
+        """
+        Pipes the media through ffmpeg (mp3 re-encode for audio, remux to fragmented mp4 for video)
+        straight into `store`, so nothing is staged on local disk. Returns the stored object's URI.
+        """
+        import uuid
+        import subprocess
+
+        sources = self._stream_sources(youtube_url, kind)
+        cmd = ["ffmpeg", "-nostdin", "-loglevel", "error"]
+        for url, headers in sources:
+            if headers:
+                cmd += ["-headers", headers]
+            cmd += ["-i", url]
+        if kind == "audio":
+            cmd += ["-vn", "-ac", "1", "-b:a", f"{AUDIO_MP3_KBPS}k", "-f", "mp3", "pipe:1"]
+            name, content_type = f"{uuid.uuid4()}/audio.mp3", "audio/mpeg"
+        else:
+            # Fragmented mp4 can be written front to back, unlike a regular mp4 whose index goes at the start
+            cmd += ["-map", "0:v:0", "-map", f"{len(sources) - 1}:a:0?", "-c", "copy",
+                    "-movflags", "frag_keyframe+empty_moov", "-f", "mp4", "pipe:1"]
+            name, content_type = f"{uuid.uuid4()}/video.mp4", "video/mp4"
+
+        uri = store.uri(name)
+        print(f"Streaming {kind} for {youtube_url} to {uri}")
+        started = time.time()
+        total = 0
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            with store.open_writer(name, content_type) as writer:
+                while True:
+                    chunk = proc.stdout.read(STREAM_READ_SIZE)
+                    if not chunk:
+                        break
+                    writer.write(chunk)
+                    total += len(chunk)
+            stderr = proc.stderr.read().decode("utf-8", "replace")
+            if proc.wait(timeout=60) != 0 or total == 0:
+                raise ValueError(f"ffmpeg {kind} stream failed: {stderr.strip()[-500:]}")
+        except Exception:
+            proc.kill()
+            try:
+                store.delete(uri)
+            except Exception:
+                pass
+            raise
+        print(f"Streamed {total / 1e6:.1f}MB of {kind} in {time.time() - started:.1f}s")
+        current_span().add(bytes=total)
+        return uri
+
+    @traced("youtube.download", kind="audio")
+    def stream_audio(self, youtube_url: str, store=None) -> str:
+        """Audio-only stream re-encoded to mp3 and uploaded as it downloads. Returns the URI (gs://... for GCS)."""
+        return self._stream_media(youtube_url, "audio", store or self.media_store)
+
+    @traced("youtube.download", kind="video")
+    def stream_video(self, youtube_url: str, store=None) -> str:
+        """Up to 720p video remuxed to fragmented mp4 and uploaded as it downloads. Returns the URI."""
+        return self._stream_media(youtube_url, "video", store or self.media_store)
+
+    @traced("youtube.download", kind="video")
     def download_video(self, youtube_url: str) -> str:
         """
         Download standard resolution video (up to 720p to save time/bandwidth) using yt-dlp.
-        Returns the path to the downloaded video file.
+        Returns the path to the downloaded video file; release it with get_workspace_manager().release_path().
         """
-        import uuid
         import os
-        import yt_dlp as ytdlp_mod
 
-        base_dir = "/app" if os.path.isdir("/app") else os.path.dirname(os.path.abspath(__file__))
-        req_id = str(uuid.uuid4())
-        out_dir = os.path.join(base_dir, "temp", req_id)
-        os.makedirs(out_dir, exist_ok=True)
+        workspace, cached = self._download_workspace("video", youtube_url, VIDEO_FORMAT)
+        if cached:
+            return cached
+        out_dir = workspace.path
         
         out_path = os.path.join(out_dir, "video.%(ext)s")
         cookie_path = self._get_cookie_path()
         
         ydl_opts = {
-            'format': 'bestvideo[height<=720][ext=mp4]+bestaudio[ext=m4a]/best[height<=720][ext=mp4]/best',
+            'format': VIDEO_FORMAT,
             'outtmpl': out_path,
             'quiet': False,
             'merge_output_format': 'mp4',
@@ -248,8 +668,7 @@ class YouTubeService:
             
         try:
             print(f"Attempting video download with yt-dlp: {youtube_url}")
-            with ytdlp_mod.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([youtube_url])
+            self._process_info(youtube_url, ydl_opts, download=True)
             
             import glob
             downloaded_files = glob.glob(os.path.join(out_dir, "video.mp4"))
@@ -261,7 +680,7 @@ class YouTubeService:
             if not downloaded_files:
                 raise ValueError("Video download failed: No file found.")
                 
-            return downloaded_files[0]
+            return self._finish_download(workspace, downloaded_files[0])
             
         except Exception as e:
             print(f"yt-dlp video download failed: {e}. Trying pytubefix fallback...")
@@ -279,30 +698,26 @@ class YouTubeService:
                 
                 download_path = video_stream.download(output_path=out_dir, filename="video_raw.mp4")
                 print(f"pytubefix video download success: {download_path}")
-                return download_path
+                return self._finish_download(workspace, download_path)
                 
             except Exception as e2:
                 print(f"pytubefix video download failed: {e2}")
+                workspace.release(failed=True)
                 raise ValueError(f"Could not download video via any method. Last error: {e2}")
 
+    @traced("youtube.metadata")
     def get_metadata(self, youtube_url: str) -> dict:
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'nocheckcertificate': True,
-            'extract_flat': True,
-        }
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(youtube_url, download=False)
-                return {
-                    "title": info.get("title", "Unknown Title"),
-                    "author": info.get("uploader", "Unknown Channel"),
-                    "publish_date": info.get("upload_date", "Unknown Date"),
-                    "length": info.get("duration", 0),
-                    "channel_url": info.get("channel_url", ""),
-                    "description": info.get("description", "")
-                }
+            info = self._video_info(youtube_url)
+            return {
+                "title": info.get("title", "Unknown Title"),
+                "author": info.get("uploader", "Unknown Channel"),
+                "publish_date": info.get("upload_date", "Unknown Date"),
+                "length": info.get("duration", 0),
+                "channel_url": info.get("channel_url", ""),
+                "description": info.get("description", "")
+            }
         except Exception as e:
             print(f"Metadata extraction failed: {e}")
+            current_span().outcome = "error"
             return {}
@@ -0,0 +1,28 @@
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+
+# Tests import the backend the way the app does (from services.x import ...), with local state in a scratch DATA_DIR
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp())
+
+
+@pytest.fixture
+def fake_services():
+    """Points the service registry at the benchmark fakes for Supabase, YouTube and Gemini (needs fastapi)."""
+    pytest.importorskip("fastapi")
+    from dependencies import registry
+    from benchmarks.fakes import FakeSupabase, FakeYouTubeService, FakeGeminiService
+
+    saved = dict(registry.__dict__)
+    services = SimpleNamespace(supabase=FakeSupabase(latency=0), youtube=FakeYouTubeService(latency=0),
+                               gemini=FakeGeminiService(latency=0.2))
+    registry._project_id, registry._project_id_resolved = "test", True
+    registry._youtube, registry._gemini = services.youtube, services.gemini
+    registry._supabase, registry._supabase_built = services.supabase, True
+    yield services
+    registry.__dict__.update(saved)
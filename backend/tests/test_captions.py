@@ -0,0 +1,44 @@
+"""Caption parser parity: streamed input, the recorded fixtures and rolling-caption de-duplication."""
+import os
+
+import pytest
+
+from benchmarks.bench_captions import DEFAULT_FILES, legacy_from_file, synthetic_rolling_vtt, _repeated_lines
+from services.captions import iter_segments, parse_caption_file, segments_to_text
+
+FIXTURES = [path for path in DEFAULT_FILES if os.path.exists(path)]
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=os.path.basename)
+def test_streamed_lines_parse_like_the_file(path):
+    # _fetch_via_ytdlp feeds response.iter_lines(), which strips the line endings
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert list(iter_segments(iter(lines))) == parse_caption_file(path)
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=os.path.basename)
+def test_fixture_text_matches_the_legacy_parser(path):
+    legacy = legacy_from_file(path)
+    streamed = segments_to_text(parse_caption_file(path))
+    assert set(streamed.split()) == set(legacy.split())
+    assert _repeated_lines(streamed) <= _repeated_lines(legacy)
+
+
+def test_rolling_captions_emit_each_line_once():
+    n_lines = 200
+    segments = list(iter_segments(synthetic_rolling_vtt(n_lines).splitlines()))
+    expected = " ".join(f"line number {i} of the talk" for i in range(n_lines))
+    assert segments_to_text(segments) == expected
+
+
+def test_srt_and_inline_word_timings():
+    srt = [
+        "1", "00:00:01,000 --> 00:00:02,500", "Hello &amp; welcome", "",
+        "2", "00:00:02,500 --> 00:00:04,000", "Hello &amp; welcome", "to<00:00:03.000><c> the</c><00:00:03.500><c> talk</c>", "",
+    ]
+    segments = list(iter_segments(srt, word_timestamps=True))
+    assert [(s["start"], s["end"], s["text"]) for s in segments] == [(1.0, 2.5, "Hello & welcome"), (2.5, 4.0, "to the talk")]
+    assert segments[1]["words"] == [
+        {"start": 2.5, "text": "to"}, {"start": 3.0, "text": "the"}, {"start": 3.5, "text": "talk"},
+    ]
@@ -0,0 +1,110 @@
+"""SQLite job queue: backpressure, leases, giving up on jobs, pruning, and a worker pool draining it."""
+import time
+
+import pytest
+
+from services import worker_pool
+from services.job_queue import MAX_ATTEMPTS, QueueFull, SQLiteJobQueue
+from services.worker_pool import JOB_FAILURE_HANDLERS, JOB_HANDLERS, WorkerPool
+
+failures = []
+
+
+def sleep_job(payload: dict, stop=None):
+    time.sleep(payload["job_ms"] / 1000.0)
+
+
+def stoppable_job(payload: dict, stop=None):
+    if stop.wait(30):
+        raise RuntimeError("interrupted")
+
+
+def record_failure(payload: dict, error: str):
+    failures.append((payload["analysis_id"], error))
+
+
+def _expire(queue, job):
+    queue._conn().execute("UPDATE jobs SET lease_expires = ? WHERE id = ?", (time.time() - 1, job.id))
+
+
+def test_one_job_per_analysis_and_backpressure(tmp_path):
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.db"), max_pending=2)
+    assert queue.enqueue("a", {"analysis_id": "a"})
+    assert not queue.enqueue("a", {"analysis_id": "a"})
+    assert queue.enqueue("b", {"analysis_id": "b"})
+    assert not queue.has_capacity()
+    with pytest.raises(QueueFull):
+        queue.enqueue("c", {"analysis_id": "c"})
+
+    job = queue.claim("w0")
+    assert (job.analysis_id, job.attempts) == ("a", 1)
+    queue.complete(job.id)
+    assert queue.stats() == {"max_pending": 2, "done": 1, "pending": 1}
+
+
+def test_expired_leases_are_requeued_then_given_up_on(tmp_path):
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.db"))
+    queue.enqueue("a", {"analysis_id": "a"})
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        job = queue.claim("w0")
+        assert job.attempts == attempt
+        _expire(queue, job)
+        requeued, exhausted = queue.reclaim_expired()
+        if attempt < MAX_ATTEMPTS:
+            assert (requeued, exhausted) == (1, [])
+    assert requeued == 0
+    assert [(j.analysis_id, j.attempts) for j in exhausted] == [("a", MAX_ATTEMPTS)]
+    assert queue.claim("w0") is None
+    assert queue.stats().get("failed") == 1
+
+
+def test_reclaim_fails_what_exhausted_jobs_ran_for_and_prunes(tmp_path, monkeypatch):
+    monkeypatch.setitem(JOB_FAILURE_HANDLERS, "analysis", f"{__name__}:record_failure")
+    failures.clear()
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.db"))
+    queue.enqueue("old", {"analysis_id": "old"})
+    queue.complete(queue.claim("w0").id)
+    queue._conn().execute("UPDATE jobs SET updated_at = 0")
+    queue.enqueue("a", {"analysis_id": "a"})
+    for _ in range(MAX_ATTEMPTS):
+        _expire(queue, queue.claim("w0"))
+        worker_pool._reclaim(queue, "w0")
+    assert failures == [("a", "Worker lease expired too many times")]
+    assert queue.stats() == {"max_pending": queue.max_pending, "failed": 1}
+
+
+def test_worker_pool_drains_the_queue(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("JOB_QUEUE_BACKEND", "sqlite")
+    monkeypatch.setitem(JOB_HANDLERS, "sleep", f"{__name__}:sleep_job")
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.db"))
+    for i in range(20):
+        queue.enqueue(f"job-{i}", {"job_ms": 10}, kind="sleep")
+
+    pool = WorkerPool(2, poll_interval=0.01)
+    pool.start()
+    try:
+        deadline = time.monotonic() + 60
+        while queue.stats().get("done", 0) < 20 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        pool.stop()
+    assert queue.stats() == {"max_pending": queue.max_pending, "done": 20}
+
+
+def test_job_interrupted_by_stop_is_left_for_another_worker(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("JOB_QUEUE_BACKEND", "sqlite")
+    monkeypatch.setitem(JOB_HANDLERS, "stoppable", f"{__name__}:stoppable_job")
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.db"))
+    queue.enqueue("a", {}, kind="stoppable")
+
+    pool = WorkerPool(1, poll_interval=0.01)
+    pool.start()
+    try:
+        deadline = time.monotonic() + 60
+        while queue.stats().get("running", 0) < 1 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        pool.stop()
+    assert queue.stats() == {"max_pending": queue.max_pending, "running": 1}
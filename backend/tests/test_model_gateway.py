@@ -0,0 +1,128 @@
+"""ModelGateway admission, retries and the circuit breaker, against in-process fake model calls."""
+import time
+import asyncio
+import threading
+
+import pytest
+
+from benchmarks.fakes import FakeModelError
+from services.model_gateway import LANES, CircuitBreaker, ModelCallRejected, ModelGateway, ModelRateLimits
+
+
+def _gateway(tmp_path, rpm: float = 6000, burst: float = 10, concurrency: int = 8, breaker=None, **lane_overrides):
+    lanes = {name: dict(spec) for name, spec in LANES.items()}
+    for lane, overrides in lane_overrides.items():
+        lanes[lane].update(overrides)
+    return ModelGateway(
+        rpm=rpm, burst=burst, concurrency=concurrency, lanes=lanes,
+        limits=ModelRateLimits(str(tmp_path / "model_limits.db")),
+        breaker=breaker or CircuitBreaker(failures=3, cooldown=5), retry_initial=0.01, retry_max=0.05,
+    )
+
+
+class _Flaky:
+    """Fails with the given errors, in order, then answers."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def test_retries_throttled_and_unavailable_calls(tmp_path):
+    gateway = _gateway(tmp_path)
+    model = _Flaky(FakeModelError(429, "quota"), FakeModelError(503, "down"))
+    assert gateway.call("full", model) == "ok"
+    assert model.calls == 3
+    lane = gateway.stats()["lanes"]["full"]
+    assert (lane["throttled"], lane["unavailable"], lane["retries"], lane["ok"]) == (1, 1, 2, 1)
+    assert gateway.stats()["in_flight"] == 0
+
+
+def test_errors_a_retry_wont_fix_are_not_retried(tmp_path):
+    gateway = _gateway(tmp_path)
+    model = _Flaky(ValueError("bad prompt"))
+    with pytest.raises(ValueError):
+        gateway.call("full", model)
+    assert model.calls == 1
+
+
+def test_open_circuit_rejects_calls_early(tmp_path):
+    gateway = _gateway(tmp_path, breaker=CircuitBreaker(failures=2, cooldown=30), live={"max_wait": 0.2})
+    for _ in range(2):
+        with pytest.raises(FakeModelError):
+            gateway.call("live", _Flaky(FakeModelError(503, "down")))
+    model = _Flaky()
+    started = time.monotonic()
+    with pytest.raises(ModelCallRejected):
+        gateway.call("live", model)
+    assert time.monotonic() - started < 1
+    assert model.calls == 0
+    assert gateway.stats()["breaker"] == "open"
+
+
+def test_waiting_on_its_own_lane_bucket_does_not_hold_back_lower_lanes(tmp_path):
+    # The full lane may make 2 calls a minute; its third call waits on the lane bucket, not on shared capacity
+    gateway = _gateway(tmp_path, burst=2, full={"rpm": 1, "max_wait": 1.5}, snapshot={"max_wait": 1})
+    gateway.call("full", _Flaky())
+    gateway.call("full", _Flaky())
+    outcome = []
+
+    def starved_call():
+        try:
+            gateway.call("full", _Flaky())
+        except ModelCallRejected as e:
+            outcome.append(e)
+
+    starved = threading.Thread(target=starved_call)
+    starved.start()
+    time.sleep(0.2)
+    started = time.monotonic()
+    assert gateway.call("snapshot", _Flaky()) == "ok"
+    assert time.monotonic() - started < 0.5
+    starved.join()
+    assert len(outcome) == 1
+
+
+def test_slots_go_to_higher_priority_waiters_first(tmp_path):
+    gateway = _gateway(tmp_path, concurrency=1, snapshot={"max_wait": 5})
+    release, order = threading.Event(), []
+
+    def hold():
+        release.wait(5)
+
+    def record(lane):
+        order.append(lane)
+
+    holder = threading.Thread(target=gateway.call, args=("full", hold))
+    holder.start()
+    time.sleep(0.1)
+    waiters = [threading.Thread(target=gateway.call, args=(lane, record, lane)) for lane in ("snapshot", "full")]
+    for waiter in waiters:
+        waiter.start()
+    time.sleep(0.3)
+    release.set()
+    for thread in [holder, *waiters]:
+        thread.join()
+    assert order == ["full", "snapshot"]
+
+
+def test_call_async_admits_and_releases_off_the_event_loop(tmp_path):
+    gateway = _gateway(tmp_path, concurrency=2)
+
+    async def answer(value):
+        await asyncio.sleep(0.01)
+        return value
+
+    async def run():
+        return await asyncio.gather(*(gateway.call_async("full", answer, i) for i in range(6)))
+
+    assert asyncio.run(run()) == list(range(6))
+    stats = gateway.stats()
+    assert stats["in_flight"] == 0
+    assert stats["lanes"]["full"]["ok"] == 6
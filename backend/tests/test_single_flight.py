@@ -0,0 +1,77 @@
+"""Single-flight de-duplication: the flight store, and concurrent submissions of one video through start_analysis."""
+import uuid
+import asyncio
+
+from services.single_flight import FLIGHT_MAX_ATTEMPTS, SingleFlight
+
+
+def test_followers_land_with_the_leader(tmp_path):
+    flights = SingleFlight(str(tmp_path / "flights.db"))
+    key = flights.make_key("vid", "auto", False, "v1", "model")
+    assert flights.join(key, "a", {"analysis_id": "a"})
+    assert not flights.join(key, "b", {"analysis_id": "b"})
+    assert not flights.join(key, "c", {"analysis_id": "c"})
+    assert flights.followers("a") == ["b", "c"]
+    assert flights.is_follower("b") and not flights.is_follower("a")
+    assert flights.land("a") == ["b", "c"]
+    assert flights.stats()["in_flight"] == 0
+    # The next submission starts a new flight
+    assert flights.join(key, "d", {"analysis_id": "d"})
+
+
+def test_failed_leaders_hand_over_until_attempts_run_out(tmp_path):
+    flights = SingleFlight(str(tmp_path / "flights.db"))
+    key = flights.make_key("vid", "auto", False, "v1", "model")
+    ids = [f"row-{i}" for i in range(FLIGHT_MAX_ATTEMPTS + 2)]
+    flights.join(key, ids[0], {"analysis_id": ids[0]})
+    for analysis_id in ids[1:]:
+        flights.join(key, analysis_id, {"analysis_id": analysis_id})
+
+    leader = ids[0]
+    for attempt in range(1, FLIGHT_MAX_ATTEMPTS):
+        outcome, promoted, payload = flights.abort(leader)
+        assert (outcome, promoted, payload) == ("retry", ids[attempt], {"analysis_id": ids[attempt]})
+        leader = promoted
+    outcome, followers, _ = flights.abort(leader)
+    assert outcome == "fail"
+    assert followers == ids[FLIGHT_MAX_ATTEMPTS:]
+    assert flights.stats()["waiting_followers"] == 0
+
+
+class _BackgroundTasks:
+    """Collects what start_analysis schedules, so every submission lands before any job runs."""
+
+    def __init__(self):
+        self.tasks = []
+
+    def add_task(self, func, *args, **kwargs):
+        self.tasks.append((func, args, kwargs))
+
+
+def test_concurrent_submissions_share_one_model_call(fake_services, monkeypatch):
+    from routers import analysis
+
+    monkeypatch.setenv("JOB_QUEUE_BACKEND", "inline")
+    supabase, gemini = fake_services.supabase, fake_services.gemini
+    background = _BackgroundTasks()
+    url = f"https://www.youtube.com/watch?v={uuid.uuid4().hex[:11]}"
+
+    def submission(i: int):
+        request = analysis.AnalysisRequest(youtube_url=url, user_id=f"user-{i}", video_title="", company="",
+                                           role="", target_person="")
+        return analysis.start_analysis(request, background, gemini, supabase)
+
+    async def run():
+        responses = await asyncio.gather(*(submission(i) for i in range(20)))
+        await asyncio.gather(*(func(*args, **kwargs) for func, args, kwargs in background.tasks))
+        return responses
+
+    responses = asyncio.run(run())
+    analysis._job_state(supabase).flush()
+
+    rows = [supabase.tables["video_analyses"][response["analysis_id"]] for response in responses]
+    assert gemini.calls == 1
+    assert len(background.tasks) == 1
+    assert sum(1 for response in responses if response.get("deduplicated")) == 19
+    assert all(row["status"] == "completed" for row in rows)
+    assert len({repr(row["analysis_results"]) for row in rows}) == 1
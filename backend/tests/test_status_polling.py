@@ -0,0 +1,54 @@
+"""GET /analyze/{id} polling: the status cache serves unchanged rows without a DB read, and ETags turn repeats into 304s."""
+import json
+import uuid
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+# Polls spent in each status, like a client polling every 2s through a short analysis
+LIFECYCLE = [("pending", 3), ("downloading", 5), ("analyzing", 8), ("completed", 3)]
+DASHBOARD = {"overall_performance": {"score": 82}, "timeline_analysis": [{"timestamp": "00:10", "insight": "Clear"}]}
+
+
+def _poll_lifecycle(supabase, analysis_id: str, projection: str):
+    from routers import analysis
+    from services.progress import get_progress_store
+
+    supabase.tables["video_analyses"] = {analysis_id: {"id": analysis_id, "status": "pending", "youtube_url": "test"}}
+    responses, etag = [], None
+    for status, polls in LIFECYCLE:
+        if status != "pending":
+            fields = {"status": status, **({"analysis_results": DASHBOARD} if status == "completed" else {})}
+            # As a worker process would: the row and the progress log change, this process' cache doesn't
+            supabase.table("video_analyses").update(fields).eq("id", analysis_id).execute()
+            get_progress_store().publish(analysis_id, "status", status)
+        for _ in range(polls):
+            response = asyncio.run(analysis.get_analysis(analysis_id, projection, etag, supabase))
+            etag = response.headers.get("etag")
+            responses.append((status, response))
+    return responses
+
+
+@pytest.mark.parametrize("projection", ["full", "status"])
+def test_polls_read_the_db_once_per_change(fake_services, projection):
+    from services.status_cache import get_status_cache
+
+    cache = get_status_cache()
+    before = dict(cache.stats())
+    responses = _poll_lifecycle(fake_services.supabase, f"poll-{uuid.uuid4()}", projection)
+    stats = cache.stats()
+
+    changes = len(LIFECYCLE)
+    # projection=status reads the status columns first, then the full row once it has completed
+    expected_reads = changes + (1 if projection == "status" else 0)
+    assert stats["db_reads"] - before["db_reads"] == expected_reads
+    assert stats["not_modified"] - before["not_modified"] == len(responses) - changes
+    assert [r.status_code for _, r in responses].count(200) == changes
+
+    first_completed = next(r for status, r in responses if status == "completed")
+    assert json.loads(first_completed.body)["analysis_results"] == DASHBOARD
+    if projection == "status":
+        analyzing = [r for status, r in responses if status == "analyzing"][0]
+        assert "analysis_results" not in json.loads(analyzing.body)
@@ -0,0 +1,37 @@
+"""
+Standalone analysis worker pool.
+Run alongside the API (started with JOB_WORKERS=0) to process queued analyses:
+    python worker.py [num_workers]
+"""
+import sys
+import signal
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.worker_pool import WorkerPool, NUM_WORKERS
+from routers.analysis import requeue_pending_analyses
+from services.workspace import get_workspace_manager
+
+if __name__ == "__main__":
+    num_workers = int(sys.argv[1]) if len(sys.argv) > 1 else max(NUM_WORKERS, 1)
+
+    try:
+        get_workspace_manager().sweep()
+    except Exception as e:
+        print(f"Workspace sweep failed: {e}")
+
+    try:
+        requeue_pending_analyses()
+    except Exception as e:
+        print(f"Could not re-queue pending analyses: {e}")
+
+    pool = WorkerPool(num_workers)
+    pool.start()
+
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    signal.signal(signal.SIGINT, lambda *_: stopped.set())
+    stopped.wait()
+    pool.stop()